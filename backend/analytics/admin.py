@@ -3,7 +3,7 @@ Admin configuration for analytics app.
 """
 
 from django.contrib import admin
-from .models import MarketTrend, PropertyValuation
+from .models import ListingStats, MarketTrend, PropertyValuation
 
 
 @admin.register(MarketTrend)
@@ -73,3 +73,20 @@ class PropertyValuationAdmin(admin.ModelAdmin):
         ),
         ("History", {"fields": ("valuation_history",), "classes": ("collapse",)}),
     )
+
+
+@admin.register(ListingStats)
+class ListingStatsAdmin(admin.ModelAdmin):
+    """Admin configuration for ListingStats model."""
+
+    list_display = [
+        "city",
+        "state",
+        "status",
+        "listing_count",
+        "avg_price",
+        "refreshed_at",
+    ]
+    list_filter = ["status", "state"]
+    search_fields = ["city", "state"]
+    readonly_fields = ["refreshed_at"]
@@ -0,0 +1,16 @@
+"""
+App configuration for analytics app.
+"""
+
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    """Analytics app configuration."""
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+
+    def ready(self):
+        """Connect signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,291 @@
+"""
+Comparable-sales (comps) engine for property valuations.
+
+Sold and available listings are loaded into a normalized NumPy feature
+matrix together with a coarse lat/lng grid. The ``build_comps_index`` task
+builds it and shares it through the cache; each process keeps a copy
+between refreshes, so requests never scan listings. A query looks up
+only the grid cells around the subject (the spatial prefilter), scores those
+candidates in one vectorized pass and keeps the k nearest. Each comp's price
+is then adjusted for its differences from the subject using the hedonic
+model's coefficients, giving an estimate grounded in nearby sales.
+"""
+
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from .valuation import HedonicModel, queue_build
+
+COMP_STATUSES = ["sold", "available"]
+KM_PER_DEGREE = 111.32
+GRID_DEGREES = 0.1
+INDEX_CACHE_KEY = "analytics:comps_index"
+# Rebuilt by beat every INDEX_MAX_AGE; the cache keeps the last build longer
+INDEX_CACHE_TIMEOUT = 60 * 60
+INDEX_MAX_AGE = 60 * 15
+DEFAULT_K = 8
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 40.0
+# Distance (km) that counts as much as one standard deviation of a feature
+GEO_SCALE_KM = 2.0
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 2.0, 0.5])  # beds, baths, log sqft, year
+
+
+class CompsIndex:
+    """In-memory index of comparable listings."""
+
+    _instance = None
+    _fetched_at = 0.0
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 9
+        ids, lat, lng, beds, baths, sqft, years, price, zips = columns
+        self.ids = np.array(ids, dtype=np.int64)
+        self.lat = np.array(lat, dtype=float)
+        self.lng = np.array(lng, dtype=float)
+        self.bedrooms = np.array(beds, dtype=float)
+        self.bathrooms = np.array(baths, dtype=float)
+        self.sqft = np.array(sqft, dtype=float)
+        self.price = np.array(price, dtype=float)
+
+        years = np.array([np.nan if y is None else y for y in years], dtype=float)
+        self.fill_year = (
+            float(np.nanmedian(years))
+            if len(years) and not np.isnan(years).all()
+            else 2000.0
+        )
+        self.year_built = np.where(np.isnan(years), self.fill_year, years)
+
+        raw = self._raw_features(
+            self.bedrooms, self.bathrooms, self.sqft, self.year_built
+        )
+        self.mean = raw.mean(axis=0) if len(raw) else np.zeros(4)
+        std = raw.std(axis=0) if len(raw) else np.ones(4)
+        self.std = np.where(std > 0, std, 1.0)
+        self.features = (raw - self.mean) / self.std * FEATURE_WEIGHTS
+
+        self.cells = defaultdict(list)
+        lat_cells, lng_cells = self._cell(self.lat, self.lng)
+        for index, cell in enumerate(zip(lat_cells.tolist(), lng_cells.tolist())):
+            self.cells[cell].append(index)
+        self.cells = {cell: np.array(rows) for cell, rows in self.cells.items()}
+
+        self.zip_centroids = {}
+        if len(self.ids):
+            zip_keys, zip_index = np.unique(np.asarray(zips), return_inverse=True)
+            counts = np.bincount(zip_index)
+            for key, lat_c, lng_c in zip(
+                zip_keys.tolist(),
+                np.bincount(zip_index, weights=self.lat) / counts,
+                np.bincount(zip_index, weights=self.lng) / counts,
+            ):
+                self.zip_centroids[key] = (float(lat_c), float(lng_c))
+
+    @staticmethod
+    def _raw_features(bedrooms, bathrooms, sqft, year_built):
+        return np.column_stack(
+            [bedrooms, bathrooms, np.log(np.maximum(sqft, 1)), year_built]
+        )
+
+    @staticmethod
+    def _cell(lat, lng):
+        return (
+            np.floor(np.asarray(lat) / GRID_DEGREES).astype(int),
+            np.floor(np.asarray(lng) / GRID_DEGREES).astype(int),
+        )
+
+    @classmethod
+    def build(cls):
+        """Load comparable listings from the database."""
+        from properties.models import Property
+
+        rows = list(
+            Property.objects.filter(
+                status__in=COMP_STATUSES,
+                latitude__isnull=False,
+                longitude__isnull=False,
+                price__gt=0,
+                square_feet__gt=0,
+            )
+            .order_by()
+            .values_list(
+                "id",
+                "latitude",
+                "longitude",
+                "bedrooms",
+                "bathrooms",
+                "square_feet",
+                "year_built",
+                "price",
+                "zip_code",
+            )
+        )
+        return cls(rows)
+
+    @classmethod
+    def publish(cls):
+        """Build the index and share it with every process through the cache."""
+        index = cls.build()
+        cache.set(INDEX_CACHE_KEY, index, INDEX_CACHE_TIMEOUT)
+        return index
+
+    @classmethod
+    def get(cls):
+        """Return the latest published index, or None before the first build.
+
+        Each process refetches it from the cache once its copy is older than
+        ``INDEX_MAX_AGE``. A cold cache queues a build and keeps serving the
+        copy this process already has.
+        """
+        if cls._instance is None or time.monotonic() - cls._fetched_at > INDEX_MAX_AGE:
+            index = cache.get(INDEX_CACHE_KEY)
+            if index is None:
+                from .tasks import build_comps_index
+
+                queue_build(build_comps_index)
+            else:
+                cls._instance = index
+                cls._fetched_at = time.monotonic()
+        return cls._instance
+
+    def candidates(self, lat, lng, radius_km):
+        """Return row indices in the grid cells overlapping the search circle."""
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        (lat_lo, lat_hi), (lng_lo, lng_hi) = self._cell(
+            [lat - lat_span, lat + lat_span], [lng - lng_span, lng + lng_span]
+        )
+        found = [
+            self.cells[(i, j)]
+            for i in range(lat_lo, lat_hi + 1)
+            for j in range(lng_lo, lng_hi + 1)
+            if (i, j) in self.cells
+        ]
+        return np.concatenate(found) if found else np.array([], dtype=int)
+
+    def distances_km(self, rows, lat, lng):
+        """Return haversine distances from (lat, lng) to the given rows."""
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        lat2, lng2 = np.radians(self.lat[rows]), np.radians(self.lng[rows])
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        )
+        return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+    def nearest(self, subject, lat, lng, k=DEFAULT_K, radius_km=DEFAULT_RADIUS_KM):
+        """Return (rows, geo_km, score) for the k most similar nearby listings.
+
+        The search radius doubles until at least k candidates are in range or
+        ``MAX_RADIUS_KM`` is reached.
+        """
+        target = (
+            (
+                self._raw_features(
+                    np.array([subject["bedrooms"]], dtype=float),
+                    np.array([subject["bathrooms"]], dtype=float),
+                    np.array([subject["square_feet"]], dtype=float),
+                    np.array(
+                        [subject.get("year_built") or self.fill_year], dtype=float
+                    ),
+                )
+                - self.mean
+            )
+            / self.std
+            * FEATURE_WEIGHTS
+        )
+
+        while True:
+            rows = self.candidates(lat, lng, radius_km)
+            geo_km = self.distances_km(rows, lat, lng)
+            in_range = geo_km <= radius_km
+            if in_range.sum() >= k or radius_km >= MAX_RADIUS_KM:
+                break
+            radius_km = min(radius_km * 2, MAX_RADIUS_KM)
+
+        rows, geo_km = rows[in_range], geo_km[in_range]
+        score = np.sqrt(
+            ((self.features[rows] - target) ** 2).sum(axis=1)
+            + (geo_km / GEO_SCALE_KM) ** 2
+        )
+        if len(rows) > k:
+            best = np.argpartition(score, k)[:k]
+            rows, geo_km, score = rows[best], geo_km[best], score[best]
+        order = np.argsort(score)
+        return rows[order], geo_km[order], score[order]
+
+
+def find_comps(subject, latitude=None, longitude=None, k=DEFAULT_K):
+    """Value ``subject`` from its k nearest comparable listings.
+
+    ``subject`` holds the ``PropertyValuation`` detail fields. Without
+    coordinates the subject is placed at its zip code's listing centroid.
+    Returns a dict with the comps, the adjusted estimate and a 0-100
+    confidence, or None when no comparable listing is in range or the index
+    hasn't been built yet.
+    """
+    index = CompsIndex.get()
+    if index is None:
+        return None
+    if latitude is None or longitude is None:
+        centroid = index.zip_centroids.get(subject["zip_code"])
+        if centroid is None:
+            return None
+        latitude, longitude = centroid
+
+    rows, geo_km, score = index.nearest(subject, latitude, longitude, k=k)
+    if not len(rows):
+        return None
+
+    # Adjust each comp's price for its differences from the subject using the
+    # hedonic coefficients (location is shared, so it cancels out)
+    current_year = timezone.now().year
+    subject_x = HedonicModel.design_matrix(
+        np.array([subject["square_feet"]], dtype=float),
+        np.array([subject["bedrooms"]], dtype=float),
+        np.array([float(subject["bathrooms"])], dtype=float),
+        np.array([subject.get("year_built") or index.fill_year], dtype=float),
+        current_year,
+    )
+    comp_x = HedonicModel.design_matrix(
+        index.sqft[rows],
+        index.bedrooms[rows],
+        index.bathrooms[rows],
+        index.year_built[rows],
+        current_year,
+    )
+    try:
+        coefficients = HedonicModel.load().coefficients
+    except ValueError:
+        # Too little data to fit a model; fall back to unadjusted comps
+        coefficients = np.zeros(subject_x.shape[1])
+    adjusted = index.price[rows] * np.exp((subject_x - comp_x) @ coefficients)
+
+    weights = 1.0 / (1.0 + score)
+    estimate = float(np.average(adjusted, weights=weights))
+    spread = float(np.sqrt(np.average((adjusted / estimate - 1) ** 2, weights=weights)))
+    # Fewer, more distant or more scattered comps all lower the confidence
+    coverage = min(len(rows) / DEFAULT_K, 1.0)
+    closeness = 1.0 / (1.0 + float(np.mean(score)) / 4)
+    confidence = int(round(100 * coverage * closeness * math.exp(-2 * spread)))
+
+    comps = [
+        {
+            "property": int(index.ids[row]),
+            "price": round(float(index.price[row]), 2),
+            "adjusted_price": round(float(price), 2),
+            "distance_km": round(float(km), 3),
+            "similarity": round(1.0 / (1.0 + float(s)), 3),
+        }
+        for row, price, km, s in zip(rows, adjusted, geo_km, score)
+    ]
+    return {
+        "estimated_value": round(estimate, 2),
+        "confidence_score": max(0, min(confidence, 100)),
+        "comps": comps,
+    }
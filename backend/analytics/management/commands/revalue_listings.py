@@ -0,0 +1,77 @@
+"""
+Management command to revalue every listing with the hedonic model.
+
+Intended to run nightly from cron, e.g. ``0 3 * * * python manage.py revalue_listings``.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from analytics.valuation import HedonicModel, revalue_id_range
+from config.db import close_connections_before_fork, id_ranges
+from properties.models import Property
+
+
+def _init_worker():
+    """Set up Django in spawned worker processes (a no-op after fork)."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Refit the valuation model and revalue all listings in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Listing id span handled by each task",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        model = HedonicModel.load(refit=True)
+        self.stdout.write(f"Fitted valuation model (rmse {model.rmse:.3f} log-price)")
+
+        bounds = Property.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            self.stdout.write(self.style.WARNING("No listings to revalue"))
+            return
+        ranges = id_ranges(bounds["min_id"], bounds["max_id"], options["chunk_size"])
+        state = model.to_state()
+
+        valued = 0
+        if options["workers"] <= 1:
+            for start, end in ranges:
+                valued += revalue_id_range(start, end, state)
+        else:
+            # Forked children must not share the parent's database socket
+            close_connections_before_fork()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            ) as pool:
+                futures = [
+                    pool.submit(revalue_id_range, start, end, state)
+                    for start, end in ranges
+                ]
+                for done, future in enumerate(as_completed(futures), 1):
+                    valued += future.result()
+                    if done % 10 == 0:
+                        self.stdout.write(f"Revalued {valued} listings...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Revalued {valued} listings in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,28 @@
+"""
+Management command to derive market trends from property listings.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from analytics.rollup import TrendRollup
+
+
+class Command(BaseCommand):
+    help = "Roll up weekly/monthly/quarterly/yearly market trends from listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild trends for every market, not only the changed ones",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = TrendRollup().run(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled up {stats['listings']} listings into {stats['rows']} trend rows "
+                f"across {stats['markets']} markets in {time.monotonic() - started:.1f}s"
+            )
+        )
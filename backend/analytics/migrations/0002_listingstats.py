@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('avg_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Listing stats',
+                'unique_together': {('city', 'state', 'status')},
+            },
+        ),
+    ]
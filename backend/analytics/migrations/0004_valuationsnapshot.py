@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:35
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SUMMARY_SIZE = 10
+
+
+def explode_valuation_history(apps, schema_editor):
+    """Copy every valuation_history entry into ValuationSnapshot rows."""
+    PropertyValuation = apps.get_model('analytics', 'PropertyValuation')
+    ValuationSnapshot = apps.get_model('analytics', 'ValuationSnapshot')
+
+    batch = []
+    for valuation in PropertyValuation.objects.only('id', 'valuation_history', 'confidence_score').iterator(chunk_size=2000):
+        history = valuation.valuation_history or []
+        for entry in history:
+            try:
+                date = datetime.date.fromisoformat(str(entry.get('date') or entry['timestamp'])[:10])
+                value = Decimal(str(entry.get('estimated_value', entry.get('value'))))
+            except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation):
+                continue
+            rent = entry.get('estimated_rent')
+            batch.append(ValuationSnapshot(
+                valuation_id=valuation.id,
+                date=date,
+                estimated_value=value,
+                estimated_rent=Decimal(str(rent)) if rent is not None else None,
+                confidence_score=entry.get('confidence_score', valuation.confidence_score),
+            ))
+        if len(batch) >= 5000:
+            ValuationSnapshot.objects.bulk_create(batch)
+            batch = []
+
+        if len(history) > SUMMARY_SIZE:
+            PropertyValuation.objects.filter(pk=valuation.pk).update(
+                valuation_history=history[-SUMMARY_SIZE:]
+            )
+    ValuationSnapshot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_rollupwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('estimated_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('estimated_rent', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('confidence_score', models.PositiveSmallIntegerField()),
+                ('valuation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='analytics.propertyvaluation')),
+            ],
+            options={
+                'ordering': ['date', 'id'],
+                'indexes': [models.Index(fields=['valuation', 'date'], name='analytics_v_valuati_4b52f2_idx'), models.Index(fields=['date'], name='analytics_v_date_50afee_idx')],
+            },
+        ),
+        migrations.RunPython(explode_valuation_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-19 21:10
+
+from django.db import migrations, models
+
+# The listing columns the trend rollup reads; other updates (view and
+# favorite counters, descriptions, ...) don't change any trend
+ROLLUP_COLUMNS = [
+    'city', 'state', 'zip_code', 'status', 'price', 'square_feet',
+    'price_history', 'published_at', 'created_at', 'updated_at',
+]
+
+LOG_FUNCTION = '''
+CREATE OR REPLACE FUNCTION log_market_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO analytics_marketchange (city, state, xid, created_at)
+        VALUES (OLD.city, OLD.state, txid_current(), clock_timestamp());
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO analytics_marketchange (city, state, xid, created_at)
+        VALUES (NEW.city, NEW.state, txid_current(), clock_timestamp());
+    ELSIF TG_OP = 'UPDATE' AND (NEW.city, NEW.state) IS DISTINCT FROM (OLD.city, OLD.state) THEN
+        INSERT INTO analytics_marketchange (city, state, xid, created_at)
+        VALUES (NEW.city, NEW.state, txid_current(), clock_timestamp());
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+LOG_TRIGGERS = [
+    '''
+    CREATE TRIGGER properties_property_log_market_change
+    AFTER INSERT OR DELETE ON properties_property
+    FOR EACH ROW EXECUTE FUNCTION log_market_change()
+    ''',
+    '''
+    CREATE TRIGGER properties_property_log_market_update
+    AFTER UPDATE ON properties_property
+    FOR EACH ROW
+    WHEN (({old}) IS DISTINCT FROM ({new}))
+    EXECUTE FUNCTION log_market_change()
+    '''.format(
+        old=', '.join(f'OLD.{column}' for column in ROLLUP_COLUMNS),
+        new=', '.join(f'NEW.{column}' for column in ROLLUP_COLUMNS),
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_valuationsnapshot'),
+        ('properties', '0014_property_external_id_per_agent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('xid', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['xid'], name='marketchange_xid')],
+            },
+        ),
+        migrations.RunSQL(
+            LOG_FUNCTION,
+            reverse_sql='DROP FUNCTION IF EXISTS log_market_change()',
+        ),
+        migrations.RunSQL(
+            LOG_TRIGGERS,
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS properties_property_log_market_change ON properties_property',
+                'DROP TRIGGER IF EXISTS properties_property_log_market_update ON properties_property',
+            ],
+        ),
+        # Changes made before the log existed are unknown: make the next
+        # rollup a full one
+        migrations.RunSQL(
+            "DELETE FROM analytics_rollupwatermark WHERE name = 'market_trends'",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
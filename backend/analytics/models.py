@@ -3,7 +3,10 @@ Models for market analytics and trends.
 """
 
 from django.db import models
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import Lower
 from django.contrib.postgres.fields import ArrayField
+from django.utils import timezone
 
 
 class MarketTrend(models.Model):
@@ -71,15 +74,202 @@ class PropertyValuation(models.Model):
     confidence_score = models.PositiveSmallIntegerField()  # 0-100 confidence level
     last_updated = models.DateTimeField(auto_now=True)
     
-    # Historical valuations (stored as JSON array)
+    # Compact summary of the most recent valuations; the full, indexed history
+    # lives in ValuationSnapshot. Use record_snapshot() to append.
     valuation_history = ArrayField(
         models.JSONField(),
         default=list,
         blank=True
     )
     
+    HISTORY_SUMMARY_SIZE = 10
+    
     class Meta:
         unique_together = ['address_line1', 'city', 'state', 'zip_code']
         
     def __str__(self):
         return f"{self.address_line1}, {self.city}, {self.state} - ${self.estimated_value:,.2f}"
+
+    def record_snapshot(self, date=None):
+        """Append the current estimate to the history table and refresh the summary."""
+        snapshot = ValuationSnapshot.objects.create(
+            valuation=self,
+            date=date or timezone.localdate(),
+            estimated_value=self.estimated_value,
+            estimated_rent=self.estimated_rent,
+            confidence_score=self.confidence_score,
+        )
+        history = list(self.valuation_history or []) + [snapshot.as_summary()]
+        self.valuation_history = history[-self.HISTORY_SUMMARY_SIZE:]
+        PropertyValuation.objects.filter(pk=self.pk).update(valuation_history=self.valuation_history)
+        return snapshot
+
+
+class ValuationSnapshot(models.Model):
+    """Append-only record of a property valuation estimate."""
+    
+    valuation = models.ForeignKey(PropertyValuation, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    estimated_value = models.DecimalField(max_digits=12, decimal_places=2)
+    estimated_rent = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    confidence_score = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['date', 'id']
+        indexes = [
+            models.Index(fields=['valuation', 'date']),
+            models.Index(fields=['date']),
+        ]
+        
+    def __str__(self):
+        return f"{self.valuation_id} - ${self.estimated_value:,.2f} on {self.date}"
+
+    def as_summary(self):
+        """Return the entry in the ``valuation_history`` summary format."""
+        return {
+            'date': self.date.isoformat(),
+            'estimated_value': float(self.estimated_value),
+            'confidence_score': self.confidence_score,
+        }
+
+
+class ListingStatsManager(models.Manager):
+    """Manager that rebuilds the materialized listing statistics."""
+
+    def refresh(self, city=None, state=None):
+        """Recompute stats from ``Property`` with one grouped aggregate query.
+
+        With no arguments every (city, state, status) group is rebuilt; pass a
+        city and state to refresh just that market. Returns the list of
+        (city, state) keys that were written.
+        """
+        from properties.models import Property
+
+        started = timezone.now()
+        listings = Property.objects.annotate(
+            city_key=Lower('city'), state_key=Lower('state')
+        )
+        stale = self.all()
+        if city and state:
+            city, state = city.lower(), state.lower()
+            listings = listings.filter(city_key=city, state_key=state)
+            stale = stale.filter(city=city, state=state)
+
+        groups = listings.values('city_key', 'state_key', 'status').annotate(
+            listing_count=Count('id'),
+            avg_price=Avg('price'),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        ).order_by()
+
+        rows = [
+            self.model(
+                city=group['city_key'],
+                state=group['state_key'],
+                status=group['status'],
+                listing_count=group['listing_count'],
+                avg_price=group['avg_price'],
+                min_price=group['min_price'],
+                max_price=group['max_price'],
+                refreshed_at=started,
+            )
+            for group in groups
+        ]
+        self.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['city', 'state', 'status'],
+            update_fields=[
+                'listing_count', 'avg_price', 'min_price', 'max_price', 'refreshed_at',
+            ],
+        )
+        # Groups that no longer have any listings were not rewritten above
+        stale.filter(refreshed_at__lt=started).delete()
+
+        keys = {(row.city, row.state) for row in rows}
+        if city and state:
+            keys.add((city, state))
+        return sorted(keys)
+
+
+class ListingStats(models.Model):
+    """Materialized listing statistics per (city, state, status).
+
+    City and state are stored lower-cased so lookups are plain equality
+    matches on the unique index instead of unindexable ``iexact`` scans.
+    """
+    
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    status = models.CharField(max_length=20)
+    
+    listing_count = models.PositiveIntegerField(default=0)
+    avg_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    
+    objects = ListingStatsManager()
+    
+    class Meta:
+        unique_together = ['city', 'state', 'status']
+        verbose_name_plural = 'Listing stats'
+        
+    def __str__(self):
+        return f"{self.city}, {self.state} ({self.status}) - {self.listing_count} listings"
+
+    @staticmethod
+    def summary_cache_key(city, state):
+        """Return the cache key for a market's ``market_summary`` payload."""
+        return f"analytics:market_summary:{city.lower()}:{state.lower()}"
+
+    def as_summary(self):
+        """Return the stats in the shape used by ``market_summary``."""
+        return {
+            'count': self.listing_count,
+            'avg_price': self.avg_price,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+        }
+
+
+class RollupWatermark(models.Model):
+    """High-water mark recording how far an incremental job has processed."""
+    
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.name} @ {self.value:%Y-%m-%d %H:%M:%S}"
+
+    @classmethod
+    def get(cls, name):
+        """Return the stored watermark for ``name``, or None if never run."""
+        return cls.objects.filter(name=name).values_list('value', flat=True).first()
+
+    @classmethod
+    def set(cls, name, value):
+        """Advance the watermark for ``name``."""
+        cls.objects.update_or_create(name=name, defaults={'value': value})
+
+
+class MarketChange(models.Model):
+    """A market whose listings changed, written by a trigger on the listings table.
+    
+    Inserts and deletes log the listing's city; an update that moves a
+    listing logs both the old and the new city. ``xid`` is the writing
+    transaction's id, so ``TrendRollup`` only consumes rows from
+    transactions that finished before its run started.
+    """
+    
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    xid = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['xid'], name='marketchange_xid')]
+        
+    def __str__(self):
+        return f"{self.city}, {self.state} changed in {self.xid}"
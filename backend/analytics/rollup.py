@@ -0,0 +1,343 @@
+"""
+Rollup engine that derives ``MarketTrend`` rows from property listings.
+
+Each run reads the cities logged in ``MarketChange`` by a trigger on the
+listings table (inserts, deletes, and updates, with both cities when a
+listing moves) and rebuilds the weekly, monthly, quarterly and yearly trends
+of every market in those cities (city-wide and per zip code) in a single
+streaming pass over their listings. Trend rows a rebuild no longer produces
+are deleted. The first run, and ``full`` runs, rebuild every city.
+
+Metric definitions (we only store the current status, so transitions are
+dated by the listing's last update):
+
+- listings are bucketed by ``published_at`` (falling back to ``created_at``)
+- ``new_listings``/``median_price``/``avg_price``/``price_per_sqft`` cover the
+  listings published in the period; medians come from a ``QuantileSketch``
+- ``total_listings`` is the running count of still-active listings
+- ``pending_sales``/``closed_sales`` count listings that moved to pending/sold
+  in the period, and ``days_on_market`` averages list-to-close time for them
+- ``price_drops_pct`` is the share of the period's listings whose
+  ``price_history`` contains at least one price reduction
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from config.db import snapshot_xmin
+from .models import MarketChange, MarketTrend, RollupWatermark
+
+WATERMARK_NAME = "market_trends"
+PERIODS = ["weekly", "monthly", "quarterly", "yearly"]
+PERIOD_MONTHS = {"weekly": 7 / 30.4375, "monthly": 1, "quarterly": 3, "yearly": 12}
+ACTIVE_STATUSES = {"available", "pending"}
+# Ratios above this come from bad square footage and would skew the median
+MAX_PRICE_PER_SQFT = 100000
+
+LISTING_FIELDS = [
+    "city",
+    "state",
+    "zip_code",
+    "status",
+    "price",
+    "square_feet",
+    "price_history",
+    "published_at",
+    "created_at",
+    "updated_at",
+]
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets (the DDSketch scheme), so any
+    quantile is answered within ``relative_accuracy`` of the true value using
+    memory proportional to the value range, not the number of values.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value, weight=1):
+        """Add a non-negative value to the sketch."""
+        value = float(value)
+        if value <= 0:
+            self.zero_count += weight
+        else:
+            self.buckets[math.ceil(math.log(value) / self.log_gamma)] += weight
+        self.count += weight
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, weight in other.buckets.items():
+            self.buckets[index] += weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return the approximate ``q`` quantile, or None if the sketch is empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of the bucket keeps the error symmetric
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def median(self):
+        """Return the approximate median."""
+        return self.quantile(0.5)
+
+
+def period_start(day, period):
+    """Return the first day of the ``period`` bucket containing ``day``."""
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    if period == "monthly":
+        return day.replace(day=1)
+    if period == "quarterly":
+        return day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+    if period == "yearly":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def _as_date(value):
+    """Convert a datetime (aware or naive) or ISO string to a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def has_price_drop(price_history):
+    """Return True if the history contains a reduction between entries."""
+    entries = [
+        entry
+        for entry in price_history or []
+        if isinstance(entry, dict) and entry.get("price") is not None
+    ]
+    entries.sort(key=lambda entry: str(entry.get("date", "")))
+    return any(
+        float(later["price"]) < float(earlier["price"])
+        for earlier, later in zip(entries, entries[1:])
+    )
+
+
+class _Bucket:
+    """Accumulators for one (market, period, date) trend row."""
+
+    __slots__ = (
+        "prices",
+        "ppsf",
+        "price_sum",
+        "new_listings",
+        "new_active",
+        "price_drops",
+        "pending_sales",
+        "closed_sales",
+        "dom_sum",
+    )
+
+    def __init__(self):
+        self.prices = QuantileSketch()
+        self.ppsf = QuantileSketch()
+        self.price_sum = 0.0
+        self.new_listings = 0
+        self.new_active = 0
+        self.price_drops = 0
+        self.pending_sales = 0
+        self.closed_sales = 0
+        self.dom_sum = 0
+
+
+class TrendRollup:
+    """Rebuild ``MarketTrend`` rows for the markets touched by changed listings."""
+
+    def __init__(self, properties=None):
+        from properties.models import Property
+
+        self.properties = properties if properties is not None else Property.objects
+        self.stats = {"markets": 0, "listings": 0, "rows": 0}
+
+    def run(self, full=False):
+        """Rebuild the cities logged as changed (or all with ``full``)."""
+        # Read before the log: every transaction below it has committed
+        xmin = snapshot_xmin()
+        started = timezone.now()
+        full = full or RollupWatermark.get(WATERMARK_NAME) is None
+
+        cities = set(
+            MarketChange.objects.values_list("city", "state").distinct().order_by()
+        )
+        if full:
+            for queryset in [self.properties.all(), MarketTrend.objects.all()]:
+                cities.update(
+                    queryset.values_list("city", "state").distinct().order_by()
+                )
+
+        for city, state in sorted(cities):
+            self.rollup_city(city, state)
+
+        # Later transactions' rows stay and are picked up again next run
+        MarketChange.objects.filter(xid__lt=xmin).delete()
+        RollupWatermark.set(WATERMARK_NAME, started)
+        return self.stats
+
+    def rollup_city(self, city, state):
+        """Stream one city's listings once and rebuild all of its markets."""
+        buckets = defaultdict(_Bucket)
+        today = timezone.localdate()
+
+        listings = (
+            self.properties.filter(city=city, state=state)
+            .values(*LISTING_FIELDS)
+            .order_by()
+            .iterator(chunk_size=2000)
+        )
+        for row in listings:
+            self.stats["listings"] += 1
+            listed = _as_date(row["published_at"] or row["created_at"]) or today
+            changed = _as_date(row["updated_at"]) or today
+            price = float(row["price"])
+            dropped = has_price_drop(row["price_history"])
+
+            # Every listing feeds the city-wide market and its zip market
+            markets = ("", row["zip_code"]) if row["zip_code"] else ("",)
+            for zip_code in markets:
+                for period in PERIODS:
+                    bucket = buckets[(zip_code, period, period_start(listed, period))]
+                    bucket.prices.add(price)
+                    if row["square_feet"]:
+                        ppsf = price / row["square_feet"]
+                        if ppsf <= MAX_PRICE_PER_SQFT:
+                            bucket.ppsf.add(ppsf)
+                    bucket.price_sum += price
+                    bucket.new_listings += 1
+                    bucket.new_active += row["status"] in ACTIVE_STATUSES
+                    bucket.price_drops += dropped
+
+                    if row["status"] in ("pending", "sold"):
+                        moved = buckets[
+                            (zip_code, period, period_start(changed, period))
+                        ]
+                        if row["status"] == "pending":
+                            moved.pending_sales += 1
+                        else:
+                            moved.closed_sales += 1
+                            moved.dom_sum += max((changed - listed).days, 0)
+
+        self.write_trends(city, state, buckets)
+
+    def write_trends(self, city, state, buckets):
+        """Upsert the city's ``MarketTrend`` rows and delete the ones not rebuilt."""
+        rows = []
+        markets = {key[0] for key in buckets}
+        for zip_code in markets:
+            for period in PERIODS:
+                keys = sorted(
+                    key for key in buckets if key[0] == zip_code and key[1] == period
+                )
+                active = 0
+                for key in keys:
+                    bucket = buckets[key]
+                    active += bucket.new_active
+                    rows.append(self.build_trend(city, state, key, bucket, active))
+
+        produced = {(row.zip_code, row.period, row.date) for row in rows}
+        with transaction.atomic():
+            stale = [
+                pk
+                for pk, *key in MarketTrend.objects.filter(city=city, state=state)
+                .values_list("pk", "zip_code", "period", "date")
+                .iterator()
+                if tuple(key) not in produced
+            ]
+            MarketTrend.objects.filter(pk__in=stale).delete()
+            MarketTrend.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["city", "state", "zip_code", "period", "date"],
+                update_fields=[
+                    "median_price",
+                    "avg_price",
+                    "price_per_sqft",
+                    "total_listings",
+                    "new_listings",
+                    "pending_sales",
+                    "closed_sales",
+                    "days_on_market",
+                    "months_of_inventory",
+                    "price_drops_pct",
+                ],
+            )
+        self.stats["markets"] += len(markets)
+        self.stats["rows"] += len(rows)
+
+    def build_trend(self, city, state, key, bucket, active):
+        """Build one unsaved ``MarketTrend`` from a bucket."""
+        zip_code, period, start = key
+        listed = bucket.new_listings
+        monthly_sales = bucket.closed_sales / PERIOD_MONTHS[period]
+        months_of_inventory = active / monthly_sales if monthly_sales else 0
+
+        return MarketTrend(
+            city=city,
+            state=state,
+            zip_code=zip_code,
+            period=period,
+            date=start,
+            median_price=_money(bucket.prices.median(), 12),
+            avg_price=_money(bucket.price_sum / listed if listed else 0, 12),
+            price_per_sqft=_money(bucket.ppsf.median(), 8),
+            total_listings=active,
+            new_listings=listed,
+            pending_sales=bucket.pending_sales,
+            closed_sales=bucket.closed_sales,
+            days_on_market=(
+                round(bucket.dom_sum / bucket.closed_sales)
+                if bucket.closed_sales
+                else 0
+            ),
+            months_of_inventory=_money(months_of_inventory, 5),
+            price_drops_pct=_money(
+                100 * bucket.price_drops / listed if listed else 0, 5
+            ),
+        )
+
+
+def _money(value, max_digits):
+    """Round a float to a two-place Decimal that fits ``max_digits``.
+
+    None becomes zero; larger values are capped at the column's maximum
+    (sketch medians can overshoot the largest price by the sketch error).
+    """
+    limit = 10 ** (max_digits - 2) - 0.01
+    return Decimal(str(round(min(value or 0, limit), 2)))
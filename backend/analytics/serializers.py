@@ -2,8 +2,9 @@
 Serializers for market analytics and trends.
 """
 
+import math
 from rest_framework import serializers
-from .models import MarketTrend, PropertyValuation
+from .models import MarketTrend, PropertyValuation, ValuationSnapshot
 
 
 class MarketTrendSerializer(serializers.ModelSerializer):
@@ -21,3 +22,56 @@ class PropertyValuationSerializer(serializers.ModelSerializer):
         model = PropertyValuation
         fields = '__all__'
         read_only_fields = ['estimated_value', 'estimated_rent', 'confidence_score', 'last_updated', 'valuation_history']
+
+
+class EstimateLocationSerializer(serializers.Serializer):
+    """Optional subject coordinates for the estimate endpoint."""
+    
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, allow_null=True)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, allow_null=True)
+    
+    def validate_latitude(self, value):
+        return self._finite(value)
+    
+    def validate_longitude(self, value):
+        return self._finite(value)
+    
+    def _finite(self, value):
+        # NaN slips past the range validators, since every comparison is False
+        if value is not None and not math.isfinite(value):
+            raise serializers.ValidationError('A finite number is required.')
+        return value
+
+
+class ValuationSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for valuation history entries."""
+    
+    class Meta:
+        model = ValuationSnapshot
+        fields = ['date', 'estimated_value', 'estimated_rent', 'confidence_score']
+
+
+class ValuationRequestSerializer(serializers.Serializer):
+    """Input row for batch valuations.
+    
+    Deliberately not a ModelSerializer: the unique-together validator would
+    issue one query per row, which batch requests are meant to avoid.
+    """
+    
+    address_line1 = serializers.CharField(max_length=255)
+    address_line2 = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    city = serializers.CharField(max_length=100)
+    state = serializers.CharField(max_length=100)
+    zip_code = serializers.CharField(max_length=20)
+    # Bounds follow the listing columns and the feed importer's checks
+    bedrooms = serializers.IntegerField(min_value=0, max_value=100)
+    bathrooms = serializers.DecimalField(max_digits=4, decimal_places=1, min_value=0, max_value=100)
+    square_feet = serializers.IntegerField(min_value=1, max_value=10000000)
+    lot_size = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True, default=None)
+    year_built = serializers.IntegerField(min_value=1600, max_value=2100)
+
+
+class BatchValuationSerializer(serializers.Serializer):
+    """Payload for the batch valuation endpoint."""
+    
+    properties = ValuationRequestSerializer(many=True, allow_empty=False, max_length=5000)
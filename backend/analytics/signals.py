@@ -0,0 +1,22 @@
+"""
+Signal handlers that keep analytics aggregates in step with listings.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from properties.models import Property
+from .tasks import refresh_listing_stats
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def queue_listing_stats_refresh(sender, instance, **kwargs):
+    """Refresh the stats for the listing's market once the write commits."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {'city', 'state', 'status', 'price'} & set(update_fields):
+        # e.g. views_count/favorites_count bumps don't touch the aggregates
+        return
+    transaction.on_commit(
+        lambda: refresh_listing_stats.delay(instance.city, instance.state)
+    )
@@ -0,0 +1,44 @@
+"""
+Celery tasks for market analytics.
+"""
+
+from celery import shared_task
+from django.core.cache import cache
+from .models import ListingStats
+
+
+@shared_task
+def refresh_listing_stats(city=None, state=None):
+    """Rebuild materialized listing stats and drop the affected summary caches."""
+    keys = ListingStats.objects.refresh(city=city, state=state)
+    cache.delete_many([ListingStats.summary_cache_key(c, s) for c, s in keys])
+    return len(keys)
+
+
+@shared_task
+def rollup_market_trends(full=False):
+    """Derive ``MarketTrend`` rows for markets with changed listings."""
+    from .rollup import TrendRollup
+
+    return TrendRollup().run(full=full)
+
+
+@shared_task
+def fit_valuation_model():
+    """Refit the hedonic valuation model and cache it for the web processes."""
+    from .valuation import HedonicModel
+
+    try:
+        HedonicModel.load(refit=True)
+    except ValueError:
+        # Too few listings yet; estimates keep answering 503 until there are
+        return False
+    return True
+
+
+@shared_task
+def build_comps_index():
+    """Rebuild the comparable-sales index and publish it for the web processes."""
+    from .comps import CompsIndex
+
+    return len(CompsIndex.publish().ids)
@@ -0,0 +1,356 @@
+"""
+Tests for market analytics.
+"""
+
+import pickle
+import random
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from analytics.comps import CompsIndex
+from analytics.models import ListingStats, MarketChange, MarketTrend
+from analytics.rollup import QuantileSketch, TrendRollup, has_price_drop, period_start
+from analytics.serializers import EstimateLocationSerializer, ValuationRequestSerializer
+from analytics.tasks import refresh_listing_stats
+from analytics.valuation import MIN_VALUE, HedonicModel, queue_build
+from config.db import id_ranges
+from properties.models import Property, PropertyType
+
+User = get_user_model()
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class QuantileSketchTests(SimpleTestCase):
+    """Test cases for the streaming quantile sketch."""
+    
+    def test_median_within_relative_accuracy(self):
+        """Test the sketch median stays within its error bound."""
+        rng = random.Random(42)
+        values = [rng.uniform(100000, 2000000) for _ in range(5000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        
+        true_median = sorted(values)[len(values) // 2]
+        self.assertAlmostEqual(sketch.median() / true_median, 1, delta=0.02)
+        
+    def test_merge_matches_single_sketch(self):
+        """Test merging two sketches equals sketching all values at once."""
+        left, right, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 1001):
+            (left if value % 2 else right).add(value)
+            combined.add(value)
+        left.merge(right)
+        
+        self.assertEqual(left.count, combined.count)
+        self.assertEqual(left.median(), combined.median())
+        
+    def test_empty_sketch(self):
+        """Test an empty sketch has no median."""
+        self.assertIsNone(QuantileSketch().median())
+
+
+class RollupHelperTests(SimpleTestCase):
+    """Test cases for rollup bucketing helpers."""
+    
+    def test_period_start(self):
+        """Test each period snaps to its first day."""
+        day = date(2025, 8, 14)  # Thursday
+        self.assertEqual(period_start(day, 'weekly'), date(2025, 8, 11))
+        self.assertEqual(period_start(day, 'monthly'), date(2025, 8, 1))
+        self.assertEqual(period_start(day, 'quarterly'), date(2025, 7, 1))
+        self.assertEqual(period_start(day, 'yearly'), date(2025, 1, 1))
+        
+    def test_has_price_drop(self):
+        """Test price drops are detected regardless of entry order."""
+        history = [
+            {'date': '2025-03-01', 'price': 480000},
+            {'date': '2025-01-01', 'price': 500000},
+        ]
+        self.assertTrue(has_price_drop(history))
+        self.assertFalse(has_price_drop([{'date': '2025-01-01', 'price': 500000}]))
+        self.assertFalse(has_price_drop(None))
+
+
+class HedonicModelTests(SimpleTestCase):
+    """Test cases for the vectorized valuation model."""
+    
+    def setUp(self):
+        """Set up a hand-built model: roughly $300/sqft plus a zip premium."""
+        self.model = HedonicModel(
+            coefficients=[5.7, 1.0, 0.0, 0.0, 0.0, 0.0],
+            zip_adjustments={'10001': 0.5},
+            fill_year=2000,
+            rmse=0.2,
+        )
+        
+    def test_predict_batch(self):
+        """Test a batch is scored in one call with location adjustments."""
+        values, rents, confidence = self.model.predict(
+            square_feet=[1000, 1000, 10],
+            bedrooms=[2, 2, 1],
+            bathrooms=[1.0, 1.0, 1.0],
+            year_built=[2000, None, 2000],
+            zip_codes=['99999', '10001', '99999'],
+        )
+        
+        self.assertEqual(len(values), 3)
+        self.assertGreater(values[1], values[0])  # Zip premium applied
+        self.assertEqual(values[2], MIN_VALUE)  # Clamped to the floor
+        self.assertAlmostEqual(rents[0], values[0] * 0.005, places=1)
+        self.assertGreater(confidence[1], confidence[0])  # Known zip is trusted more
+        
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_build_is_queued_once(self):
+        """Test a cold cache queues one background build rather than one per request."""
+        class Task:
+            name = 'analytics.tasks.fit_valuation_model'
+            queued = 0
+
+            def delay(self):
+                self.queued += 1
+
+        cache.clear()
+        task = Task()
+        queue_build(task)
+        queue_build(task)
+        self.assertEqual(task.queued, 1)
+
+    def test_id_ranges(self):
+        """Test id spans are split into half-open chunks covering every id."""
+        self.assertEqual(id_ranges(1, 10, 4), [(1, 5), (5, 9), (9, 11)])
+
+
+class CompsIndexTests(SimpleTestCase):
+    """Test cases for the comparable-sales index."""
+    
+    def setUp(self):
+        """Set up listings: two close matches, a poor match and a far one."""
+        self.index = CompsIndex([
+            # id, lat, lng, beds, baths, sqft, year_built, price, zip
+            (1, 40.7500, -73.9900, 3, 2.0, 2000, 2000, 600000, '10001'),
+            (2, 40.7510, -73.9910, 3, 2.0, 2100, None, 630000, '10001'),
+            (3, 40.7505, -73.9905, 1, 1.0, 600, 1950, 250000, '10001'),
+            (4, 42.0000, -75.0000, 3, 2.0, 2000, 2000, 300000, '13000'),
+        ])
+        self.subject = {'bedrooms': 3, 'bathrooms': 2, 'square_feet': 2000, 'year_built': 2000}
+        
+    def test_nearest_ranks_similar_listings_first(self):
+        """Test the closest, most similar listings are returned in order."""
+        rows, geo_km, score = self.index.nearest(self.subject, 40.75, -73.99, k=2)
+        
+        self.assertEqual(self.index.ids[rows].tolist(), [1, 2])
+        self.assertTrue((score[:-1] <= score[1:]).all())
+        
+    def test_spatial_prefilter_excludes_distant_listings(self):
+        """Test listings outside the maximum radius are never candidates."""
+        rows, _, _ = self.index.nearest(self.subject, 40.75, -73.99, k=10)
+        
+        self.assertNotIn(4, self.index.ids[rows].tolist())
+        
+    def test_index_survives_the_cache(self):
+        """Test the index can be pickled into the shared cache intact."""
+        copy = pickle.loads(pickle.dumps(self.index))
+        rows, _, _ = copy.nearest(self.subject, 40.75, -73.99, k=2)
+        self.assertEqual(copy.ids[rows].tolist(), [1, 2])
+
+    def test_zip_centroids(self):
+        """Test zip centroids are available to place subjects without coordinates."""
+        lat, lng = self.index.zip_centroids['13000']
+        self.assertAlmostEqual(lat, 42.0)
+        self.assertAlmostEqual(lng, -75.0)
+
+
+class EstimateLocationTests(SimpleTestCase):
+    """Test cases for estimate coordinate validation."""
+
+    def test_rejects_out_of_range_and_non_finite(self):
+        """Test only finite, in-range coordinates are accepted."""
+        for data in [{'latitude': 'nan'}, {'latitude': 'inf'}, {'latitude': 91}, {'longitude': -181}]:
+            self.assertFalse(EstimateLocationSerializer(data=data).is_valid(), data)
+        serializer = EstimateLocationSerializer(data={'latitude': '40.75', 'longitude': '-73.99'})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['longitude'], -73.99)
+
+
+class ValuationRequestTests(SimpleTestCase):
+    """Test cases for batch valuation input validation."""
+
+    ROW = {
+        'address_line1': '1 Main St', 'city': 'Anytown', 'state': 'NY', 'zip_code': '12345',
+        'bedrooms': 3, 'bathrooms': '2.0', 'square_feet': 1500, 'year_built': 1990,
+    }
+
+    def test_rejects_values_the_columns_cannot_hold(self):
+        """Test oversized rows are rejected instead of overflowing on save."""
+        self.assertTrue(ValuationRequestSerializer(data=self.ROW).is_valid())
+        for field, value in [('bedrooms', 101), ('square_feet', 10000001), ('year_built', 2101)]:
+            serializer = ValuationRequestSerializer(data=dict(self.ROW, **{field: value}))
+            self.assertFalse(serializer.is_valid())
+            self.assertIn(field, serializer.errors)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ListingStatsTests(TestCase):
+    """Test cases for the materialized listing statistics."""
+
+    def setUp(self):
+        """Set up listings in one market, with mixed-case city names."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='agent@example.com',
+            password='AgentPass123',
+            first_name='Agent',
+            last_name='Smith',
+            is_agent=True
+        )
+        self.property_type = PropertyType.objects.create(name='Condo')
+        self.listings = [
+            self.create_listing(city='Anytown', price=300000),
+            self.create_listing(city='ANYTOWN', price=500000),
+            self.create_listing(city='Anytown', price=400000, status='sold'),
+        ]
+        ListingStats.objects.all().delete()
+
+    def create_listing(self, **fields):
+        """Create a listing with defaults for the fields not given."""
+        data = {
+            'title': 'Condo',
+            'description': 'A condo.',
+            'property_type': self.property_type,
+            'listing_type': 'sale',
+            'address_line1': '1 Main St',
+            'city': 'Anytown',
+            'state': 'NY',
+            'zip_code': '12345',
+            'price': 300000,
+            'bedrooms': 2,
+            'bathrooms': 1,
+            'square_feet': 900,
+            'listed_by': self.user,
+        }
+        data.update(fields)
+        return Property.objects.create(**data)
+
+    def test_refresh_groups_markets_case_insensitively(self):
+        """Test one row is written per lower-cased market and status."""
+        keys = ListingStats.objects.refresh()
+        self.assertEqual(keys, [('anytown', 'ny')])
+
+        available = ListingStats.objects.get(city='anytown', state='ny', status='available')
+        self.assertEqual(available.listing_count, 2)
+        self.assertEqual(available.min_price, 300000)
+        self.assertEqual(available.max_price, 500000)
+        self.assertEqual(ListingStats.objects.get(status='sold').listing_count, 1)
+
+    def test_refresh_one_market_drops_empty_groups(self):
+        """Test refreshing a market removes groups that no longer have listings."""
+        ListingStats.objects.refresh()
+        Property.objects.filter(status='sold').update(status='available')
+
+        self.assertEqual(ListingStats.objects.refresh('Anytown', 'NY'), [('anytown', 'ny')])
+        self.assertFalse(ListingStats.objects.filter(status='sold').exists())
+        self.assertEqual(ListingStats.objects.get(status='available').listing_count, 3)
+
+    def test_price_change_refreshes_market(self):
+        """Test saving a listing's price queues a refresh of its market."""
+        listing = self.listings[0]
+        listing.price = 200000
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+        self.assertEqual(ListingStats.objects.get(status='available').min_price, 200000)
+
+        # Counter bumps don't touch the aggregates
+        ListingStats.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            listing.save(update_fields=['views_count'])
+        self.assertEqual(callbacks, [])
+
+    def test_market_summary_falls_back_to_listings(self):
+        """Test markets without materialized stats are aggregated directly."""
+        MarketTrend.objects.create(
+            city='Anytown', state='NY', period='monthly', date=date(2026, 9, 1),
+            median_price=400000, avg_price=400000, price_per_sqft=400,
+            total_listings=3, new_listings=1, pending_sales=0, closed_sales=1,
+            days_on_market=30, months_of_inventory=3, price_drops_pct=0,
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            '/api/analytics/trends/market_summary/', {'city': 'anytown', 'state': 'ny'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['active_listings']['count'], 2)
+
+        # The cached payload is dropped when the market is refreshed
+        self.assertIsNotNone(cache.get(ListingStats.summary_cache_key('Anytown', 'NY')))
+        refresh_listing_stats('Anytown', 'NY')
+        self.assertIsNone(cache.get(ListingStats.summary_cache_key('Anytown', 'NY')))
+
+
+class TrendRollupTests(TestCase):
+    """Test cases for incremental market trend rollups."""
+
+    def setUp(self):
+        """Set up listings in two cities and a first, full rollup."""
+        self.user = User.objects.create_user(
+            email='trends@example.com', password='TrendsPass123', is_agent=True
+        )
+        self.property_type = PropertyType.objects.create(name='House')
+        self.anytown = self.create_listing(city='Anytown', zip_code='12345', price=300000)
+        self.othertown = self.create_listing(city='Othertown', zip_code='54321', price=500000)
+        TrendRollup().run()
+
+    def create_listing(self, **fields):
+        """Create a listing with defaults for the fields not given."""
+        data = {
+            'title': 'House', 'description': 'A house.', 'property_type': self.property_type,
+            'address_line1': '1 Main St', 'state': 'NY', 'price': 300000,
+            'bedrooms': 3, 'bathrooms': 2, 'square_feet': 1000, 'listed_by': self.user,
+        }
+        data.update(fields)
+        return Property.objects.create(**data)
+
+    def trends(self, city, zip_code=''):
+        """Return a city's monthly trend rows for a market."""
+        return MarketTrend.objects.filter(
+            city=city, state='NY', zip_code=zip_code, period='monthly'
+        )
+
+    def test_incremental_run_after_update(self):
+        """Test a changed listing's market is rebuilt from the change log."""
+        self.assertEqual(self.trends('Anytown').get().avg_price, 300000)
+        self.anytown.price = 350000
+        self.anytown.save()
+        self.assertTrue(MarketChange.objects.filter(city='Anytown').exists())
+        TrendRollup().run()
+        self.assertEqual(self.trends('Anytown').get().avg_price, 350000)
+
+    def test_delete_removes_empty_markets(self):
+        """Test deleting a city's last listing deletes its trend rows."""
+        self.othertown.delete()
+        TrendRollup().run()
+        self.assertFalse(MarketTrend.objects.filter(city='Othertown').exists())
+        self.assertTrue(self.trends('Anytown').exists())
+
+    def test_moved_listing_rebuilds_both_markets(self):
+        """Test a listing moving city or zip code leaves no stale rows behind."""
+        self.othertown.city = 'Anytown'
+        self.othertown.save()
+        TrendRollup().run()
+        self.assertFalse(MarketTrend.objects.filter(city='Othertown').exists())
+        self.assertEqual(self.trends('Anytown').get().new_listings, 2)
+
+        Property.objects.filter(pk=self.anytown.pk).update(zip_code='12399')
+        TrendRollup().run()
+        self.assertFalse(self.trends('Anytown', '12345').exists())
+        self.assertEqual(self.trends('Anytown', '12399').get().new_listings, 1)
+
+    def test_implausible_price_per_sqft_is_skipped(self):
+        """Test a bad square footage neither fails the run nor skews the median."""
+        self.create_listing(city='Anytown', zip_code='12345', price=5000000, square_feet=1)
+        TrendRollup().run()
+        # Medians come from a sketch with 1% relative error
+        self.assertAlmostEqual(float(self.trends('Anytown').get().price_per_sqft), 300, delta=3)
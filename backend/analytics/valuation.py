@@ -0,0 +1,300 @@
+"""
+Hedonic valuation model for property estimates.
+
+The model is a log-linear regression of listing price on size, rooms and age,
+fitted on comparable ``Property`` rows, plus a shrunken per-zip-code location
+adjustment learned from the residuals. Scoring works on whole NumPy arrays so
+thousands of properties are valued in one pass.
+"""
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+MODEL_CACHE_KEY = "analytics:hedonic_model"
+MODEL_CACHE_TIMEOUT = 60 * 60 * 24
+# How long a queued background build suppresses queueing another
+BUILD_QUEUE_TIMEOUT = 60 * 10
+# Pseudo-count pulling sparse zip codes towards the global model
+ZIP_SHRINKAGE = 10
+COMPARABLE_STATUSES = ["available", "pending", "sold"]
+RENT_TO_VALUE = 0.005  # Monthly rent as a share of value
+MIN_VALUE = 50000
+
+
+class ModelNotReady(ValueError):
+    """The model hasn't been fitted yet; a background fit has been queued."""
+
+
+def queue_build(task):
+    """Queue a build ``task`` unless one was queued in the last few minutes."""
+    if cache.add(f"analytics:queued:{task.name}", True, BUILD_QUEUE_TIMEOUT):
+        task.delay()
+
+
+class HedonicModel:
+    """Log-linear hedonic price model with per-zip location adjustments."""
+
+    def __init__(self, coefficients, zip_adjustments, fill_year, rmse):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.zip_adjustments = dict(zip_adjustments)
+        self.fill_year = fill_year
+        self.rmse = rmse
+
+    @staticmethod
+    def design_matrix(square_feet, bedrooms, bathrooms, year_built, current_year):
+        """Build the regression design matrix from column arrays."""
+        age = np.clip(current_year - year_built, 0, None)
+        return np.column_stack(
+            [
+                np.ones_like(square_feet),
+                np.log(np.maximum(square_feet, 1)),
+                bedrooms,
+                bathrooms,
+                age,
+                age**2 / 100,
+            ]
+        )
+
+    @classmethod
+    def fit(cls, properties=None, ridge=1e-3):
+        """Fit the model on comparable listings from ``Property``."""
+        from properties.models import Property
+
+        if properties is None:
+            properties = Property.objects.all()
+        rows = list(
+            properties.filter(
+                status__in=COMPARABLE_STATUSES, price__gt=0, square_feet__gt=0
+            )
+            .order_by()
+            .values_list(
+                "price",
+                "square_feet",
+                "bedrooms",
+                "bathrooms",
+                "year_built",
+                "zip_code",
+            )
+        )
+        if len(rows) < 10:
+            raise ValueError("Not enough comparable listings to fit a valuation model")
+
+        price, sqft, beds, baths, years, zips = zip(*rows)
+        years = np.array([np.nan if y is None else y for y in years], dtype=float)
+        fill_year = float(np.nanmedian(years)) if not np.isnan(years).all() else 2000.0
+        years = np.where(np.isnan(years), fill_year, years)
+
+        X = cls.design_matrix(
+            np.array(sqft, dtype=float),
+            np.array(beds, dtype=float),
+            np.array(baths, dtype=float),
+            years,
+            timezone.now().year,
+        )
+        y = np.log(np.array(price, dtype=float))
+
+        # Ridge-regularised normal equations keep collinear columns stable
+        penalty = ridge * np.eye(X.shape[1])
+        penalty[0, 0] = 0
+        coefficients = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+        residuals = y - X @ coefficients
+
+        zip_keys, zip_index = np.unique(np.array(zips), return_inverse=True)
+        sums = np.bincount(zip_index, weights=residuals)
+        counts = np.bincount(zip_index)
+        adjustments = sums / (counts + ZIP_SHRINKAGE)
+        residuals -= adjustments[zip_index]
+
+        return cls(
+            coefficients,
+            zip(zip_keys.tolist(), adjustments.tolist()),
+            fill_year,
+            float(np.sqrt(np.mean(residuals**2))),
+        )
+
+    @classmethod
+    def load(cls, refit=False):
+        """Return the cached model.
+
+        ``refit`` fits and caches it now, as the ``fit_valuation_model``
+        task and ``revalue_listings`` do. Otherwise a cold cache queues that
+        task and raises ``ModelNotReady``, so requests never fit inline.
+        """
+        if refit:
+            model = cls.fit()
+            cache.set(MODEL_CACHE_KEY, model.to_state(), MODEL_CACHE_TIMEOUT)
+            return model
+        state = cache.get(MODEL_CACHE_KEY)
+        if state is None:
+            from .tasks import fit_valuation_model
+
+            queue_build(fit_valuation_model)
+            raise ModelNotReady("The valuation model is being built; try again shortly")
+        return cls(**state)
+
+    def to_state(self):
+        """Return a plain-data representation suitable for caching."""
+        return {
+            "coefficients": self.coefficients.tolist(),
+            "zip_adjustments": self.zip_adjustments,
+            "fill_year": self.fill_year,
+            "rmse": self.rmse,
+        }
+
+    def predict(self, square_feet, bedrooms, bathrooms, year_built, zip_codes):
+        """Return (estimated_value, estimated_rent, confidence) arrays."""
+        years = np.array(
+            [self.fill_year if y is None else y for y in year_built], dtype=float
+        )
+        X = self.design_matrix(
+            np.asarray(square_feet, dtype=float),
+            np.asarray(bedrooms, dtype=float),
+            np.asarray(bathrooms, dtype=float),
+            years,
+            timezone.now().year,
+        )
+        location = np.array([self.zip_adjustments.get(z, 0.0) for z in zip_codes])
+        values = np.maximum(np.exp(X @ self.coefficients + location), MIN_VALUE)
+        values = np.round(values, 2)
+        rents = np.round(values * RENT_TO_VALUE, 2)
+
+        # Unknown zip codes lean on the global model alone, so trust them less
+        known = np.array([z in self.zip_adjustments for z in zip_codes])
+        spread = self.rmse * np.where(known, 1.0, 1.5)
+        confidence = np.clip(np.round(100 * np.exp(-spread)), 0, 100).astype(int)
+        return values, rents, confidence
+
+    def predict_records(self, records):
+        """Value a list of dicts with the ``PropertyValuation`` detail fields."""
+        if not records:
+            return np.array([]), np.array([]), np.array([], dtype=int)
+        return self.predict(
+            [r["square_feet"] for r in records],
+            [r["bedrooms"] for r in records],
+            [float(r["bathrooms"]) for r in records],
+            [r.get("year_built") for r in records],
+            [r["zip_code"] for r in records],
+        )
+
+
+def upsert_valuations(records, model):
+    """Score ``records`` in one pass and bulk-upsert ``PropertyValuation`` rows.
+
+    Every upserted valuation also gets a ``ValuationSnapshot`` row and its
+    capped ``valuation_history`` summary refreshed, in a constant number of
+    queries per batch.
+    """
+    from .models import PropertyValuation, ValuationSnapshot
+
+    # Postgres rejects an upsert that touches the same key twice
+    unique = {}
+    for record in records:
+        key = (
+            record["address_line1"],
+            record["city"],
+            record["state"],
+            record["zip_code"],
+        )
+        unique[key] = record
+    records = list(unique.values())
+
+    values, rents, confidence = model.predict_records(records)
+    valuations = [
+        PropertyValuation(
+            address_line1=record["address_line1"],
+            address_line2=record.get("address_line2", ""),
+            city=record["city"],
+            state=record["state"],
+            zip_code=record["zip_code"],
+            bedrooms=record["bedrooms"],
+            bathrooms=record["bathrooms"],
+            square_feet=record["square_feet"],
+            lot_size=record.get("lot_size"),
+            year_built=record["year_built"],
+            estimated_value=value,
+            estimated_rent=rent,
+            confidence_score=score,
+        )
+        for record, value, rent, score in zip(
+            records, values.tolist(), rents.tolist(), confidence.tolist()
+        )
+    ]
+    PropertyValuation.objects.bulk_create(
+        valuations,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["address_line1", "city", "state", "zip_code"],
+        update_fields=[
+            "address_line2",
+            "bedrooms",
+            "bathrooms",
+            "square_feet",
+            "lot_size",
+            "year_built",
+            "estimated_value",
+            "estimated_rent",
+            "confidence_score",
+            "last_updated",
+        ],
+    )
+
+    # PostgreSQL returns primary keys for upserted rows
+    today = timezone.localdate()
+    snapshots = ValuationSnapshot.objects.bulk_create(
+        [
+            ValuationSnapshot(
+                valuation_id=valuation.pk,
+                date=today,
+                estimated_value=valuation.estimated_value,
+                estimated_rent=valuation.estimated_rent,
+                confidence_score=valuation.confidence_score,
+            )
+            for valuation in valuations
+        ],
+        batch_size=1000,
+    )
+    histories = dict(
+        PropertyValuation.objects.filter(
+            pk__in=[valuation.pk for valuation in valuations]
+        ).values_list("pk", "valuation_history")
+    )
+    size = PropertyValuation.HISTORY_SUMMARY_SIZE
+    for valuation, snapshot in zip(valuations, snapshots):
+        history = list(histories.get(valuation.pk) or []) + [snapshot.as_summary()]
+        valuation.valuation_history = history[-size:]
+    PropertyValuation.objects.bulk_update(
+        valuations, ["valuation_history"], batch_size=1000
+    )
+    return valuations
+
+
+LISTING_VALUATION_FIELDS = [
+    "address_line1",
+    "address_line2",
+    "city",
+    "state",
+    "zip_code",
+    "bedrooms",
+    "bathrooms",
+    "square_feet",
+    "lot_size",
+    "year_built",
+]
+
+
+def revalue_id_range(start_id, end_id, model_state):
+    """Revalue listings with ``start_id <= id < end_id``; used by worker processes."""
+    from django.db import connection
+    from properties.models import Property
+
+    listings = list(
+        Property.objects.filter(
+            id__gte=start_id, id__lt=end_id, year_built__isnull=False
+        )
+        .order_by()
+        .values(*LISTING_VALUATION_FIELDS)
+    )
+    upsert_valuations(listings, HedonicModel(**model_state))
+    connection.close()
+    return len(listings)
@@ -5,11 +5,24 @@ Views for market analytics and trends.
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Avg, Max, Min
-from .models import MarketTrend, PropertyValuation
-from .serializers import MarketTrendSerializer, PropertyValuationSerializer
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date
+from .models import ListingStats, MarketTrend, PropertyValuation
+from .serializers import (
+    BatchValuationSerializer,
+    EstimateLocationSerializer,
+    MarketTrendSerializer,
+    PropertyValuationSerializer,
+    ValuationSnapshotSerializer,
+)
+from .comps import find_comps
+from .valuation import RENT_TO_VALUE, HedonicModel, upsert_valuations
 from properties.models import Property
 
+MARKET_SUMMARY_CACHE_TIMEOUT = 60 * 10
+
 
 class MarketTrendViewSet(viewsets.ReadOnlyModelViewSet):
     """API endpoint for market trends."""
@@ -51,6 +64,11 @@ class MarketTrendViewSet(viewsets.ReadOnlyModelViewSet):
         if not city or not state:
             return Response({"error": "city and state parameters are required"}, status=400)
         
+        cache_key = ListingStats.summary_cache_key(city, state)
+        market_summary = cache.get(cache_key)
+        if market_summary is not None:
+            return Response(market_summary)
+        
         # Get the most recent monthly trend
         recent_trend = MarketTrend.objects.filter(
             city__iexact=city,
@@ -61,25 +79,36 @@ class MarketTrendViewSet(viewsets.ReadOnlyModelViewSet):
         if not recent_trend:
             return Response({"error": "No market data available for this location"}, status=404)
         
-        # Get active listings count and stats
-        active_listings = Property.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
+        # Active listing stats come from the materialized table; markets that
+        # haven't been refreshed yet fall back to one combined aggregate.
+        stats = ListingStats.objects.filter(
+            city=city.lower(),
+            state=state.lower(),
             status='available'
-        )
-        
-        listing_stats = {
-            'count': active_listings.count(),
-            'avg_price': active_listings.aggregate(Avg('price'))['price__avg'],
-            'min_price': active_listings.aggregate(Min('price'))['price__min'],
-            'max_price': active_listings.aggregate(Max('price'))['price__max'],
-        }
+        ).first()
+        if stats:
+            listing_stats = stats.as_summary()
+        else:
+            # Lower() rather than iexact, to use the market index
+            listing_stats = Property.objects.annotate(
+                city_key=Lower('city'), state_key=Lower('state')
+            ).filter(
+                city_key=city.lower(),
+                state_key=state.lower(),
+                status='available'
+            ).aggregate(
+                count=Count('id'),
+                avg_price=Avg('price'),
+                min_price=Min('price'),
+                max_price=Max('price'),
+            )
         
         # Combine data
         market_summary = {
             'trend': MarketTrendSerializer(recent_trend).data,
             'active_listings': listing_stats
         }
+        cache.set(cache_key, market_summary, MARKET_SUMMARY_CACHE_TIMEOUT)
         
         return Response(market_summary)
 
@@ -106,35 +135,91 @@ class PropertyValuationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def estimate(self, request):
-        """Generate a valuation estimate for a property."""
+        """Generate a valuation estimate for a property from nearby comps.
+        
+        Optional ``latitude``/``longitude`` place the subject precisely;
+        otherwise it is placed at its zip code's centroid. Falls back to the
+        hedonic model when no comparable listings are in range.
+        """
         serializer = PropertyValuationSerializer(data=request.data)
         
         if serializer.is_valid():
-            # In a real implementation, this would call a valuation model or service
-            # Here we'll just create a placeholder with some sample logic
+            location = EstimateLocationSerializer(data={
+                field: request.data[field]
+                for field in ('latitude', 'longitude')
+                if request.data.get(field) not in (None, '')
+            })
+            if not location.is_valid():
+                return Response(location.errors, status=status.HTTP_400_BAD_REQUEST)
+            latitude = location.validated_data.get('latitude')
+            longitude = location.validated_data.get('longitude')
             
-            # Simplified sample calculation (not realistic)
-            square_feet = serializer.validated_data.get('square_feet', 0)
-            bedrooms = serializer.validated_data.get('bedrooms', 0)
-            bathrooms = serializer.validated_data.get('bathrooms', 0)
-            year_built = serializer.validated_data.get('year_built', 2000)
-            
-            # Very simplified estimation
-            base_value = square_feet * 200  # $200 per sq ft
-            bedroom_value = bedrooms * 15000  # $15k per bedroom
-            bathroom_value = bathrooms * 10000  # $10k per bathroom
-            age_adjustment = (2023 - year_built) * -500  # -$500 per year of age
-            
-            estimated_value = max(base_value + bedroom_value + bathroom_value + age_adjustment, 50000)
-            estimated_rent = estimated_value * 0.005  # 0.5% of value for monthly rent
+            comps = find_comps(serializer.validated_data, latitude, longitude)
+            if comps:
+                estimated_value = comps['estimated_value']
+                confidence_score = comps['confidence_score']
+            else:
+                try:
+                    model = HedonicModel.load()
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                values, _, confidence = model.predict_records([serializer.validated_data])
+                estimated_value = float(values[0])
+                confidence_score = int(confidence[0])
             
             # Create the valuation
             instance = serializer.save(
                 estimated_value=estimated_value,
-                estimated_rent=estimated_rent,
-                confidence_score=75  # Placeholder confidence score
+                estimated_rent=round(estimated_value * RENT_TO_VALUE, 2),
+                confidence_score=confidence_score
             )
+            instance.record_snapshot()
             
-            return Response(PropertyValuationSerializer(instance).data, status=status.HTTP_201_CREATED)
+            data = PropertyValuationSerializer(instance).data
+            data['comps'] = comps['comps'] if comps else []
+            return Response(data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Return the full valuation history, optionally limited to ?start=&end= dates."""
+        valuation = self.get_object()
+        snapshots = valuation.snapshots.all()
+        try:
+            start = parse_date(request.query_params.get('start') or '')
+            end = parse_date(request.query_params.get('end') or '')
+        except ValueError:
+            return Response({"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST)
+        if start:
+            snapshots = snapshots.filter(date__gte=start)
+        if end:
+            snapshots = snapshots.filter(date__lte=end)
+        return Response(ValuationSnapshotSerializer(snapshots, many=True).data)
+    
+    @action(detail=False, methods=['post'])
+    def batch_estimate(self, request):
+        """Value up to 5000 properties in one vectorized pass and upsert the results."""
+        serializer = BatchValuationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            model = HedonicModel.load()
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        valuations = upsert_valuations(serializer.validated_data['properties'], model)
+        results = [
+            {
+                'address_line1': valuation.address_line1,
+                'city': valuation.city,
+                'state': valuation.state,
+                'zip_code': valuation.zip_code,
+                'estimated_value': valuation.estimated_value,
+                'estimated_rent': valuation.estimated_rent,
+                'confidence_score': valuation.confidence_score,
+            }
+            for valuation in valuations
+        ]
+        return Response({'count': len(results), 'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,43 @@
+"""
+Database connection helpers shared by the web app, workers and commands.
+"""
+
+from django.db import connection, connections
+
+
+def close_connections_before_fork():
+    """Close every connection, and pool, before forking worker processes.
+
+    Forked children must not share the parent's database sockets. With
+    ``DATABASE_POOL`` a plain close only returns the connection to the
+    pool, so the pool itself is closed too; children open their own.
+    """
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
+
+def pool_stats(connection):
+    """Return the connection pool's counters, or None when not pooled."""
+    pool = getattr(connection, "pool", None)
+    return pool.get_stats() if pool is not None else None
+
+
+def snapshot_xmin():
+    """Return the id of the oldest transaction still running.
+
+    Any transaction that hasn't committed yet has an id at least this large,
+    so change-log rows written by ``txid_current()`` below it are final.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+def id_ranges(min_id, max_id, chunk_size):
+    """Split an inclusive id span into half-open ``(start, end)`` chunks."""
+    return [
+        (start, min(start + chunk_size, max_id + 1))
+        for start in range(min_id, max_id + 1, chunk_size)
+    ]
@@ -0,0 +1,154 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only inside a request that
+``ReplicaRoutingMiddleware`` marked as safe: a GET or HEAD on one of the
+``READ_REPLICA_PATHS`` (browse, search, neighborhoods, market trends,
+favorites lists), from a client that hasn't written recently. Everything
+else uses the primary, including writes, transactions, Celery tasks and
+management commands.
+
+After a client's POST, PUT, PATCH or DELETE, its reads stay on the primary
+for ``READ_YOUR_WRITES_SECONDS``, so a new listing or favorite shows up
+immediately. The pin is kept in the shared cache, keyed by a hash of the
+client's credentials (the ``Authorization`` header or session cookie).
+
+Replicas lagging more than ``REPLICA_MAX_LAG`` seconds, or unreachable,
+are skipped. Lag is measured at most every ``REPLICA_LAG_CHECK_INTERVAL``
+seconds per process, and replica connections time out after
+``REPLICA_CONNECT_TIMEOUT`` seconds, so a dead replica delays a request by
+at most that once per interval. With no healthy replica, reads fall back
+to the primary.
+"""
+
+import contextvars
+import hashlib
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+PRIMARY = "default"
+
+# Lag in seconds: zero when all received WAL is replayed, else how old
+# the last replayed transaction is. NULL on a server that isn't a replica.
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Set for the duration of a request whose reads may use a replica
+_use_replicas = contextvars.ContextVar("use_replicas", default=False)
+# alias: (checked at, lag in seconds or None when unreachable)
+_lag_checks = {}
+
+
+def replica_aliases():
+    """Return the configured replica database aliases."""
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def replica_lag(alias):
+    """Measure a replica's lag in seconds; None when it can't be reached."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    return float(lag or 0)
+
+
+def healthy_replicas():
+    """Return the replicas within ``REPLICA_MAX_LAG``, rechecking stale ones."""
+    now = time.monotonic()
+    healthy = []
+    for alias in replica_aliases():
+        checked_at, lag = _lag_checks.get(alias, (None, None))
+        if checked_at is None or now - checked_at > settings.REPLICA_LAG_CHECK_INTERVAL:
+            lag = replica_lag(alias)
+            _lag_checks[alias] = (now, lag)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            healthy.append(alias)
+    return healthy
+
+
+class ReplicaRouter:
+    """Send reads in replica-safe requests to a healthy replica."""
+
+    def db_for_read(self, model, **hints):
+        if not _use_replicas.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def _pin_key(request):
+    """Return the read-your-writes cache key for the client, if identifiable."""
+    credentials = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return "read-primary:" + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def _routes_to_replica(request):
+    return request.method in ("GET", "HEAD") and request.path.startswith(
+        tuple(settings.READ_REPLICA_PATHS)
+    )
+
+
+class ReplicaRoutingMiddleware:
+    """Mark safe reads for the router and pin clients after they write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = _pin_key(request)
+        use_replicas = _routes_to_replica(request) and not (key and cache.get(key))
+        token = _use_replicas.set(use_replicas)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replicas.reset(token)
+        if key and request.method not in ("GET", "HEAD", "OPTIONS"):
+            cache.set(key, True, settings.READ_YOUR_WRITES_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = _pin_key(request)
+        use_replicas = _routes_to_replica(request) and not (
+            key and await cache.aget(key)
+        )
+        token = _use_replicas.set(use_replicas)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replicas.reset(token)
+        if key and request.method not in ("GET", "HEAD", "OPTIONS"):
+            await cache.aset(key, True, settings.READ_YOUR_WRITES_SECONDS)
+        return response
@@ -0,0 +1,51 @@
+"""
+Health check endpoint for load balancers and monitoring.
+"""
+
+import logging
+import time
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from .db import pool_stats
+from .db_router import PRIMARY, replica_lag
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+def health(request):
+    """Check each database with a round trip and report connection reuse.
+
+    Responds 503 when a database can't be reached. The endpoint is public,
+    so by default it only says ``ok`` or ``unavailable``; errors are logged.
+    Staff users, or every caller when ``HEALTH_CHECK_DETAILS`` is on, also
+    get each database's latency, the pool's counters (size, idle
+    connections, waiting requests, ...), replication lag and errors.
+    """
+    databases = {}
+    for alias in connections:
+        connection = connections[alias]
+        started = time.monotonic()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError as exc:
+            logger.warning("Health check failed for database %s: %s", alias, exc)
+            databases[alias] = {"ok": False, "error": str(exc)}
+            continue
+        databases[alias] = {
+            "ok": True,
+            "latency_ms": round((time.monotonic() - started) * 1000, 2),
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "pool": pool_stats(connection),
+        }
+        if alias != PRIMARY:
+            databases[alias]["lag_seconds"] = replica_lag(alias)
+
+    healthy = all(database["ok"] for database in databases.values())
+    body = {"status": "ok" if healthy else "unavailable"}
+    if settings.HEALTH_CHECK_DETAILS or request.user.is_staff:
+        body["databases"] = databases
+    return JsonResponse(body, status=200 if healthy else 503)
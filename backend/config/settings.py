@@ -97,6 +97,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+# Serve with an ASGI server (see SETUP.md) so the async map and search
+# views don't hold a worker while they wait on the database
+ASGI_APPLICATION = "config.asgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -114,6 +117,82 @@ DATABASES = {
     }
 }
 
+# Connection reuse. With DATABASE_POOL=True each process shares a psycopg 3
+# pool (needs psycopg[pool]); use it under ASGI, where every request runs in
+# a new thread and a persistent connection would never be reused. Otherwise
+# each worker thread may keep its connection for DATABASE_CONN_MAX_AGE
+# seconds; that defaults to 0 (close after each request) because
+# persistent connections must stay off under ASGI. Raise it only for WSGI.
+# For a PgBouncer in transaction mode set DATABASE_PGBOUNCER=True:
+# server-side cursors don't survive its connection switching.
+# Live pool stats are served at /api/health/ to staff users, or to anyone
+# when HEALTH_CHECK_DETAILS=True (only for internal-only deployments).
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "False").lower() == "true"
+DATABASE_PGBOUNCER = os.environ.get("DATABASE_PGBOUNCER", "False").lower() == "true"
+HEALTH_CHECK_DETAILS = (
+    os.environ.get("HEALTH_CHECK_DETAILS", "False").lower() == "true"
+)
+if DATABASE_POOL:
+    # Pooled connections are returned after each request, never kept
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+            # Seconds to wait for a free connection before failing
+            "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+            # Seconds an idle connection above min_size is kept
+            "max_idle": float(os.environ.get("DATABASE_POOL_MAX_IDLE", 300)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DATABASE_CONN_MAX_AGE", 0)
+    )
+# Check a reused connection is alive before handing it out
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = (
+    os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "True").lower() == "true"
+)
+DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = DATABASE_PGBOUNCER
+
+# Read replicas: comma-separated host[:port] list, same credentials as the
+# primary. Safe reads on READ_REPLICA_PATHS go to one that is at most
+# REPLICA_MAX_LAG seconds behind; a client that just wrote reads from the
+# primary for READ_YOUR_WRITES_SECONDS. See config.db_router.
+DATABASE_REPLICAS = [
+    host.strip()
+    for host in os.environ.get("DATABASE_REPLICAS", "").split(",")
+    if host.strip()
+]
+# Seconds to wait when connecting to a replica. Lag is probed during a
+# request, so an unreachable replica must fail fast and not hold it up.
+REPLICA_CONNECT_TIMEOUT = int(os.environ.get("REPLICA_CONNECT_TIMEOUT", 2))
+for index, replica in enumerate(DATABASE_REPLICAS, 1):
+    host, _, port = replica.partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "OPTIONS": {
+            **DATABASES["default"].get("OPTIONS", {}),
+            "connect_timeout": REPLICA_CONNECT_TIMEOUT,
+        },
+        "TEST": {"MIRROR": "default"},
+    }
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+    MIDDLEWARE.append("config.db_router.ReplicaRoutingMiddleware")
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5))
+READ_YOUR_WRITES_SECONDS = int(os.environ.get("READ_YOUR_WRITES_SECONDS", 30))
+READ_REPLICA_PATHS = [
+    "/api/properties/",
+    "/api/search/",
+    "/api/neighborhoods/",
+    "/api/analytics/",
+    "/api/favorites/",
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -152,6 +231,42 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Uploaded media and image renditions go to an S3-compatible bucket through
+# django-storages when one is configured, otherwise to MEDIA_ROOT
+AWS_STORAGE_BUCKET_NAME = os.environ.get("AWS_STORAGE_BUCKET_NAME")
+AWS_S3_REGION_NAME = os.environ.get("AWS_S3_REGION_NAME")
+AWS_S3_ENDPOINT_URL = os.environ.get("AWS_S3_ENDPOINT_URL")
+AWS_S3_CUSTOM_DOMAIN = os.environ.get("AWS_S3_CUSTOM_DOMAIN")
+AWS_QUERYSTRING_AUTH = False
+AWS_S3_OBJECT_PARAMETERS = {"CacheControl": "max-age=86400"}
+
+STORAGES = {
+    "default": {
+        "BACKEND": (
+            "storages.backends.s3.S3Storage"
+            if AWS_STORAGE_BUCKET_NAME
+            else "django.core.files.storage.FileSystemStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Resumable chunked uploads: partial files live on storage shared by web and
+# worker processes until a Celery task moves them into STORAGES["default"]
+CHUNKED_UPLOAD_DIR = os.environ.get(
+    "CHUNKED_UPLOAD_DIR", os.path.join(BASE_DIR, "chunked_uploads")
+)
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get("CHUNKED_UPLOAD_MAX_SIZE", 2 * 1024**3))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 16 * 1024**2
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# Point duplicate photo uploads at the original's stored file and renditions
+IMAGE_DEDUPE_SHARE_BLOBS = (
+    os.environ.get("IMAGE_DEDUPE_SHARE_BLOBS", "True").lower() == "true"
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -222,6 +337,13 @@ MAPBOX_ACCESS_TOKEN = os.environ.get(
 # Default to a standard Mapbox style; override via env if you prefer a custom style
 MAPBOX_STYLE = os.environ.get("MAPBOX_STYLE", "mapbox://styles/mapbox/streets-v12")
 
+# Geocoding of listing addresses (see properties.geocoding): the provider
+# class and how many lookups may be in flight at once
+GEOCODING_PROVIDER = os.environ.get(
+    "GEOCODING_PROVIDER", "properties.geocoding.MapboxProvider"
+)
+GEOCODING_CONCURRENCY = int(os.environ.get("GEOCODING_CONCURRENCY", 10))
+
 # Redis cache
 CACHES = {
     "default": {
@@ -240,6 +362,39 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Full rebuild catches markets whose listings moved city/state
+    "refresh-listing-stats": {
+        "task": "analytics.tasks.refresh_listing_stats",
+        "schedule": 60 * 60,
+    },
+    # Refit well inside the model's cache lifetime so it never goes cold
+    "fit-valuation-model": {
+        "task": "analytics.tasks.fit_valuation_model",
+        "schedule": 60 * 60 * 6,
+    },
+    # Every INDEX_MAX_AGE (analytics.comps)
+    "build-comps-index": {
+        "task": "analytics.tasks.build_comps_index",
+        "schedule": 60 * 15,
+    },
+    "rollup-market-trends": {
+        "task": "analytics.tasks.rollup_market_trends",
+        "schedule": 60 * 60 * 6,
+    },
+    "expire-media-uploads": {
+        "task": "properties.tasks.expire_media_uploads",
+        "schedule": 60 * 60,
+    },
+    "send-saved-search-digests": {
+        "task": "favorites.tasks.send_saved_search_digests",
+        "schedule": 60 * 60,
+    },
+    "prune-saved-search-changes": {
+        "task": "favorites.tasks.prune_saved_search_changes",
+        "schedule": 60 * 60,
+    },
+}
 
 # JWT settings
 SIMPLE_JWT = {
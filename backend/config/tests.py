@@ -0,0 +1,107 @@
+"""
+Tests for project-wide plumbing: health checks and database routing.
+"""
+
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from config.db_router import (
+    PRIMARY, ReplicaRouter, ReplicaRoutingMiddleware, _lag_checks, _use_replicas,
+)
+from properties.models import Property
+
+User = get_user_model()
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class HealthCheckTests(TestCase):
+    """Test cases for the health check endpoint."""
+
+    url = '/api/health/'
+
+    def test_public_response_has_no_details(self):
+        """Test anonymous callers only see the overall status."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_staff_see_database_details(self):
+        """Test staff users get per-database details."""
+        staff = User.objects.create_user(
+            email='ops@example.com', password='OpsPass123', is_staff=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['databases']['default']['ok'])
+
+    @override_settings(HEALTH_CHECK_DETAILS=True)
+    def test_details_setting(self):
+        """Test internal deployments can show details to every caller."""
+        response = self.client.get(self.url)
+        self.assertIn('latency_ms', response.json()['databases']['default'])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    DATABASES={**settings.DATABASES, 'replica1': settings.DATABASES['default']},
+    READ_REPLICA_PATHS=['/api/properties/'],
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test cases for the read-replica router and middleware."""
+
+    def setUp(self):
+        """Set up a middleware that records where each request may read."""
+        cache.clear()
+        _lag_checks.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def get_response(request):
+            self.seen.append(_use_replicas.get())
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def request(self, method, path='/api/properties/', **headers):
+        """Send a request through the middleware; return whether it may use replicas."""
+        self.middleware(getattr(self.factory, method)(path, headers=headers))
+        return self.seen[-1]
+
+    def set_lag(self, lag):
+        """Record a fresh lag check so the router doesn't probe the replica."""
+        _lag_checks['replica1'] = (time.monotonic(), lag)
+
+    def test_safe_reads_may_use_replicas(self):
+        """Test only GETs on the listed paths are marked for replicas."""
+        self.assertTrue(self.request('get'))
+        self.assertFalse(self.request('get', '/api/users/me/'))
+        self.assertFalse(self.request('post'))
+
+    def test_client_is_pinned_after_a_write(self):
+        """Test a client that just wrote reads from the primary, others don't."""
+        self.assertTrue(self.request('get', authorization='Bearer one'))
+        self.request('post', authorization='Bearer one')
+        self.assertFalse(self.request('get', authorization='Bearer one'))
+        self.assertTrue(self.request('get', authorization='Bearer two'))
+
+    def test_router_falls_back_to_primary(self):
+        """Test reads go to the primary unless a healthy replica is available."""
+        router = ReplicaRouter()
+        token = _use_replicas.set(True)
+        try:
+            self.set_lag(0.5)
+            self.assertEqual(router.db_for_read(Property), 'replica1')
+            self.set_lag(settings.REPLICA_MAX_LAG + 1)
+            self.assertEqual(router.db_for_read(Property), PRIMARY)
+            self.set_lag(None)
+            self.assertEqual(router.db_for_read(Property), PRIMARY)
+        finally:
+            _use_replicas.reset(token)
+
+        self.set_lag(0)
+        self.assertEqual(router.db_for_read(Property), PRIMARY)
+        self.assertEqual(router.db_for_write(Property), PRIMARY)
@@ -9,6 +9,7 @@ from django.conf.urls.static import static
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from .health import health
 
 # Swagger API documentation
 schema_view = get_schema_view(
@@ -33,6 +34,8 @@ urlpatterns = [
         name="schema-swagger-ui",
     ),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    # Database reachability and connection pool stats
+    path("api/health/", health, name="health"),
     # API endpoints
     path("api/auth/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.jwt")),
@@ -0,0 +1,16 @@
+"""
+App configuration for favorites app.
+"""
+
+from django.apps import AppConfig
+
+
+class FavoritesConfig(AppConfig):
+    """Favorites app configuration."""
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "favorites"
+
+    def ready(self):
+        """Connect signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,203 @@
+"""
+Predicate compilation and matching for saved searches.
+
+A saved search's ``search_params`` (the frontend's ``SearchFilters``) is
+compiled once into a normalized predicate. Listings are then matched against
+predicates without touching the database; ``percolator`` indexes the
+coarse parts of each predicate (city, price band, geohash cells) to find the
+candidate searches worth checking.
+"""
+
+import math
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Precision 4 cells are roughly 39km x 20km
+GEO_PRECISION = 4
+EARTH_RADIUS_KM = 6371.0
+
+RANGE_FIELDS = {
+    "price": ("min_price", "max_price"),
+    "bedrooms": ("min_bedrooms", "max_bedrooms"),
+    "bathrooms": ("min_bathrooms", "max_bathrooms"),
+    "square_feet": ("min_square_feet", "max_square_feet"),
+}
+TEXT_FIELDS = ["city", "state", "zip_code"]
+FLAG_FIELDS = ["has_air_conditioning", "has_heating", "pets_allowed", "furnished"]
+
+
+def geohash(lat, lng, precision=GEO_PRECISION):
+    """Encode a coordinate as a geohash string."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    bits, bit_count, even, code = 0, 0, True, []
+    while len(code) < precision:
+        span, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (span[0] + span[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            span[0] = mid
+        else:
+            span[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            code.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(code)
+
+
+def geohash_cell_size(precision=GEO_PRECISION):
+    """Return the (lat, lng) size in degrees of a geohash cell."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def geohash_cells(lat, lng, radius_km, precision=GEO_PRECISION):
+    """Return every geohash cell overlapping the circle's bounding box."""
+    lat_step, lng_step = geohash_cell_size(precision)
+    lat_span = radius_km / 111.32
+    lng_span = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+    south, north = max(lat - lat_span, -90.0), min(lat + lat_span, 90.0)
+    west, east = max(lng - lng_span, -180.0), min(lng + lng_span, 180.0)
+
+    cells = set()
+    # Sampling at half a cell guarantees every overlapped cell is hit
+    y = south
+    while True:
+        x = west
+        while True:
+            cells.add(geohash(min(y, 89.999999), min(x, 179.999999), precision))
+            if x >= east:
+                break
+            x = min(x + lng_step / 2, east)
+        if y >= north:
+            break
+        y = min(y + lat_step / 2, north)
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance between two coordinates in km."""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _number(value):
+    """Return ``value`` as a float, or None if it is blank or invalid."""
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_search(params):
+    """Normalize ``search_params`` into a predicate dict.
+
+    Unknown or blank parameters are ignored, so an empty dict matches every
+    listing.
+    """
+    params = params or {}
+    predicate = {"ranges": {}, "text": {}, "flags": {}}
+
+    for field, (low_key, high_key) in RANGE_FIELDS.items():
+        low, high = _number(params.get(low_key)), _number(params.get(high_key))
+        if low is not None or high is not None:
+            predicate["ranges"][field] = (low, high)
+
+    for field in TEXT_FIELDS:
+        value = str(params.get(field) or "").strip().lower()
+        if value:
+            predicate["text"][field] = value
+
+    for field in FLAG_FIELDS:
+        if isinstance(params.get(field), bool):
+            predicate["flags"][field] = params[field]
+
+    property_type = _number(params.get("property_type"))
+    predicate["property_type"] = int(property_type) if property_type else None
+    predicate["listing_type"] = params.get("listing_type") or None
+    predicate["features"] = {
+        int(feature) for feature in params.get("features") or [] if _number(feature)
+    }
+
+    lat, lng = _number(params.get("lat")), _number(params.get("lng"))
+    if lat is not None and lng is not None:
+        radius = _number(params.get("radius")) or 10.0
+        predicate["geo"] = (lat, lng, radius)
+        predicate["cells"] = geohash_cells(lat, lng, radius)
+    else:
+        predicate["geo"] = None
+        predicate["cells"] = None
+    return predicate
+
+
+def listing_values(prop, feature_ids=None):
+    """Extract the fields predicates look at from a ``Property``."""
+    return {
+        "id": prop.pk,
+        "city": (prop.city or "").lower(),
+        "state": (prop.state or "").lower(),
+        "zip_code": (prop.zip_code or "").lower(),
+        "price": float(prop.price),
+        "bedrooms": prop.bedrooms,
+        "bathrooms": float(prop.bathrooms),
+        "square_feet": prop.square_feet,
+        "property_type": prop.property_type_id,
+        "listing_type": prop.listing_type,
+        "latitude": prop.latitude,
+        "longitude": prop.longitude,
+        "has_air_conditioning": prop.has_air_conditioning,
+        "has_heating": prop.has_heating,
+        "pets_allowed": prop.pets_allowed,
+        "furnished": prop.furnished,
+        "features": (
+            set(feature_ids)
+            if feature_ids is not None
+            else set(prop.features.values_list("id", flat=True))
+        ),
+    }
+
+
+def matches(predicate, listing):
+    """Return True if the listing satisfies every part of the predicate."""
+    for field, (low, high) in predicate["ranges"].items():
+        value = listing[field]
+        if (low is not None and value < low) or (high is not None and value > high):
+            return False
+
+    for field, value in predicate["text"].items():
+        if listing[field] != value:
+            return False
+
+    for field, value in predicate["flags"].items():
+        if listing[field] != value:
+            return False
+
+    if (
+        predicate["property_type"]
+        and listing["property_type"] != predicate["property_type"]
+    ):
+        return False
+
+    wanted = predicate["listing_type"]
+    if wanted and wanted != "both" and listing["listing_type"] not in (wanted, "both"):
+        return False
+
+    if predicate["features"] and not predicate["features"] <= listing["features"]:
+        return False
+
+    if predicate["geo"]:
+        if listing["latitude"] is None or listing["longitude"] is None:
+            return False
+        lat, lng, radius = predicate["geo"]
+        if haversine_km(lat, lng, listing["latitude"], listing["longitude"]) > radius:
+            return False
+
+    return True
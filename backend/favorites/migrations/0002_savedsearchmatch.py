@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0001_initial'),
+        ('properties', '0002_pricechange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('new_listing', 'New listing'), ('price_change', 'Price change'), ('status_change', 'Status change')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to='properties.property')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='favorites.savedsearch')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['notified_at', 'saved_search'], name='searchmatch_pending')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('notified_at__isnull', True)), fields=('saved_search', 'property', 'kind'), name='unique_pending_saved_search_match')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0002_savedsearchmatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-created_at'], name='favorites_f_user_id_3c3f17_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:30
+
+from django.db import migrations, models
+
+# clock_timestamp() rather than now(), so a long transaction's rows are
+# not pruned early
+LOG_FUNCTION = '''
+CREATE OR REPLACE FUNCTION log_saved_search_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO favorites_savedsearchchange (saved_search_id, xid, created_at)
+    VALUES (
+        CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        txid_current(),
+        clock_timestamp()
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+LOG_TRIGGER = '''
+CREATE TRIGGER favorites_savedsearch_log_change
+AFTER INSERT OR UPDATE OR DELETE ON favorites_savedsearch
+FOR EACH ROW EXECUTE FUNCTION log_saved_search_change()
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0003_favorite_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('saved_search_id', models.BigIntegerField()),
+                ('xid', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['xid'], name='searchchange_xid'), models.Index(fields=['created_at'], name='searchchange_created')],
+            },
+        ),
+        migrations.RunSQL(
+            LOG_FUNCTION,
+            reverse_sql='DROP FUNCTION IF EXISTS log_saved_search_change()',
+        ),
+        migrations.RunSQL(
+            LOG_TRIGGER,
+            reverse_sql='DROP TRIGGER IF EXISTS favorites_savedsearch_log_change ON favorites_savedsearch',
+        ),
+    ]
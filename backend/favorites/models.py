@@ -2,12 +2,59 @@
 Models for user favorites and saved searches.
 """
 
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
 from django.contrib.postgres.fields import JSONField
+from django.utils import timezone
 from users.models import User
 from properties.models import Property
 
 
+class FavoriteManager(models.Manager):
+    """Manager for user favorites."""
+
+    def sync(self, user, add=(), remove=()):
+        """Add and remove several favorites for a user in one transaction.
+
+        Unknown property ids are ignored. Returns the property ids actually
+        added and removed, and keeps ``Property.favorites_count`` in step
+        since bulk writes bypass ``save``/``delete``. The ids come from
+        ``RETURNING``, so when two syncs race on the same favorite only the
+        one whose row was written counts it.
+        """
+        table = self.model._meta.db_table
+        added = removed = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            if add:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (user_id, property_id, created_at, notes)
+                    SELECT %s, id, %s, '' FROM {Property._meta.db_table}
+                    WHERE id = ANY(%s)
+                    ON CONFLICT (user_id, property_id) DO NOTHING
+                    RETURNING property_id
+                    """,
+                    [user.pk, timezone.now(), sorted(set(add))],
+                )
+                added = [row[0] for row in cursor.fetchall()]
+            if remove:
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table} WHERE user_id = %s AND property_id = ANY(%s)
+                    RETURNING property_id
+                    """,
+                    [user.pk, sorted(set(remove))],
+                )
+                removed = [row[0] for row in cursor.fetchall()]
+
+            Property.objects.filter(pk__in=added).update(favorites_count=F('favorites_count') + 1)
+            Property.objects.filter(pk__in=removed).update(
+                favorites_count=Greatest(F('favorites_count') - 1, Value(0))
+            )
+        return sorted(added), sorted(removed)
+
+
 class Favorite(models.Model):
     """Model for users to save favorite properties."""
     
@@ -16,12 +63,20 @@ class Favorite(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True)
     
+    objects = FavoriteManager()
+    
     class Meta:
         unique_together = ('user', 'property')
+        indexes = [models.Index(fields=['user', '-created_at'])]
         
     def __str__(self):
         return f"{self.user.email} - {self.property.title}"
 
+    @staticmethod
+    def is_favorited_by(user, property_ref='pk'):
+        """Return an Exists expression for annotating properties a user favorited."""
+        return Exists(Favorite.objects.filter(user=user, property=OuterRef(property_ref)))
+
     def save(self, *args, **kwargs):
         """Update favorites count on property when saving favorite."""
         is_new = self.pk is None
@@ -54,3 +109,69 @@ class SavedSearch(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.user.email})"
+
+    @property
+    def notification_kinds(self):
+        """Return the match kinds this search wants to be notified about."""
+        return [
+            kind for kind, enabled in [
+                ('new_listing', self.notify_new_listings),
+                ('price_change', self.notify_price_changes),
+                ('status_change', self.notify_status_changes),
+            ] if enabled
+        ]
+
+
+class SavedSearchChange(models.Model):
+    """One row per saved-search insert, update or delete, written by a trigger.
+    
+    ``xid`` is the writing transaction's id, which lets the percolator catch
+    up from a snapshot without missing late commits (see
+    ``Percolator.refresh``). Rows for deleted searches act as tombstones.
+    ``prune_saved_search_changes`` drops rows past ``CHANGE_RETENTION``.
+    """
+    
+    saved_search_id = models.BigIntegerField()
+    xid = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['xid'], name='searchchange_xid'),
+            models.Index(fields=['created_at'], name='searchchange_created'),
+        ]
+        
+    def __str__(self):
+        return f"Saved search {self.saved_search_id} changed in {self.xid}"
+
+
+class SavedSearchMatch(models.Model):
+    """A listing event waiting to be included in the user's next digest."""
+    
+    KIND_CHOICES = [
+        ('new_listing', 'New listing'),
+        ('price_change', 'Price change'),
+        ('status_change', 'Status change'),
+    ]
+    
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='saved_search_matches')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            # One pending event per search/listing/kind; repeats collapse
+            models.UniqueConstraint(
+                fields=['saved_search', 'property', 'kind'],
+                condition=Q(notified_at__isnull=True),
+                name='unique_pending_saved_search_match',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['notified_at', 'saved_search'], name='searchmatch_pending'),
+        ]
+        
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.property_id} for search {self.saved_search_id}"
@@ -0,0 +1,333 @@
+"""
+In-memory percolation index for saved searches.
+
+Instead of running every saved search against a listing, the searches are
+indexed by what they ask for and a listing is looked up against that index:
+radius searches under the geohash cells they cover, categorical fields in
+hash maps and price ranges in an interval tree. Only the resulting candidates
+go through the exact ``matching.matches`` check.
+
+Each process keeps its own index. Writes bump a version in the cache, and
+other processes then catch up from the ``SavedSearchChange`` log rather
+than reloading every search.
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from config.db import snapshot_xmin
+from .matching import compile_search, geohash, listing_values, matches
+
+VERSION_CACHE_KEY = "favorites:percolator:version"
+# Pending interval-tree changes scanned linearly before a rebuild
+REBUILD_THRESHOLD = 512
+EMPTY = frozenset()
+# How long SavedSearchChange rows are kept; an index last synced more than
+# half of this ago is rebuilt instead of caught up
+CHANGE_RETENTION = timedelta(days=1)
+
+
+class IntervalTree:
+    """Static centered interval tree answering "which ranges contain x"."""
+
+    __slots__ = ["center", "by_low", "by_high", "left", "right"]
+
+    def __init__(self, intervals):
+        """Build the tree from ``(low, high, key)`` tuples."""
+        self.center = self.left = self.right = None
+        self.by_low = self.by_high = []
+        if not intervals:
+            return
+
+        endpoints = sorted(value for low, high, _ in intervals for value in (low, high))
+        self.center = endpoints[len(endpoints) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_low = sorted(here, key=lambda interval: interval[0])
+        self.by_high = sorted(here, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, x):
+        """Return the keys of every interval containing ``x``."""
+        keys, node = [], self
+        while node is not None and node.center is not None:
+            if x < node.center:
+                for low, _, key in node.by_low:
+                    if low > x:
+                        break
+                    keys.append(key)
+                node = node.left
+            elif x > node.center:
+                for _, high, key in node.by_high:
+                    if high < x:
+                        break
+                    keys.append(key)
+                node = node.right
+            else:
+                keys.extend(key for _, _, key in node.by_low)
+                break
+        return keys
+
+
+class Percolator:
+    """Reverse index from listing attributes to the saved searches they match.
+
+    Each search is filed once, under its most selective constraint: the
+    geohash cells of a radius search, else its zip code, city or state, else
+    its price range in the interval tree, else its property or listing type.
+    Searches with none of those can match anything and are always checked.
+    Looking a listing up therefore only touches the buckets its own values
+    point at.
+    """
+
+    def __init__(self):
+        self.predicates = {}
+        self.kinds = {}
+        self.buckets = defaultdict(set)
+        self.keys = {}
+        self.prices = {}
+        self.unindexed = set()
+        self.version = None
+        self.xmin = None
+        self.synced_at = None
+        self._tree = IntervalTree([])
+        self._pending = set()
+        self._dirty = 0
+        self._deferred = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.predicates)
+
+    @staticmethod
+    def _price_range(predicate):
+        """Return the predicate's price range with open ends made infinite."""
+        low, high = predicate["ranges"].get("price", (None, None))
+        if low is None and high is None:
+            return None
+        return (
+            float("-inf") if low is None else low,
+            float("inf") if high is None else high,
+        )
+
+    @staticmethod
+    def _bucket_keys(predicate):
+        """Return the bucket keys a predicate is filed under, if any."""
+        if predicate["cells"]:
+            return [("cell", cell) for cell in sorted(predicate["cells"])]
+        for field in ["zip_code", "city", "state"]:
+            if field in predicate["text"]:
+                return [(field, predicate["text"][field])]
+        return []
+
+    @staticmethod
+    def _type_keys(predicate):
+        """Return fallback bucket keys for type-only predicates."""
+        if predicate["property_type"]:
+            return [("property_type", predicate["property_type"])]
+        if predicate["listing_type"] not in (None, "both"):
+            return [("listing_type", predicate["listing_type"])]
+        return []
+
+    def add(self, search_id, search_params, kinds=()):
+        """Index or re-index one saved search."""
+        predicate = compile_search(search_params)
+        with self._lock:
+            self._discard(search_id)
+            self.predicates[search_id] = predicate
+            self.kinds[search_id] = frozenset(kinds)
+
+            keys = self._bucket_keys(predicate)
+            price_range = None if keys else self._price_range(predicate)
+            if price_range:
+                self.prices[search_id] = price_range
+                self._pending.add(search_id)
+                self._dirty += 1
+                self._maybe_rebuild()
+                return
+
+            keys = keys or self._type_keys(predicate)
+            if not keys:
+                self.unindexed.add(search_id)
+                return
+            self.keys[search_id] = keys
+            for key in keys:
+                self.buckets[key].add(search_id)
+
+    def remove(self, search_id):
+        """Drop a saved search from the index."""
+        with self._lock:
+            self._discard(search_id)
+            self._maybe_rebuild()
+
+    def _discard(self, search_id):
+        if self.predicates.pop(search_id, None) is None:
+            return
+        self.kinds.pop(search_id, None)
+        self.unindexed.discard(search_id)
+        for key in self.keys.pop(search_id, []):
+            bucket = self.buckets[key]
+            bucket.discard(search_id)
+            if not bucket:
+                del self.buckets[key]
+        if self.prices.pop(search_id, None) is not None:
+            self._pending.discard(search_id)
+            self._dirty += 1
+
+    def _maybe_rebuild(self):
+        """Rebuild the tree once enough ranges changed since the last build.
+
+        Until then, ranges added since the build are scanned linearly and
+        stale tree entries are checked against the current ranges.
+        """
+        if not self._deferred and self._dirty > REBUILD_THRESHOLD:
+            self.rebuild_tree()
+
+    def rebuild_tree(self):
+        """Build the price interval tree from the current ranges."""
+        self._tree = IntervalTree(
+            [(low, high, search_id) for search_id, (low, high) in self.prices.items()]
+        )
+        self._pending = set()
+        self._dirty = 0
+
+    def _price_candidates(self, price):
+        """Return ids of price-filed searches whose range admits ``price``."""
+        ids = set()
+        for search_id in self._tree.stab(price) + list(self._pending):
+            bounds = self.prices.get(search_id)
+            if bounds is not None and bounds[0] <= price <= bounds[1]:
+                ids.add(search_id)
+        return ids
+
+    def percolate(self, listing, kinds=None):
+        """Return ids of saved searches matching the listing values.
+
+        ``kinds`` limits the result to searches that want notifications for
+        at least one of the given match kinds.
+        """
+        keys = [
+            ("zip_code", listing["zip_code"]),
+            ("city", listing["city"]),
+            ("state", listing["state"]),
+            ("property_type", listing["property_type"]),
+        ]
+        if listing["latitude"] is not None and listing["longitude"] is not None:
+            keys.append(("cell", geohash(listing["latitude"], listing["longitude"])))
+        if listing["listing_type"] == "both":
+            keys.extend([("listing_type", "rent"), ("listing_type", "sale")])
+        else:
+            keys.append(("listing_type", listing["listing_type"]))
+
+        with self._lock:
+            candidates = self._price_candidates(listing["price"])
+            candidates |= self.unindexed
+            for key in keys:
+                candidates |= self.buckets.get(key, EMPTY)
+            return [
+                search_id
+                for search_id in candidates
+                if (not kinds or not self.kinds[search_id].isdisjoint(kinds))
+                and matches(self.predicates[search_id], listing)
+            ]
+
+    @classmethod
+    def build(cls):
+        """Build an index of every saved search."""
+        from .models import SavedSearch
+
+        percolator = cls()
+        percolator.version = cache.get(VERSION_CACHE_KEY)
+        percolator.xmin = snapshot_xmin()
+        percolator.synced_at = timezone.now()
+        percolator._deferred = True
+        for search in SavedSearch.objects.iterator(chunk_size=2000):
+            percolator.add(search.pk, search.search_params, search.notification_kinds)
+        percolator._deferred = False
+        percolator.rebuild_tree()
+        return percolator
+
+    def refresh(self):
+        """Catch up with saved searches changed by other processes.
+
+        Re-reads the searches logged in ``SavedSearchChange`` by
+        transactions from the last sync's ``xmin`` on. A transaction still
+        open at that sync has an id at least that large, so its changes are
+        picked up whenever it commits; changes seen twice are re-indexed
+        harmlessly. Logged searches that no longer exist were deleted.
+        """
+        from .models import SavedSearch, SavedSearchChange
+
+        version = cache.get(VERSION_CACHE_KEY)
+        xmin = snapshot_xmin()
+        synced_at = timezone.now()
+        changed = set(
+            SavedSearchChange.objects.filter(xid__gte=self.xmin).values_list(
+                "saved_search_id", flat=True
+            )
+        )
+        for search in SavedSearch.objects.filter(pk__in=changed):
+            self.add(search.pk, search.search_params, search.notification_kinds)
+            changed.discard(search.pk)
+        for search_id in changed:
+            self.remove(search_id)
+        self.xmin = xmin
+        self.synced_at = synced_at
+        self.version = version
+
+
+_percolator = None
+_percolator_lock = threading.Lock()
+
+
+def get_percolator():
+    """Return this process's percolator, building or refreshing it as needed."""
+    global _percolator
+    with _percolator_lock:
+        if (
+            _percolator is None
+            or timezone.now() - _percolator.synced_at > CHANGE_RETENTION / 2
+        ):
+            # The change log may no longer reach back to the last sync
+            _percolator = Percolator.build()
+        elif _percolator.version != cache.get(VERSION_CACHE_KEY):
+            _percolator.refresh()
+        return _percolator
+
+
+def search_changed(search, deleted=False):
+    """Apply a saved-search write to the local index and tell other processes."""
+    version = uuid.uuid4().hex
+    with _percolator_lock:
+        current = _percolator is not None and _percolator.version == cache.get(
+            VERSION_CACHE_KEY
+        )
+        cache.set(VERSION_CACHE_KEY, version, None)
+        if _percolator is not None:
+            if deleted:
+                _percolator.remove(search.pk)
+            else:
+                _percolator.add(
+                    search.pk, search.search_params, search.notification_kinds
+                )
+            if current:
+                _percolator.version = version
+
+
+def percolate(prop, kinds=None, feature_ids=None):
+    """Return ids of saved searches matching a ``Property``.
+
+    This is the entry point for listing-ingest code; pass ``feature_ids``
+    when they are already at hand to skip the features query.
+    """
+    return get_percolator().percolate(listing_values(prop, feature_ids), kinds)
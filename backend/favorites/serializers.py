@@ -7,10 +7,18 @@ from .models import Favorite, SavedSearch
 from properties.serializers import PropertyListSerializer
 
 
+class FavoritePropertySerializer(PropertyListSerializer):
+    """Property card embedded in a favorite; it is favorited by definition."""
+    
+    def get_is_favorited(self, obj):
+        """Return True; the property is in the user's favorites."""
+        return True
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     """Serializer for user favorites."""
     
-    property_details = PropertyListSerializer(source='property', read_only=True)
+    property_details = FavoritePropertySerializer(source='property', read_only=True)
     
     class Meta:
         model = Favorite
@@ -18,6 +26,19 @@ class FavoriteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class FavoriteSyncSerializer(serializers.Serializer):
+    """Serializer for adding and removing several favorites at once."""
+    
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=500)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=500)
+    
+    def validate(self, data):
+        """Reject property ids that are both added and removed."""
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError("A property can't be both added and removed.")
+        return data
+
+
 class SavedSearchSerializer(serializers.ModelSerializer):
     """Serializer for saved searches."""
     
@@ -0,0 +1,58 @@
+"""
+Signal handlers that keep saved-search matching in step with writes.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from properties.models import Property
+from .models import SavedSearch
+from .percolator import search_changed
+from .tasks import match_listing_change
+
+WATCHED_FIELDS = {"price", "status"}
+
+
+@receiver(pre_save, sender=Property)
+def remember_listing_state(sender, instance, **kwargs):
+    """Stash the stored price and status so post_save can tell what changed."""
+    update_fields = kwargs.get("update_fields")
+    if instance.pk is None or (
+        update_fields and not WATCHED_FIELDS & set(update_fields)
+    ):
+        instance._saved_search_state = None
+        return
+    instance._saved_search_state = (
+        Property.objects.filter(pk=instance.pk).values_list("price", "status").first()
+    )
+
+
+@receiver(post_save, sender=Property)
+def queue_saved_search_matching(sender, instance, created, **kwargs):
+    """Match the listing against saved searches once the write commits."""
+    kinds = []
+    if created:
+        kinds.append("new_listing")
+    else:
+        previous = getattr(instance, "_saved_search_state", None)
+        if previous is None:
+            return
+        price, status = previous
+        if price != instance.price:
+            kinds.append("price_change")
+        if status != instance.status:
+            kinds.append("status_change")
+    if kinds:
+        transaction.on_commit(lambda: match_listing_change.delay(instance.pk, kinds))
+
+
+@receiver(post_save, sender=SavedSearch)
+def reindex_saved_search(sender, instance, **kwargs):
+    """Update the percolator once the saved search is committed."""
+    transaction.on_commit(lambda: search_changed(instance))
+
+
+@receiver(post_delete, sender=SavedSearch)
+def unindex_saved_search(sender, instance, **kwargs):
+    """Drop a deleted saved search from the percolator."""
+    transaction.on_commit(lambda: search_changed(instance, deleted=True))
@@ -0,0 +1,165 @@
+"""
+Celery tasks for saved-search notifications.
+"""
+
+import logging
+from collections import defaultdict
+from smtplib import SMTPException
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.utils import timezone
+from properties.models import Property
+from .matching import listing_values
+from .models import SavedSearch, SavedSearchChange, SavedSearchMatch
+from .percolator import CHANGE_RETENTION, get_percolator
+
+DIGEST_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _listing_matches(percolator, prop, kinds, owners, feature_ids=None):
+    """Return unsaved ``SavedSearchMatch`` rows for one listing change."""
+    search_ids = percolator.percolate(listing_values(prop, feature_ids), kinds)
+    missing = [search_id for search_id in search_ids if search_id not in owners]
+    if missing:
+        owners.update(
+            SavedSearch.objects.filter(pk__in=missing).values_list("id", "user_id")
+        )
+    return [
+        SavedSearchMatch(saved_search_id=search_id, property_id=prop.pk, kind=kind)
+        for search_id in search_ids
+        if search_id in owners and owners[search_id] != prop.listed_by_id
+        for kind in kinds
+        if kind in percolator.kinds.get(search_id, ())
+    ]
+
+
+@shared_task
+def match_listing_change(property_id, kinds):
+    """Record matches for a new or changed listing against saved searches.
+
+    Candidates come from the in-process percolator, so the cost scales with
+    the number of matching searches rather than the number of saved searches.
+    """
+    prop = Property.objects.filter(pk=property_id).first()
+    if prop is None:
+        return 0
+
+    new_matches = _listing_matches(get_percolator(), prop, kinds, {})
+    # A pending event for the same search/listing/kind already covers it
+    SavedSearchMatch.objects.bulk_create(
+        new_matches, batch_size=1000, ignore_conflicts=True
+    )
+    return len(new_matches)
+
+
+@shared_task
+def match_listing_changes(changes):
+    """Batch form of ``match_listing_change`` for bulk imports.
+
+    ``changes`` is a list of ``[property_id, kinds]`` pairs. Listings and
+    their feature ids are loaded with two queries for the whole batch.
+    """
+    kinds_by_id = {property_id: kinds for property_id, kinds in changes}
+    features = defaultdict(set)
+    for property_id, feature_id in Property.features.through.objects.filter(
+        property_id__in=kinds_by_id
+    ).values_list("property_id", "feature_id"):
+        features[property_id].add(feature_id)
+
+    percolator = get_percolator()
+    owners, new_matches = {}, []
+    for prop in Property.objects.filter(pk__in=kinds_by_id).iterator(chunk_size=2000):
+        new_matches.extend(
+            _listing_matches(
+                percolator, prop, kinds_by_id[prop.pk], owners, features[prop.pk]
+            )
+        )
+    SavedSearchMatch.objects.bulk_create(
+        new_matches, batch_size=1000, ignore_conflicts=True
+    )
+    return len(new_matches)
+
+
+def render_digest(user, pending):
+    """Build the subject and body of one user's digest email."""
+    lines = [f"Hi {user.first_name or user.email},", ""]
+    by_search = defaultdict(list)
+    for match in pending:
+        by_search[match.saved_search.name].append(match)
+    for name, search_matches in by_search.items():
+        lines.append(f"{name}:")
+        for match in search_matches:
+            prop = match.property
+            lines.append(
+                f"  - {match.get_kind_display()}: {prop.title}, {prop.city} "
+                f"(${prop.price:,.0f}, {prop.get_status_display()})"
+            )
+        lines.append("")
+    count = len(pending)
+    subject = f"{count} update{'s' if count != 1 else ''} for your saved searches"
+    return subject, "\n".join(lines)
+
+
+@shared_task
+def send_saved_search_digests():
+    """Email each user one digest of their pending saved-search matches."""
+    pending = (
+        SavedSearchMatch.objects.filter(notified_at__isnull=True)
+        .select_related("saved_search__user", "property")
+        .order_by("saved_search__user_id", "created_at")
+    )
+    by_user = defaultdict(list)
+    for match in pending.iterator(chunk_size=2000):
+        by_user[match.saved_search.user].append(match)
+
+    opted_out, batch = [], []
+    for user, user_matches in by_user.items():
+        match_ids = [match.pk for match in user_matches]
+        if not user.email_notifications:
+            # Opted out: mark as handled so the queue doesn't grow forever
+            opted_out.extend(match_ids)
+            continue
+        subject, body = render_digest(user, user_matches)
+        message = (subject, body, settings.DEFAULT_FROM_EMAIL, [user.email])
+        batch.append((message, match_ids))
+        if len(batch) >= DIGEST_BATCH_SIZE:
+            _send_digest_batch(batch)
+            batch = []
+    if batch:
+        _send_digest_batch(batch)
+    _mark_notified(opted_out)
+    return len(by_user)
+
+
+def _send_digest_batch(batch):
+    """Send ``[(message, match_ids)]`` and mark the matches only if it went out.
+
+    A failed batch stays pending and is retried by the next run.
+    """
+    try:
+        send_mass_mail([message for message, _ in batch], fail_silently=False)
+    except (SMTPException, OSError):
+        logger.exception("Sending %d saved-search digests failed", len(batch))
+        return
+    _mark_notified([pk for _, match_ids in batch for pk in match_ids])
+
+
+def _mark_notified(match_ids):
+    """Set ``notified_at`` on the given matches, in id batches."""
+    now = timezone.now()
+    for start in range(0, len(match_ids), DIGEST_BATCH_SIZE * 10):
+        SavedSearchMatch.objects.filter(
+            pk__in=match_ids[start : start + DIGEST_BATCH_SIZE * 10]
+        ).update(notified_at=now)
+
+
+@shared_task
+def prune_saved_search_changes():
+    """Drop saved-search change log rows no percolator still needs."""
+    deleted, _ = SavedSearchChange.objects.filter(
+        created_at__lt=timezone.now() - CHANGE_RETENTION
+    ).delete()
+    return deleted
@@ -0,0 +1,323 @@
+"""
+Tests for saved-search matching.
+"""
+
+import random
+from smtplib import SMTPException
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from favorites.models import Favorite, SavedSearch, SavedSearchChange, SavedSearchMatch
+from favorites.matching import compile_search, geohash, geohash_cells, matches
+from favorites.percolator import IntervalTree, Percolator
+from favorites.tasks import send_saved_search_digests
+from properties.models import Property, PropertyType
+
+User = get_user_model()
+
+
+def make_listing(**overrides):
+    """Return listing values for a typical Brooklyn rental."""
+    listing = {
+        'id': 1,
+        'city': 'brooklyn',
+        'state': 'ny',
+        'zip_code': '11201',
+        'price': 3200.0,
+        'bedrooms': 2,
+        'bathrooms': 1.0,
+        'square_feet': 900,
+        'property_type': 3,
+        'listing_type': 'rent',
+        'latitude': 40.6943,
+        'longitude': -73.9918,
+        'has_air_conditioning': True,
+        'has_heating': True,
+        'pets_allowed': False,
+        'furnished': False,
+        'features': {1, 4},
+    }
+    listing.update(overrides)
+    return listing
+
+
+class SavedSearchMatchingTests(SimpleTestCase):
+    """Test cases for compiled saved-search predicates."""
+    
+    def test_empty_search_matches_everything(self):
+        """Test a search with no parameters matches any listing."""
+        self.assertTrue(matches(compile_search({}), make_listing()))
+        
+    def test_ranges_and_text(self):
+        """Test price bands, bedrooms and city are all enforced."""
+        predicate = compile_search({'city': 'Brooklyn', 'min_price': '3000', 'max_price': 3500, 'min_bedrooms': 2})
+        
+        self.assertTrue(matches(predicate, make_listing()))
+        self.assertFalse(matches(predicate, make_listing(price=3600.0)))
+        self.assertFalse(matches(predicate, make_listing(bedrooms=1)))
+        self.assertFalse(matches(predicate, make_listing(city='queens')))
+        
+    def test_features_and_flags(self):
+        """Test required features and boolean amenities."""
+        predicate = compile_search({'features': [1], 'pets_allowed': False, 'listing_type': 'rent'})
+        
+        self.assertTrue(matches(predicate, make_listing()))
+        self.assertFalse(matches(predicate, make_listing(features={4})))
+        self.assertFalse(matches(predicate, make_listing(listing_type='sale')))
+        
+    def test_radius_search(self):
+        """Test geographic searches use distance and cover the listing's cell."""
+        predicate = compile_search({'lat': 40.7128, 'lng': -74.0060, 'radius': 5})
+        listing = make_listing()
+        
+        self.assertTrue(matches(predicate, listing))
+        self.assertIn(geohash(listing['latitude'], listing['longitude']), predicate['cells'])
+        self.assertFalse(matches(predicate, make_listing(latitude=40.85, longitude=-73.87)))
+        
+    def test_geohash_known_value(self):
+        """Test geohash encoding against a published reference value."""
+        self.assertEqual(geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertIn('u4pr', geohash_cells(57.64911, 10.40744, 1))
+
+
+class PercolatorTests(SimpleTestCase):
+    """Test cases for the saved-search percolation index."""
+    
+    def setUp(self):
+        rng = random.Random(7)
+        self.searches = {}
+        for search_id in range(500):
+            params = {}
+            if rng.random() < 0.4:
+                params['city'] = rng.choice(['Brooklyn', 'Queens', 'Boston'])
+            elif rng.random() < 0.5:
+                params.update(lat=40.7 + rng.uniform(-0.2, 0.2), lng=-74.0 + rng.uniform(-0.2, 0.2), radius=rng.choice([2, 5, 10]))
+            if rng.random() < 0.7:
+                low = rng.randrange(1000, 5000, 250)
+                params.update(min_price=low, max_price=low + rng.randrange(250, 3000, 250))
+            if rng.random() < 0.3:
+                params['listing_type'] = rng.choice(['rent', 'sale', 'both'])
+            self.searches[search_id] = params
+        
+        self.percolator = Percolator()
+        for search_id, params in self.searches.items():
+            self.percolator.add(search_id, params, ['new_listing'])
+        self.rng = rng
+            
+    def brute_force(self, listing):
+        """Return the ids a full scan over every search would match."""
+        return sorted(
+            search_id for search_id, params in self.searches.items()
+            if matches(compile_search(params), listing)
+        )
+        
+    def test_matches_full_scan(self):
+        """Test percolation returns exactly what a full scan would."""
+        for _ in range(50):
+            listing = make_listing(
+                city=self.rng.choice(['brooklyn', 'queens', 'boston']),
+                price=float(self.rng.randrange(500, 8000)),
+                latitude=40.7 + self.rng.uniform(-0.3, 0.3),
+                longitude=-74.0 + self.rng.uniform(-0.3, 0.3),
+                listing_type=self.rng.choice(['rent', 'sale', 'both']),
+            )
+            self.assertEqual(sorted(self.percolator.percolate(listing)), self.brute_force(listing))
+            
+    def test_incremental_updates(self):
+        """Test adds, edits and removals are visible without a rebuild."""
+        listing = make_listing(price=2500.0)
+        self.percolator.add(1000, {'city': 'Brooklyn', 'max_price': 3000}, ['new_listing'])
+        self.assertIn(1000, self.percolator.percolate(listing))
+        
+        self.percolator.add(1000, {'city': 'Brooklyn', 'max_price': 2000}, ['new_listing'])
+        self.assertNotIn(1000, self.percolator.percolate(listing))
+        
+        self.percolator.add(1001, {'min_price': 2000}, ['price_change'])
+        self.assertIn(1001, self.percolator.percolate(listing, kinds=['price_change']))
+        self.assertNotIn(1001, self.percolator.percolate(listing, kinds=['new_listing']))
+        
+        self.percolator.remove(1001)
+        self.assertNotIn(1001, self.percolator.percolate(listing))
+        
+    def test_interval_tree_stab(self):
+        """Test the interval tree finds every range containing a point."""
+        intervals = [(low, low + width, index) for index, (low, width) in enumerate(
+            (self.rng.uniform(0, 100), self.rng.uniform(0, 30)) for _ in range(300)
+        )]
+        tree = IntervalTree(intervals)
+        for x in [0, 12.5, 50, 99.9, 130]:
+            expected = sorted(key for low, high, key in intervals if low <= x <= high)
+            self.assertEqual(sorted(tree.stab(x)), expected)
+
+
+class PercolatorRefreshTests(TestCase):
+    """Test cases for catching up with saved searches written elsewhere."""
+
+    def setUp(self):
+        """Set up a user with one saved search."""
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            password='BuyerPass123',
+            first_name='Buyer',
+            last_name='Jones'
+        )
+        self.kept = SavedSearch.objects.create(
+            user=self.user, name='Brooklyn', search_params={'city': 'Brooklyn'},
+            notify_new_listings=True,
+        )
+
+    def test_refresh_applies_logged_changes(self):
+        """Test refresh picks up inserts, edits and deletes from the change log."""
+        percolator = Percolator.build()
+        self.assertIn(self.kept.pk, percolator.percolate(make_listing()))
+
+        # Writes from "another process": the signal handlers only run on commit
+        added = SavedSearch.objects.create(
+            user=self.user, name='Cheap', search_params={'max_price': 4000},
+            notify_new_listings=True,
+        )
+        SavedSearch.objects.filter(pk=self.kept.pk).update(search_params={'city': 'Queens'})
+        self.assertTrue(SavedSearchChange.objects.filter(saved_search_id=added.pk).exists())
+
+        percolator.refresh()
+        self.assertEqual(percolator.percolate(make_listing()), [added.pk])
+
+        added.delete()
+        percolator.refresh()
+        self.assertEqual(percolator.percolate(make_listing()), [])
+        self.assertEqual(len(percolator), 1)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Email backend whose SMTP server is always down."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Connection refused')
+
+
+class SavedSearchDigestTests(TestCase):
+    """Test cases for the saved-search digest emails."""
+
+    def setUp(self):
+        """Set up a pending match for a subscribed and an opted-out user."""
+        agent = User.objects.create_user(
+            email='agent@example.com', password='AgentPass123', is_agent=True
+        )
+        listing = Property.objects.create(
+            title='Loft', description='A loft.', property_type=PropertyType.objects.create(name='Loft'),
+            address_line1='1 Main St', city='Brooklyn', state='NY', zip_code='11201',
+            price=3200, bedrooms=2, bathrooms=1, square_feet=900, listed_by=agent,
+        )
+        self.subscribed, self.opted_out = [
+            SavedSearchMatch.objects.create(
+                saved_search=SavedSearch.objects.create(
+                    user=User.objects.create_user(
+                        email=email, password='BuyerPass123', email_notifications=notify
+                    ),
+                    name='Brooklyn', search_params={'city': 'Brooklyn'},
+                ),
+                property=listing, kind='new_listing',
+            )
+            for email, notify in [('buyer@example.com', True), ('quiet@example.com', False)]
+        ]
+
+    def pending(self):
+        """Return the ids of the matches not yet notified."""
+        return set(
+            SavedSearchMatch.objects.filter(notified_at__isnull=True).values_list('pk', flat=True)
+        )
+
+    def test_sent_digests_are_marked(self):
+        """Test matches are marked once their digest is sent."""
+        send_saved_search_digests()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['buyer@example.com'])
+        self.assertEqual(self.pending(), set())
+
+    @override_settings(EMAIL_BACKEND='favorites.tests.FailingEmailBackend')
+    def test_failed_digests_stay_pending(self):
+        """Test an SMTP failure leaves the matches for the next run."""
+        send_saved_search_digests()
+        self.assertEqual(self.pending(), {self.subscribed.pk})
+
+
+class FavoriteSyncTests(TestCase):
+    """Test cases for bulk favorite changes."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            password='BuyerPass123',
+            first_name='Buyer',
+            last_name='Jones'
+        )
+        property_type = PropertyType.objects.create(name='Condo')
+        self.properties = [
+            Property.objects.create(
+                title=f'Condo {index}',
+                description='A condo.',
+                property_type=property_type,
+                listing_type='sale',
+                address_line1=f'{index} Main St',
+                city='Anytown',
+                state='NY',
+                zip_code='12345',
+                location=Point(-73.9857, 40.7484),
+                price=300000,
+                bedrooms=2,
+                bathrooms=1,
+                square_feet=900,
+                listed_by=self.user,
+            )
+            for index in range(3)
+        ]
+        
+    def test_sync_adds_and_removes(self):
+        """Test one sync call adds, removes and keeps counts in step."""
+        first, second, third = self.properties
+        Favorite.objects.create(user=self.user, property=first)
+        
+        added, removed = Favorite.objects.sync(self.user, add=[first.pk, second.pk, 999999], remove=[third.pk])
+        self.assertEqual(added, [second.pk])
+        self.assertEqual(removed, [])
+        
+        added, removed = Favorite.objects.sync(self.user, remove=[first.pk])
+        self.assertEqual(removed, [first.pk])
+        
+        # Repeating a sync only counts rows it actually wrote
+        self.assertEqual(Favorite.objects.sync(self.user, add=[second.pk], remove=[first.pk]), ([], []))
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.favorites_count, 0)
+        self.assertEqual(second.favorites_count, 1)
+        
+    def test_is_favorited_annotation(self):
+        """Test properties are annotated with the user's favorite status."""
+        Favorite.objects.create(user=self.user, property=self.properties[1])
+        flags = dict(
+            Property.objects.annotate(is_favorited=Favorite.is_favorited_by(self.user))
+            .values_list('id', 'is_favorited')
+        )
+        self.assertEqual(flags, {prop.pk: prop == self.properties[1] for prop in self.properties})
+
+    def test_list_query_count_is_constant(self):
+        """Test listing favorites doesn't issue per-property queries."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        Favorite.objects.create(user=self.user, property=self.properties[0])
+        with CaptureQueriesContext(connection) as one:
+            response = client.get('/api/favorites/properties/?ordering=-price')
+        self.assertEqual(response.status_code, 200)
+        
+        Favorite.objects.sync(self.user, add=[prop.pk for prop in self.properties])
+        with CaptureQueriesContext(connection) as three:
+            response = client.get('/api/favorites/properties/?ordering=-price')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(three), len(one))
@@ -2,12 +2,17 @@
 Views for favorites app.
 """
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from .models import Favorite, SavedSearch
-from .serializers import FavoriteSerializer, SavedSearchSerializer
+from .serializers import (
+    FavoriteSerializer,
+    FavoriteSyncSerializer,
+    SavedSearchSerializer,
+)
 from properties.models import Property
 
 
@@ -16,13 +21,21 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["created_at", "price"]
+    ordering = ["-created_at"]
 
     def get_queryset(self):
-        """Return favorites for the current user."""
+        """Return favorites for the current user with their property cards."""
         # Handle anonymous users during schema generation
         if getattr(self, "swagger_fake_view", False):
             return Favorite.objects.none()
-        return Favorite.objects.filter(user=self.request.user)
+        # One page query joins the property, its type and its primary image
+        return (
+            Favorite.objects.filter(user=self.request.user)
+            .annotate(price=F("property__price"))
+            .select_related("property__property_type", "property__primary_image")
+        )
 
     def create(self, request, *args, **kwargs):
         """Add a property to favorites."""
@@ -48,6 +61,23 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(favorite)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"])
+    def sync(self, request):
+        """Add and remove several favorites in one request."""
+        serializer = FavoriteSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        added, removed = Favorite.objects.sync(
+            request.user,
+            add=serializer.validated_data["add"],
+            remove=serializer.validated_data["remove"],
+        )
+        favorited = Favorite.objects.filter(user=request.user).values_list(
+            "property_id", flat=True
+        )
+        return Response(
+            {"added": added, "removed": removed, "favorited": list(favorited)}
+        )
+
     @action(
         detail=False, methods=["delete"], url_path="property/(?P<property_id>[^/.]+)"
     )
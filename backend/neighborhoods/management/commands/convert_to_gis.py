@@ -2,78 +2,72 @@
 Management command to convert lat/lng to GIS Point fields.
 """
 
+import time
 from django.core.management.base import BaseCommand
-from django.contrib.gis.geos import Point
 from neighborhoods.models import School, PointOfInterest
+from properties.geo import (
+    HAS_COORDINATES,
+    location_from_coordinates,
+    update_in_id_chunks,
+)
 from properties.models import Property
 
+MODELS = {
+    "school": (School, "schools"),
+    "poi": (PointOfInterest, "points of interest"),
+    "property": (Property, "properties"),
+}
+
 
 class Command(BaseCommand):
     help = "Convert latitude/longitude fields to GIS Point fields"
 
-    def handle(self, *args, **options):
-        # Process School objects
-        schools = School.objects.filter(latitude__isnull=False, longitude__isnull=False)
-        school_count = 0
-
-        for school in schools:
-            try:
-                school.location = Point(school.longitude, school.latitude, srid=4326)
-                school.save(update_fields=["location"])
-                school_count += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error processing School {school.id}: {e}")
-                )
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Successfully updated location for {school_count} schools"
-            )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=list(MODELS),
+            help="Only convert this table (default: all of them)",
         )
-
-        # Process PointOfInterest objects
-        pois = PointOfInterest.objects.filter(
-            latitude__isnull=False, longitude__isnull=False
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50000,
+            help="Id span updated per statement; 0 updates each table at once",
+        )
+        parser.add_argument(
+            "--after",
+            type=int,
+            help="Resume after this id (the last one reported); needs --model",
         )
-        poi_count = 0
 
-        for poi in pois:
-            try:
-                poi.location = Point(poi.longitude, poi.latitude, srid=4326)
-                poi.save(update_fields=["location"])
-                poi_count += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error processing PointOfInterest {poi.id}: {e}")
-                )
+    def handle(self, *args, **options):
+        if options["after"] is not None and not options["model"]:
+            self.stderr.write(self.style.ERROR("--after needs --model"))
+            return
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Successfully updated location for {poi_count} points of interest"
-            )
-        )
+        for key in [options["model"]] if options["model"] else MODELS:
+            model, label = MODELS[key]
+            started = time.monotonic()
+            # Only fill gaps; writes are kept in step by the database
+            rows = model.objects.filter(HAS_COORDINATES, location__isnull=True)
 
-        # Process Property objects
-        properties = Property.objects.filter(
-            latitude__isnull=False, longitude__isnull=False
-        )
-        property_count = 0
+            def report(updated, last_id, label=label, key=key):
+                if last_id is not None:
+                    self.stdout.write(
+                        f"Updated {updated} {label} up to id {last_id} "
+                        f"(resume with --model {key} --after {last_id})"
+                    )
 
-        for prop in properties:
-            try:
-                # Check if location already exists
-                if not prop.location:
-                    prop.location = Point(prop.longitude, prop.latitude, srid=4326)
-                    prop.save(update_fields=["location"])
-                    property_count += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error processing Property {prop.id}: {e}")
+            count = update_in_id_chunks(
+                rows,
+                {"location": location_from_coordinates()},
+                options["chunk_size"],
+                after=options["after"],
+                progress=report,
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully updated location for {count} {label} "
+                    f"in {time.monotonic() - started:.1f}s"
                 )
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Successfully updated location for {property_count} properties"
             )
-        )
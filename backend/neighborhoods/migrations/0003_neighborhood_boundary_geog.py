@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:12
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('neighborhoods', '0002_pointofinterest_location_school_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='neighborhood',
+            index=django.contrib.postgres.indexes.GistIndex(django.db.models.functions.comparison.Cast('boundary', output_field=django.contrib.gis.db.models.fields.PolygonField(geography=True)), name='neighborhood_boundary_geog'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:41
+
+import importlib
+from django.db import migrations
+
+# The trigger function and backfill are defined with the listings table
+sync_trigger_sql = importlib.import_module(
+    'properties.migrations.0010_sync_location_trigger'
+).sync_trigger_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('neighborhoods', '0003_neighborhood_boundary_geog'),
+        ('properties', '0010_sync_location_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(*sync_trigger_sql('neighborhoods_school')),
+        migrations.RunSQL(*sync_trigger_sql('neighborhoods_pointofinterest')),
+    ]
@@ -3,7 +3,18 @@ Models for neighborhood data.
 """
 
 from django.db import models
+from django.db.models.functions import Cast
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GistIndex
+
+
+def boundary_as_geography():
+    """Return the geography cast of ``Neighborhood.boundary``.
+
+    Distance lookups must use this exact expression so PostgreSQL can match
+    it against the functional GiST index declared on ``Neighborhood``.
+    """
+    return Cast("boundary", output_field=gis_models.PolygonField(geography=True))
 
 
 class Neighborhood(models.Model):
@@ -51,6 +62,12 @@ class Neighborhood(models.Model):
     transit_score = models.PositiveSmallIntegerField(null=True, blank=True)  # 0-100
     bike_score = models.PositiveSmallIntegerField(null=True, blank=True)  # 0-100
 
+    class Meta:
+        indexes = [
+            # Metre-based ST_DWithin/ST_Distance queries run on geography
+            GistIndex(boundary_as_geography(), name="neighborhood_boundary_geog"),
+        ]
+
     def __str__(self):
         return f"{self.name}, {self.city}, {self.state}"
 
@@ -0,0 +1,85 @@
+"""
+Tests for neighborhood data.
+"""
+
+from django.contrib.gis.geos import Point, Polygon
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from neighborhoods.models import Neighborhood
+from neighborhoods.views import bounding_box
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def square(lng, lat, size=0.01):
+    """Return a square boundary with its south-west corner at (lng, lat)."""
+    return Polygon.from_bbox((lng, lat, lng + size, lat + size))
+
+
+class BoundingBoxTests(SimpleTestCase):
+    """Test cases for the near_location bounding-box prefilter."""
+
+    def test_box_contains_radius(self):
+        """Test the box reaches at least the radius in every direction."""
+        box = bounding_box(40.0, -74.0, 10)
+        centre = Point(-74.0, 40.0, srid=4326)
+        for lng, lat in [(-74.0, 40.0898), (-74.0, 39.9102), (-73.8828, 40.0), (-74.1172, 40.0)]:
+            self.assertTrue(box.contains(Point(lng, lat)), (lng, lat))
+        self.assertTrue(box.contains(centre))
+
+    def test_box_is_clamped_near_the_poles(self):
+        """Test the box stays within valid coordinates."""
+        xmin, ymin, xmax, ymax = bounding_box(89.99, 179.0, 50).extent
+        self.assertGreaterEqual(xmin, -180)
+        self.assertLessEqual(xmax, 180)
+        self.assertLessEqual(ymax, 90)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NearLocationTests(TestCase):
+    """Test cases for the near_location endpoint."""
+
+    url = '/api/neighborhoods/near_location/'
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.nearby = Neighborhood.objects.create(
+            name='Midtown', city='New York', state='NY', zip_codes='10001',
+            boundary=square(-73.99, 40.75),
+        )
+        self.further = Neighborhood.objects.create(
+            name='Harlem', city='New York', state='NY', zip_codes='10027',
+            boundary=square(-73.95, 40.80),
+        )
+        Neighborhood.objects.create(
+            name='Downtown', city='Philadelphia', state='PA', zip_codes='19107',
+            boundary=square(-75.16, 39.95),
+        )
+
+    def test_nearest_first_within_radius(self):
+        """Test only neighborhoods within the radius are returned, nearest first."""
+        response = self.client.get(self.url, {'lat': 40.7484, 'lng': -73.9857, 'radius': 10})
+        self.assertEqual(response.status_code, 200)
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.nearby.pk, self.further.pk])
+
+        response = self.client.get(self.url, {'lat': 40.7484, 'lng': -73.9857, 'radius': 1})
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.nearby.pk])
+
+    def test_grid_cell_is_cached(self):
+        """Test requests in the same grid cell share one query."""
+        params = {'lat': 40.74841, 'lng': -73.98571, 'radius': 10}
+        first = self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, dict(params, lat=40.74839))
+        self.assertEqual(first.json(), second.json())
+
+    def test_invalid_parameters(self):
+        """Test missing or invalid parameters are rejected."""
+        self.assertEqual(self.client.get(self.url, {'lat': 40.7}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'lat': 'x', 'lng': 1}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url, {'lat': 40.7, 'lng': -74, 'radius': 0}).status_code, 400
+        )
@@ -7,11 +7,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 # Restored GIS imports for spatial functionality
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Point, Polygon
 from django.contrib.gis.measure import D
 from django.contrib.gis.db.models.functions import Distance
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
-from .models import Neighborhood, School, PointOfInterest
+from .models import Neighborhood, School, PointOfInterest, boundary_as_geography
 import math
 from .serializers import (
     NeighborhoodListSerializer,
@@ -20,6 +21,27 @@ from .serializers import (
     PointOfInterestSerializer,
 )
 
+# near_location queries are snapped to a ~110m grid so that nearby requests
+# (which cluster heavily around city centres) share one cached result.
+NEAR_LOCATION_GRID_DECIMALS = 3
+NEAR_LOCATION_CACHE_TIMEOUT = 60 * 15
+KM_PER_DEGREE_LAT = 111.32
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return a lat/lng box that fully contains a circle of ``radius_km``."""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    # Clamp the cosine so boxes near the poles don't blow up to infinity
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    return Polygon.from_bbox(
+        (
+            max(lng - lng_delta, -180.0),
+            max(lat - lat_delta, -90.0),
+            min(lng + lng_delta, 180.0),
+            min(lat + lat_delta, 90.0),
+        )
+    )
+
 
 class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
     """API endpoint for neighborhoods."""
@@ -52,20 +74,39 @@ class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
         except ValueError:
             return Response({"error": "Invalid coordinates or radius"}, status=400)
 
+        if radius <= 0:
+            return Response({"error": "radius must be positive"}, status=400)
+
+        # Snap to the cache grid before querying so every request in a cell
+        # gets identical results
+        lat = round(lat, NEAR_LOCATION_GRID_DECIMALS)
+        lng = round(lng, NEAR_LOCATION_GRID_DECIMALS)
+        radius = round(radius, 1) or 0.1
+        cache_key = f"neighborhoods:near:{lat}:{lng}:{radius}"
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
         # Create a point from the provided coordinates
         point = Point(lng, lat, srid=4326)
 
-        # Find neighborhoods within the radius
+        # The bounding-box test is answered by the geometry GiST index; the
+        # exact metre-based check then runs ST_DWithin on geography.
         neighborhoods = (
-            Neighborhood.objects.filter(boundary__distance_lt=(point, D(km=radius)))
-            .annotate(distance=Distance("boundary", point))
+            Neighborhood.objects.filter(
+                boundary__bboverlaps=bounding_box(lat, lng, radius)
+            )
+            .annotate(boundary_geog=boundary_as_geography())
+            .filter(boundary_geog__dwithin=(point, D(km=radius)))
+            .annotate(distance=Distance("boundary_geog", point))
             .order_by("distance")[:10]
         )  # Get 10 nearest neighborhoods
 
-        serializer = NeighborhoodListSerializer(
-            neighborhoods, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        # Serialized without the request: the result is shared by every
+        # client in the grid cell, so it must not depend on who asked
+        data = NeighborhoodListSerializer(neighborhoods, many=True).data
+        cache.set(cache_key, data, NEAR_LOCATION_CACHE_TIMEOUT)
+        return Response(data)
 
 
 class SchoolViewSet(viewsets.ReadOnlyModelViewSet):
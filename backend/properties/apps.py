@@ -0,0 +1,16 @@
+"""
+App configuration for properties app.
+"""
+
+from django.apps import AppConfig
+
+
+class PropertiesConfig(AppConfig):
+    """Properties app configuration."""
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "properties"
+
+    def ready(self):
+        """Connect signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,92 @@
+"""
+Async views for the read-heavy map and search endpoints.
+
+Under ASGI (``config.asgi``) these wait on the database without tying up a
+worker, so one process can serve many slow map queries at once. DRF views
+are sync-only, so these are plain Django views. DRF authentication and the
+filter backends may query the database, so they run off the event loop.
+The listing queries use the async ORM.
+"""
+
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .geo import HAS_COORDINATES
+from .images import THUMBNAIL_WIDTH
+from .models import Property
+from .serializers import image_url
+
+
+def async_api_view(view):
+    """Turn an async view taking a DRF ``Request`` into a GET-only Django view.
+
+    The request is authenticated with the configured DRF authenticators,
+    and ``APIException`` becomes a JSON error response as in DRF views.
+    """
+
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        api_request = Request(
+            request,
+            authenticators=[
+                authenticator()
+                for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ],
+        )
+        try:
+            # Resolves the token's user, which is a query
+            await sync_to_async(lambda: api_request.user)()
+            return await view(api_request, *args, **kwargs)
+        except APIException as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+
+    return wrapper
+
+
+def map_queryset(request):
+    """Listings with coordinates, filtered like the property list."""
+    from .views import PropertyViewSet
+
+    queryset = Property.objects.select_related("property_type", "primary_image").filter(
+        HAS_COORDINATES
+    )
+    view = PropertyViewSet(request=request, action="map_data", format_kwarg=None)
+    for backend in (DjangoFilterBackend, filters.SearchFilter):
+        queryset = backend().filter_queryset(request, queryset, view)
+    return queryset
+
+
+@async_api_view
+async def map_data(request):
+    """Return property locations for map display."""
+    queryset = await sync_to_async(map_queryset)(request)
+    return JsonResponse(
+        [
+            {
+                "id": property_obj.id,
+                "title": property_obj.title,
+                "price": float(property_obj.price),
+                "latitude": property_obj.latitude,
+                "longitude": property_obj.longitude,
+                "address": property_obj.get_full_address(),
+                "property_type": property_obj.property_type.name,
+                "bedrooms": property_obj.bedrooms,
+                "bathrooms": float(property_obj.bathrooms),
+                "square_feet": property_obj.square_feet,
+                "listing_type": property_obj.listing_type,
+                "status": property_obj.status,
+                "primary_image": image_url(
+                    property_obj.primary_image, THUMBNAIL_WIDTH, request
+                ),
+            }
+            async for property_obj in queryset.aiterator(chunk_size=2000)
+        ],
+        safe=False,
+    )
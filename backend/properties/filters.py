@@ -19,6 +19,12 @@ class PropertyFilter(django_filters.FilterSet):
     max_square_feet = django_filters.NumberFilter(field_name='square_feet', lookup_expr='lte')
     year_built_min = django_filters.NumberFilter(field_name='year_built', lookup_expr='gte')
     year_built_max = django_filters.NumberFilter(field_name='year_built', lookup_expr='lte')
+    min_price_per_sqft = django_filters.NumberFilter(field_name='price_per_sqft', lookup_expr='gte')
+    max_price_per_sqft = django_filters.NumberFilter(field_name='price_per_sqft', lookup_expr='lte')
+    min_price_per_bedroom = django_filters.NumberFilter(field_name='price_per_bedroom', lookup_expr='gte')
+    max_price_per_bedroom = django_filters.NumberFilter(field_name='price_per_bedroom', lookup_expr='lte')
+    min_monthly_cost = django_filters.NumberFilter(field_name='monthly_cost', lookup_expr='gte')
+    max_monthly_cost = django_filters.NumberFilter(field_name='monthly_cost', lookup_expr='lte')
     has_virtual_tour = django_filters.BooleanFilter(field_name='virtual_tour_url', lookup_expr='isnull', exclude=True)
     features = django_filters.CharFilter(field_name='features__name', lookup_expr='iexact')
     
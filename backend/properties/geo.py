@@ -0,0 +1,157 @@
+"""
+Set-based helpers for the coordinates of listings, schools and places.
+
+``location`` and the ``latitude``/``longitude`` columns hold the same
+position; a database trigger keeps them in step on every insert and update,
+bulk ones included (properties migration 0010). These expressions let
+maintenance commands check and repair them in the database, one UPDATE per
+id window, instead of loading and saving rows one at a time. Windows are
+committed separately and reported, so an interrupted run resumes from the
+last id it printed.
+"""
+
+import random
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.db.models import F, FloatField, Func, Max, Min, Q
+from django.db.models.functions import Abs
+from django.utils import timezone
+from config.db import id_ranges
+
+WGS84 = 4326
+# Degrees; roughly 11 metres
+COORDINATE_TOLERANCE = 0.0001
+
+HAS_COORDINATES = Q(latitude__isnull=False, longitude__isnull=False)
+ZERO_COORDINATES = Q(latitude=0, longitude=0)
+INVALID_COORDINATES = HAS_COORDINATES & (
+    Q(latitude__lt=-90)
+    | Q(latitude__gt=90)
+    | Q(longitude__lt=-180)
+    | Q(longitude__gt=180)
+)
+# Roughly the continental US: 20°N to 50°N, 130°W to 65°W
+OUTSIDE_US = HAS_COORDINATES & (
+    Q(latitude__lt=20)
+    | Q(latitude__gt=50)
+    | Q(longitude__lt=-130)
+    | Q(longitude__gt=-65)
+)
+
+
+class MakePoint(Func):
+    """``ST_SetSRID(ST_MakePoint(x, y), srid)`` from two numeric expressions."""
+
+    template = "ST_SetSRID(ST_MakePoint(%(expressions)s), %(srid)s)"
+    arity = 2
+
+    def __init__(self, x, y, srid=WGS84, **extra):
+        super().__init__(x, y, srid=srid, output_field=PointField(srid=srid), **extra)
+
+
+class PointX(Func):
+    """``ST_X`` of a point, i.e. its longitude."""
+
+    function = "ST_X"
+    output_field = FloatField()
+
+
+class PointY(Func):
+    """``ST_Y`` of a point, i.e. its latitude."""
+
+    function = "ST_Y"
+    output_field = FloatField()
+
+
+def location_from_coordinates():
+    """Return the point expression built from a row's latitude/longitude."""
+    return MakePoint(F("longitude"), F("latitude"))
+
+
+def with_location_drift(queryset):
+    """Alias how far ``location`` is from latitude/longitude, in degrees.
+
+    Adds ``drift_x``/``drift_y``; filter with ``INCONSISTENT_LOCATION``.
+    """
+    return queryset.alias(
+        drift_x=Abs(PointX("location") - F("longitude")),
+        drift_y=Abs(PointY("location") - F("latitude")),
+    )
+
+
+INCONSISTENT_LOCATION = (
+    HAS_COORDINATES
+    & Q(location__isnull=False)
+    & (Q(drift_x__gt=COORDINATE_TOLERANCE) | Q(drift_y__gt=COORDINATE_TOLERANCE))
+)
+
+
+def update_in_id_chunks(queryset, updates, chunk_size, after=None, progress=None):
+    """Apply ``queryset.update(**updates)`` one id window at a time.
+
+    Each window commits on its own and ``progress(updated, last_id)`` is
+    called after it; pass the last reported id as ``after`` to resume. A
+    ``chunk_size`` of 0 runs a single UPDATE. Returns the rows updated.
+    """
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    if not chunk_size:
+        updated = queryset.update(**updates)
+        if progress:
+            progress(updated, None)
+        return updated
+
+    bounds = queryset.aggregate(min_id=Min("pk"), max_id=Max("pk"))
+    if bounds["min_id"] is None:
+        return 0
+    updated = 0
+    for start, end in id_ranges(bounds["min_id"], bounds["max_id"], chunk_size):
+        with transaction.atomic():
+            updated += queryset.filter(pk__gte=start, pk__lt=end).update(**updates)
+        if progress:
+            progress(updated, end - 1)
+    return updated
+
+
+def relocate_to_cities(queryset, cities, chunk_size, after=None, progress=None):
+    """Move listings to random points inside randomly picked city boxes.
+
+    ``cities`` are dicts with ``lat_range`` and ``lng_range``. Listings are
+    handled in id order with one ``bulk_update`` per chunk, reporting and
+    resuming like ``update_in_id_chunks``. Returns the rows updated.
+    """
+    last_id = after or 0
+    updated = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return updated
+
+        now = timezone.now()
+        listings = []
+        for pk in ids:
+            city = random.choice(cities)
+            latitude = random.uniform(*city["lat_range"])
+            longitude = random.uniform(*city["lng_range"])
+            listings.append(
+                queryset.model(
+                    pk=pk,
+                    latitude=latitude,
+                    longitude=longitude,
+                    location=Point(longitude, latitude, srid=WGS84),
+                    updated_at=now,
+                )
+            )
+        with transaction.atomic():
+            queryset.model.objects.bulk_update(
+                listings, ["latitude", "longitude", "location", "updated_at"]
+            )
+        updated += len(listings)
+        last_id = ids[-1]
+        if progress:
+            progress(updated, last_id)
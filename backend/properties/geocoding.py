@@ -0,0 +1,301 @@
+"""
+Geocoding of listing addresses.
+
+Addresses are normalized (case, punctuation, street suffixes) and looked up
+in the ``GeocodedAddress`` table first with one query per batch; only the
+misses go to the provider. Those lookups run concurrently on one event loop
+and share the provider's pooled HTTP connections, bounded by
+``GEOCODING_CONCURRENCY``. Every answer, misses included, is cached, so the
+provider never sees the same address twice.
+
+The provider is ``settings.GEOCODING_PROVIDER``: ``MapboxProvider`` by
+default, or ``StaticProvider`` as a local stand-in for tests and
+development. A provider is a class with ``name`` and
+``async geocode(address) -> (latitude, longitude) | None`` that is used as
+an async context manager.
+"""
+
+import asyncio
+import re
+from functools import partial
+from urllib.parse import quote
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .geo import HAS_COORDINATES
+from .models import GeocodedAddress, Property
+
+DEFAULT_BATCH_SIZE = 500
+# Lookup result for a provider failure
+FAILED = object()
+
+# USPS abbreviations for the words that vary most between feeds
+ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "boulevard": "blvd",
+    "drive": "dr",
+    "road": "rd",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "apartment": "apt",
+    "suite": "ste",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "northeast": "ne",
+    "northwest": "nw",
+    "southeast": "se",
+    "southwest": "sw",
+    "united states": "us",
+    "usa": "us",
+}
+ABBREVIATION_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(ABBREVIATIONS, key=len, reverse=True)) + r")\b"
+)
+
+
+class GeocodingError(Exception):
+    """A lookup failed for a reason worth retrying later; nothing is cached."""
+
+
+def normalize_address(address):
+    """Return the cache key for an address."""
+    address = re.sub(r"[^\w\s]", " ", address.lower())
+    address = ABBREVIATION_PATTERN.sub(lambda match: ABBREVIATIONS[match[1]], address)
+    return " ".join(address.split())[:255]
+
+
+def listing_address(listing):
+    """Format a listing's address (a model or ``.values()`` dict) for lookup."""
+    get = listing.get if isinstance(listing, dict) else partial(getattr, listing)
+    parts = [
+        get("address_line1"),
+        get("city"),
+        f"{get('state') or ''} {get('zip_code') or ''}".strip(),
+        get("country"),
+    ]
+    return ", ".join(part for part in parts if part)
+
+
+class MapboxProvider:
+    """Mapbox Geocoding API over a pooled ``httpx`` client.
+
+    Uses the ``mapbox.places-permanent`` endpoint, the one whose results
+    Mapbox allows to be stored, since every answer goes into
+    ``GeocodedAddress``.
+    """
+
+    name = "mapbox"
+    URL = "https://api.mapbox.com/geocoding/v5/mapbox.places-permanent/{query}.json"
+
+    def __init__(self, concurrency=None, access_token=None, timeout=10):
+        self.concurrency = concurrency or settings.GEOCODING_CONCURRENCY
+        self.access_token = access_token or settings.MAPBOX_ACCESS_TOKEN
+        self.timeout = timeout
+        self.client = None
+
+    async def __aenter__(self):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def geocode(self, address):
+        import httpx
+
+        try:
+            response = await self.client.get(
+                self.URL.format(query=quote(address, safe="")),
+                params={
+                    "access_token": self.access_token,
+                    "limit": 1,
+                    "types": "address",
+                },
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            # A bad request won't get better; rate limits and outages will
+            if exc.response.status_code in (400, 404, 422):
+                return None
+            raise GeocodingError(str(exc)) from exc
+        except httpx.HTTPError as exc:
+            raise GeocodingError(str(exc)) from exc
+
+        try:
+            features = response.json().get("features") or []
+            if not features:
+                return None
+            longitude, latitude = features[0]["center"]
+            return float(latitude), float(longitude)
+        except (AttributeError, KeyError, TypeError, ValueError) as exc:
+            # An unexpected body fails this lookup, not the whole batch
+            raise GeocodingError(f"Unexpected response: {exc!r}") from exc
+
+
+class StaticProvider:
+    """Local stand-in answering from a fixed table; no network.
+
+    ``results`` maps addresses (normalized on the way in) to
+    ``(latitude, longitude)``; anything else is a miss. ``calls`` counts
+    the lookups made, so tests can check what was cached.
+    """
+
+    name = "static"
+
+    def __init__(self, results=None, concurrency=None):
+        self.results = {
+            normalize_address(address): coordinates
+            for address, coordinates in (results or {}).items()
+        }
+        self.calls = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def geocode(self, address):
+        self.calls += 1
+        return self.results.get(normalize_address(address))
+
+
+class Geocoder:
+    """Resolve addresses through the cache and, for misses, the provider.
+
+    Usage::
+
+        coordinates = Geocoder().geocode_many(["1 Oak St, Austin, TX 78701"])
+        coordinates["1 Oak St, Austin, TX 78701"]  # (30.27, -97.74) or None
+    """
+
+    def __init__(self, provider=None, concurrency=None):
+        self.concurrency = concurrency or settings.GEOCODING_CONCURRENCY
+        self.provider = provider or import_string(settings.GEOCODING_PROVIDER)(
+            concurrency=self.concurrency
+        )
+        self.cached = 0
+        self.looked_up = 0
+        self.failed = 0
+
+    def geocode_many(self, addresses):
+        """Return ``{address: (latitude, longitude) or None}``.
+
+        Addresses whose lookup failed are left out, so they are tried again
+        next time. Runs its own event loop, so call it from sync code
+        (tasks, commands), not from inside a running loop.
+        """
+        keys = {address: normalize_address(address) for address in addresses}
+        known = {
+            entry.address: entry
+            for entry in GeocodedAddress.objects.filter(address__in=set(keys.values()))
+        }
+        self.cached += len(known)
+
+        # One lookup per distinct normalized address
+        missing = {}
+        for address, key in keys.items():
+            if key not in known:
+                missing.setdefault(key, address)
+        if missing:
+            found = asyncio.run(self.lookup(list(missing.values())))
+            entries = [
+                GeocodedAddress(
+                    address=key,
+                    latitude=coordinates[0] if coordinates else None,
+                    longitude=coordinates[1] if coordinates else None,
+                    provider=self.provider.name,
+                )
+                for key, coordinates in zip(missing, found)
+                if coordinates is not FAILED
+            ]
+            GeocodedAddress.objects.bulk_create(entries, ignore_conflicts=True)
+            known.update((entry.address, entry) for entry in entries)
+
+        return {
+            address: (
+                (known[key].latitude, known[key].longitude)
+                if known[key].latitude is not None
+                else None
+            )
+            for address, key in keys.items()
+            if key in known
+        }
+
+    async def lookup(self, addresses):
+        """Geocode ``addresses`` concurrently.
+
+        Returns one result per address, ``FAILED`` for failed lookups.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(address):
+            async with semaphore:
+                try:
+                    return await self.provider.geocode(address)
+                except GeocodingError:
+                    return FAILED
+
+        async with self.provider:
+            results = await asyncio.gather(*(one(address) for address in addresses))
+        self.looked_up += len(addresses)
+        self.failed += sum(result is FAILED for result in results)
+        return results
+
+    def geocode_listings(self, queryset=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Fill in coordinates for listings that have none.
+
+        Works through ``queryset`` (every listing by default) in id order,
+        one cache query, provider round and ``bulk_update`` per batch. The
+        database derives ``location`` from the new coordinates. Returns the
+        number of listings updated.
+        """
+        queryset = (
+            queryset if queryset is not None else Property.objects.all()
+        ).exclude(HAS_COORDINATES)
+        fields = ["id", "address_line1", "city", "state", "zip_code", "country"]
+        last_id = 0
+        updated = 0
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values(*fields)[:batch_size]
+            )
+            if not rows:
+                return updated
+            last_id = rows[-1]["id"]
+
+            addresses = {row["id"]: listing_address(row) for row in rows}
+            coordinates = self.geocode_many(set(addresses.values()))
+            now = timezone.now()
+            listings = [
+                Property(
+                    pk=pk,
+                    latitude=coordinates[address][0],
+                    longitude=coordinates[address][1],
+                    updated_at=now,
+                )
+                for pk, address in addresses.items()
+                if coordinates.get(address)
+            ]
+            Property.objects.bulk_update(
+                listings, ["latitude", "longitude", "updated_at"]
+            )
+            updated += len(listings)
@@ -0,0 +1,143 @@
+"""
+Resized renditions of property images.
+
+Uploads are stored as-is and a Celery task renders a fixed ladder of widths
+in WebP and JPEG next to them, so list cards and map popups can download a
+photo sized for the slot instead of the original.
+"""
+
+import io
+import posixpath
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+RENDITION_WIDTHS = [320, 640, 1280]
+RENDITION_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+# Widths served to map popups and list cards
+THUMBNAIL_WIDTH = 320
+CARD_WIDTH = 640
+
+# dHash is HASH_SIZE x HASH_SIZE bits; images whose hashes differ in at most
+# DUPLICATE_DISTANCE bits are treated as the same photo. With four 16-bit
+# bands, any such pair shares at least one band exactly (pigeonhole).
+HASH_SIZE = 8
+HASH_BANDS = 4
+DUPLICATE_DISTANCE = HASH_BANDS - 1
+HASH_MASK = (1 << 64) - 1
+
+
+def is_external(image_field):
+    """Return True if the image is a remote URL rather than a stored file."""
+    return str(image_field).startswith(("http://", "https://"))
+
+
+def rendition_name(name, width, fmt):
+    """Return the storage name of one rendition of an image."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = "jpg" if fmt == "jpeg" else fmt
+    return posixpath.join(directory, "renditions", f"{stem}_{width}.{extension}")
+
+
+def render(source, widths=RENDITION_WIDTHS):
+    """Yield ``(width, fmt, bytes)`` for every rendition of an image file.
+
+    Widths larger than the original are skipped rather than upscaled, but
+    the original width is always rendered when it is below the smallest
+    step so small uploads still get WebP/JPEG versions.
+    """
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "L"):
+            original = original.convert("RGB")
+
+        targets = [width for width in widths if width < original.width]
+        targets = targets or [original.width]
+        for width in targets:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            for fmt, options in RENDITION_FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, **options)
+                yield width, fmt, buffer.getvalue()
+
+
+def generate_renditions(image, storage=default_storage):
+    """Render and store the renditions of a ``PropertyImage``.
+
+    Returns the ``{fmt: {width: name}}`` mapping stored on the image.
+    """
+    renditions = {}
+    with image.image.open("rb") as source:
+        for width, fmt, data in render(source):
+            name = rendition_name(image.image.name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            renditions.setdefault(fmt, {})[str(width)] = storage.save(
+                name, ContentFile(data)
+            )
+    return renditions
+
+
+def srcset(renditions, fmt, build_url=None, storage=default_storage):
+    """Return a srcset string for one format, e.g. ``"a.webp 320w, b.webp 640w"``."""
+    entries = sorted(
+        (int(width), name) for width, name in (renditions or {}).get(fmt, {}).items()
+    )
+    urls = [storage.url(name) for _, name in entries]
+    if build_url:
+        urls = [build_url(url) for url in urls]
+    return ", ".join(f"{url} {width}w" for url, (width, _) in zip(urls, entries))
+
+
+def best_rendition(renditions, width, fmt="jpeg"):
+    """Return the name of the smallest rendition at least ``width`` wide.
+
+    Falls back to the largest rendition, or None if none were generated.
+    """
+    sizes = sorted(
+        (int(size), name) for size, name in (renditions or {}).get(fmt, {}).items()
+    )
+    if not sizes:
+        return None
+    return next((name for size, name in sizes if size >= width), sizes[-1][1])
+
+
+def dhash(source):
+    """Return the 64-bit difference hash of an image as a signed integer.
+
+    The image is shrunk to 9x8 grayscale and each bit records whether a
+    pixel is brighter than its right neighbour, so re-encodes, resizes and
+    small edits of the same photo hash (nearly) identically.
+    """
+    with Image.open(source) as image:
+        # Lets the JPEG decoder skip most of the work for large photos
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+        pixels = list(small.getdata())
+
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    # Stored in a signed BIGINT column
+    return bits - (1 << 64) if bits >= 1 << 63 else bits
+
+
+def hamming(a, b):
+    """Return the number of differing bits between two hashes."""
+    return bin((a ^ b) & HASH_MASK).count("1")
+
+
+def hash_bands(value):
+    """Split a hash into position-tagged 16-bit bands for indexed lookup."""
+    unsigned = value & HASH_MASK
+    return [
+        (band << 16) | ((unsigned >> (16 * band)) & 0xFFFF)
+        for band in range(HASH_BANDS)
+    ]
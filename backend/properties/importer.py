@@ -0,0 +1,632 @@
+"""
+Bulk import of listings from CSV, JSON and MLS (RESO) feeds.
+
+Feeds are read as a stream of records and handled in chunks. Each chunk is
+validated column-wise with numpy, so a bad row costs a mask bit rather than
+a serializer run, and written with a handful of statements: one upsert of
+the listings keyed on ``(listed_by, listing_source, external_id)``, one
+insert of their feature rows and one of their price changes.
+``Property.save()`` and the model signals are bypassed, so the work they do
+is repeated here in bulk.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+import numpy as np
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.utils import timezone
+from analytics.tasks import refresh_listing_stats
+from favorites.tasks import match_listing_changes
+from .models import Feature, PriceChange, Property, PropertyType
+
+DEFAULT_CHUNK_SIZE = 5000
+READ_BLOCK_SIZE = 64 * 1024
+# Rejected rows kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# Past this many touched markets one full stats refresh is cheaper
+MARKET_REFRESH_LIMIT = 20
+
+TEXT_FIELDS = [
+    "external_id",
+    "title",
+    "description",
+    "address_line1",
+    "address_line2",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "virtual_tour_url",
+]
+REQUIRED_TEXT_FIELDS = ["external_id", "address_line1", "city", "state", "zip_code"]
+# Longer values would fail the whole chunk's insert; title is truncated instead
+TEXT_MAX_LENGTHS = {
+    field: Property._meta.get_field(field).max_length
+    for field in TEXT_FIELDS
+    if field != "title" and Property._meta.get_field(field).max_length
+}
+# field: (low, high, required, whole number); bounds follow the model columns
+NUMERIC_FIELDS = {
+    "price": (0.01, 9999999999.99, True, False),
+    "bedrooms": (0, 100, True, True),
+    "bathrooms": (0, 100, True, False),
+    "square_feet": (1, 10000000, True, True),
+    "half_bathrooms": (0, 100, False, True),
+    "lot_size": (0, 99999999.99, False, False),
+    "year_built": (1600, 2100, False, True),
+    "parking_spaces": (0, 1000, False, True),
+    "monthly_rent": (0, 99999999.99, False, False),
+    "hoa_fee": (0, 999999.99, False, False),
+    "latitude": (-90, 90, False, False),
+    "longitude": (-180, 180, False, False),
+}
+DECIMAL_PLACES = {
+    "price": 2,
+    "bathrooms": 1,
+    "lot_size": 2,
+    "monthly_rent": 2,
+    "hoa_fee": 2,
+}
+FLAG_FIELDS = ["has_air_conditioning", "has_heating", "pets_allowed", "furnished"]
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "furnished"}
+FEATURE_SEPARATORS = [";", "|"]
+
+# Columns written on every upsert. Ownership, counters and the cover photo
+# belong to the listing, not the feed, and are left alone on updates.
+UPDATE_FIELDS = (
+    TEXT_FIELDS[1:]
+    + list(NUMERIC_FIELDS)
+    + FLAG_FIELDS
+    + [
+        "property_type",
+        "status",
+        "listing_type",
+        "location",
+        "price_history",
+        "updated_at",
+    ]
+)
+
+# RESO Data Dictionary names for the fields we import
+RESO_FIELDS = {
+    "ListingId": "external_id",
+    "ListPrice": "price",
+    "BedroomsTotal": "bedrooms",
+    "BathroomsTotalInteger": "bathrooms",
+    "BathroomsHalf": "half_bathrooms",
+    "LivingArea": "square_feet",
+    "LotSizeSquareFeet": "lot_size",
+    "YearBuilt": "year_built",
+    "ParkingTotal": "parking_spaces",
+    "AssociationFee": "hoa_fee",
+    "UnparsedAddress": "address_line1",
+    "UnitNumber": "address_line2",
+    "City": "city",
+    "StateOrProvince": "state",
+    "PostalCode": "zip_code",
+    "Country": "country",
+    "Latitude": "latitude",
+    "Longitude": "longitude",
+    "PropertySubType": "property_type",
+    "PublicRemarks": "description",
+    "VirtualTourURLUnbranded": "virtual_tour_url",
+    "CoolingYN": "has_air_conditioning",
+    "HeatingYN": "has_heating",
+    "Furnished": "furnished",
+}
+RESO_STATUSES = {
+    "active": "available",
+    "comingsoon": "available",
+    "activeundercontract": "pending",
+    "pending": "pending",
+    "closed": "sold",
+    "canceled": "off_market",
+    "expired": "off_market",
+    "hold": "off_market",
+    "withdrawn": "off_market",
+}
+RESO_FEATURE_FIELDS = {
+    "InteriorFeatures": "Indoor",
+    "ExteriorFeatures": "Outdoor",
+    "CommunityFeatures": "Community",
+}
+
+
+class FeedError(Exception):
+    """A feed file that can't be read at all."""
+
+
+def read_records(stream, fmt):
+    """Yield one dict per listing from a binary feed stream.
+
+    CSV and JSON Lines are read a line at a time. A JSON array is decoded
+    one element at a time too; a RESO Web API page (``{"value": [...]}``)
+    is small enough to load whole.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(text)
+        elif fmt == "jsonl":
+            for number, line in enumerate(text, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        raise FeedError(f"Line {number} is not valid JSON: {exc}")
+        elif fmt == "json":
+            yield from _iter_json_array(text)
+        else:
+            raise FeedError(f"Unknown feed format '{fmt}'.")
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise FeedError(f"Feed can't be read: {exc}")
+
+
+def _iter_json_array(text):
+    """Decode the objects of a top-level JSON array without loading it all."""
+    decoder = json.JSONDecoder()
+    buffer = text.read(READ_BLOCK_SIZE).lstrip()
+    if buffer.startswith("{"):
+        try:
+            payload = json.loads(buffer + text.read())
+        except json.JSONDecodeError as exc:
+            raise FeedError(f"Feed is not valid JSON: {exc}")
+        records = payload.get("value")
+        if not isinstance(records, list):
+            raise FeedError('Expected a "value" array of listings.')
+        yield from records
+        return
+    if not buffer.startswith("["):
+        raise FeedError("Expected a JSON array of listings.")
+
+    position = 1
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            # Listings are objects, so a record cut off by the block
+            # boundary never decodes early
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            block = text.read(READ_BLOCK_SIZE)
+            if not block:
+                raise FeedError("JSON array is malformed or truncated.")
+            buffer, position = buffer[position:] + block, 0
+            continue
+        yield record
+        if position > READ_BLOCK_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+def from_reso(record):
+    """Translate a RESO Data Dictionary record into our field names."""
+    row = {field: record[name] for name, field in RESO_FIELDS.items() if name in record}
+    if not row.get("external_id"):
+        row["external_id"] = record.get("ListingKey")
+    status = str(record.get("StandardStatus") or "").replace(" ", "").lower()
+    if status:
+        row["status"] = RESO_STATUSES.get(status, status)
+    lease = "lease" in str(record.get("PropertyType") or "").lower()
+    row["listing_type"] = "rent" if lease else "sale"
+    if lease and record.get("ListPrice") not in (None, ""):
+        row["monthly_rent"] = record["ListPrice"]
+    pets = record.get("PetsAllowed")
+    if pets:
+        # e.g. ["Cats OK", "Dogs OK"] or ["No"]
+        row["pets_allowed"] = {name.lower() for name in _split_list(pets)} != {"no"}
+    row["features"] = [
+        (name, category)
+        for field, category in RESO_FEATURE_FIELDS.items()
+        for name in _split_list(record.get(field))
+    ]
+    return row
+
+
+def _split_list(value):
+    """Return a list of names from a JSON list or a delimited string."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    value = str(value)
+    for separator in FEATURE_SEPARATORS:
+        value = value.replace(separator, ",")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _to_float(value):
+    """Parse one messy number such as ``"$1,250"``; NaN if it isn't one."""
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return np.nan
+
+
+def numeric_column(values):
+    """Parse a column into ``(float64 array, blank mask)``.
+
+    Clean columns, the usual case, are converted by numpy in one call;
+    blanks become NaN. Only a column containing junk falls back to parsing
+    value by value.
+    """
+    blank = np.array([value is None or value == "" for value in values], dtype=bool)
+    cleaned = [np.nan if is_blank else value for value, is_blank in zip(values, blank)]
+    try:
+        column = np.asarray(cleaned, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.array([_to_float(value) for value in cleaned], dtype=np.float64)
+    return column, blank
+
+
+def validate(rows):
+    """Check a chunk of rows column-wise.
+
+    Returns ``(columns, valid, reasons)``: the parsed numeric columns, a
+    boolean mask of acceptable rows and the rejection reason of each row
+    that isn't.
+    """
+    count = len(rows)
+    valid = np.ones(count, dtype=bool)
+    reasons = np.full(count, "", dtype=object)
+
+    def reject(mask, message):
+        mask = mask & valid
+        reasons[mask] = message
+        valid[mask] = False
+
+    for field in REQUIRED_TEXT_FIELDS:
+        reject(
+            np.array([not _text(row.get(field)) for row in rows], dtype=bool),
+            f"{field} is required",
+        )
+    for field, max_length in TEXT_MAX_LENGTHS.items():
+        lengths = np.fromiter(
+            (len(_text(row.get(field))) for row in rows), dtype=np.int64, count=count
+        )
+        reject(lengths > max_length, f"{field} is longer than {max_length} characters")
+
+    columns = {}
+    with np.errstate(invalid="ignore"):
+        for field, (low, high, required, whole) in NUMERIC_FIELDS.items():
+            column, blank = numeric_column([row.get(field) for row in rows])
+            missing = np.isnan(column)
+            reject(missing & ~blank, f"{field} is not a number")
+            if required:
+                reject(blank, f"{field} is required")
+            reject((column < low) | (column > high), f"{field} is out of range")
+            if whole:
+                reject(
+                    ~missing & (column != np.floor(column)),
+                    f"{field} must be a whole number",
+                )
+            columns[field] = column
+
+    reject(
+        np.isnan(columns["latitude"]) != np.isnan(columns["longitude"]),
+        "latitude and longitude must be given together",
+    )
+
+    # Blank means the model default
+    statuses = {value for value, _ in Property.STATUS_CHOICES} | {""}
+    listing_types = {value for value, _ in Property.LISTING_TYPE_CHOICES} | {""}
+    reject(
+        np.array(
+            [_text(row.get("status")) not in statuses for row in rows],
+            dtype=bool,
+        ),
+        "status is not a known status",
+    )
+    reject(
+        np.array(
+            [_text(row.get("listing_type")) not in listing_types for row in rows],
+            dtype=bool,
+        ),
+        "listing_type is not a known listing type",
+    )
+    return columns, valid, reasons
+
+
+def _python_values(field, column):
+    """Convert a validated numeric column to model values, None for NaN."""
+    places = DECIMAL_PLACES.get(field)
+    if field in ("latitude", "longitude"):
+        convert = float
+    elif places is None:
+        convert = int
+    else:
+        convert = lambda value: Decimal(f"{value:.{places}f}")  # noqa: E731
+    return [None if value != value else convert(value) for value in column.tolist()]
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return _text(value).lower() in TRUE_VALUES
+
+
+class PropertyImporter:
+    """Upsert listings from a feed in chunks.
+
+    ``source`` namespaces the feed's listing ids, so two feeds may reuse the
+    same ids. Listings are owned by ``listed_by`` and only ever matched
+    against that agent's own listings, so another agent importing under the
+    same source name creates separate listings. With ``notify`` off,
+    saved searches aren't matched against the imported listings, which is
+    what you want when loading a feed for the first time.
+    """
+
+    def __init__(
+        self,
+        listed_by,
+        source,
+        schema="native",
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        notify=True,
+    ):
+        self.listed_by = listed_by
+        self.source = source
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.notify = notify
+        self.processed = self.created = self.updated = self.skipped = 0
+        self.errors = []
+        self.markets = set()
+        self.property_types = {}
+        for type_id, name in PropertyType.objects.order_by("id").values_list(
+            "id", "name"
+        ):
+            self.property_types.setdefault(name.lower(), type_id)
+        self.features = {}
+        for feature_id, name in Feature.objects.order_by("id").values_list(
+            "id", "name"
+        ):
+            self.features.setdefault(name.lower(), feature_id)
+
+    def run(self, records, progress=None):
+        """Import every record; ``progress(importer)`` is called per chunk."""
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(self)
+        if chunk:
+            self.import_chunk(chunk)
+            if progress:
+                progress(self)
+        self.refresh_stats()
+        return self
+
+    def import_chunk(self, records):
+        """Validate and write one chunk of raw feed records."""
+        first_row = self.processed + 1
+        self.processed += len(records)
+        # e.g. a JSON array of numbers; checked as empty rows, then rejected
+        not_objects = [
+            index for index, record in enumerate(records) if not isinstance(record, dict)
+        ]
+        records = [record if isinstance(record, dict) else {} for record in records]
+        rows = (
+            [from_reso(record) for record in records]
+            if self.schema == "reso"
+            else records
+        )
+        columns, valid, reasons = validate(rows)
+        valid[not_objects] = False
+        reasons[not_objects] = "record is not an object"
+
+        # The last occurrence of a listing id in the chunk wins
+        seen = set()
+        for index in reversed(np.flatnonzero(valid).tolist()):
+            external_id = _text(rows[index].get("external_id"))
+            if external_id in seen:
+                valid[index] = False
+                reasons[index] = "duplicate external_id; a later row replaces it"
+            seen.add(external_id)
+
+        for index in np.flatnonzero(~valid).tolist():
+            self.skipped += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(
+                    {
+                        "row": first_row + index,
+                        "external_id": _text(rows[index].get("external_id")),
+                        "error": reasons[index],
+                    }
+                )
+
+        keep = np.flatnonzero(valid)
+        if len(keep):
+            property_types, features = dict(self.property_types), dict(self.features)
+            try:
+                with transaction.atomic():
+                    self._write(
+                        [rows[index] for index in keep.tolist()],
+                        {field: column[keep] for field, column in columns.items()},
+                    )
+            except Exception:
+                # Types and features created by the rolled-back chunk are gone
+                self.property_types, self.features = property_types, features
+                raise
+
+    def _type_id(self, name):
+        """Return the id of a property type by name, creating it if needed."""
+        name = _text(name) or "Other"
+        key = name.lower()
+        if key not in self.property_types:
+            self.property_types[key] = PropertyType.objects.create(name=name[:100]).pk
+        return self.property_types[key]
+
+    def _create_features(self, entries):
+        """Create the features named in ``entries`` that don't exist yet."""
+        missing = {}
+        for name, category in entries:
+            if name.lower() not in self.features:
+                missing.setdefault(name.lower(), Feature(name=name, category=category))
+        for feature in Feature.objects.bulk_create(missing.values()):
+            self.features[feature.name.lower()] = feature.pk
+
+    def _write(self, rows, columns):
+        """Upsert one validated chunk and everything derived from it."""
+        now = timezone.now()
+        today = timezone.localdate()
+        external_ids = [_text(row["external_id"]) for row in rows]
+        existing = {
+            external_id: rest
+            for external_id, *rest in Property.objects.filter(
+                listed_by=self.listed_by,
+                listing_source=self.source,
+                external_id__in=external_ids,
+            ).values_list(
+                "external_id",
+                "price",
+                "status",
+                "city",
+                "state",
+                "price_history",
+                "latitude",
+                "longitude",
+                "location",
+            )
+        }
+        values = {
+            field: _python_values(field, column) for field, column in columns.items()
+        }
+
+        feature_entries = {}
+        for index, row in enumerate(rows):
+            if "features" in row:
+                entries = (
+                    row["features"]
+                    if self.schema == "reso"
+                    else [(name, "Other") for name in _split_list(row["features"])]
+                )
+                feature_entries[index] = [
+                    (name[:100], category) for name, category in entries
+                ]
+        self._create_features(
+            entry for entries in feature_entries.values() for entry in entries
+        )
+
+        listings, price_changes, match_kinds = [], [], []
+        for index, row in enumerate(rows):
+            external_id = external_ids[index]
+            fields = {field: values[field][index] for field in NUMERIC_FIELDS}
+            for field in TEXT_FIELDS[1:]:
+                fields[field] = _text(row.get(field))
+            for field in FLAG_FIELDS:
+                fields[field] = _flag(row.get(field))
+            fields["country"] = fields["country"] or "United States"
+            fields["title"] = (
+                fields["title"] or f"{fields['address_line1']}, {fields['city']}"
+            )[:255]
+            fields["status"] = _text(row.get("status")) or "available"
+            fields["listing_type"] = _text(row.get("listing_type")) or "sale"
+            for field in ["half_bathrooms", "parking_spaces"]:
+                fields[field] = fields[field] or 0
+            if fields["latitude"] is not None:
+                fields["location"] = Point(fields["longitude"], fields["latitude"])
+
+            previous = existing.get(external_id)
+            kinds, history = [], []
+            if previous is None:
+                kinds.append("new_listing")
+                change = PriceChange(
+                    date=today, price=fields["price"], change_reason="Initial listing"
+                )
+            else:
+                old_price, old_status, old_city, old_state, history, *coordinates = (
+                    previous
+                )
+                history = list(history or [])
+                # Many feeds omit coordinates; keep the ones already stored
+                if fields["latitude"] is None:
+                    fields["latitude"], fields["longitude"], fields["location"] = (
+                        coordinates
+                    )
+                self.markets.add((old_city, old_state))
+                change = None
+                if old_price != fields["price"]:
+                    kinds.append("price_change")
+                    change = PriceChange(
+                        date=today,
+                        price=fields["price"],
+                        previous_price=old_price,
+                        change_reason="Price change",
+                    )
+                if old_status != fields["status"]:
+                    kinds.append("status_change")
+            if change is not None:
+                history.append(change.as_summary())
+                price_changes.append((index, change))
+            self.markets.add((fields["city"], fields["state"]))
+
+            listings.append(
+                Property(
+                    listing_source=self.source,
+                    external_id=external_id,
+                    property_type_id=self._type_id(row.get("property_type")),
+                    listed_by=self.listed_by,
+                    published_at=now,
+                    price_history=history[-Property.PRICE_HISTORY_SUMMARY_SIZE :],
+                    **fields,
+                )
+            )
+            match_kinds.append(kinds)
+
+        Property.objects.bulk_create(
+            listings,
+            update_conflicts=True,
+            unique_fields=["listed_by", "listing_source", "external_id"],
+            update_fields=UPDATE_FIELDS,
+        )
+        self.created += sum(1 for kinds in match_kinds if "new_listing" in kinds)
+        self.updated += sum(1 for kinds in match_kinds if "new_listing" not in kinds)
+
+        for index, change in price_changes:
+            change.property_id = listings[index].pk
+        PriceChange.objects.bulk_create([change for _, change in price_changes])
+
+        # Feeds list a listing's full feature set, so replace the links
+        PropertyFeature = Property.features.through
+        PropertyFeature.objects.filter(
+            property_id__in=[listings[index].pk for index in feature_entries]
+        ).delete()
+        PropertyFeature.objects.bulk_create(
+            {
+                (listings[index].pk, self.features[name.lower()]): PropertyFeature(
+                    property_id=listings[index].pk,
+                    feature_id=self.features[name.lower()],
+                )
+                for index, entries in feature_entries.items()
+                for name, _ in entries
+            }.values()
+        )
+
+        changes = [
+            [listing.pk, kinds]
+            for listing, kinds in zip(listings, match_kinds)
+            if kinds
+        ]
+        if self.notify and changes:
+            transaction.on_commit(lambda: match_listing_changes.delay(changes))
+
+    def refresh_stats(self):
+        """Queue listing stats refreshes for the markets the import touched."""
+        if len(self.markets) > MARKET_REFRESH_LIMIT:
+            refresh_listing_stats.delay()
+        else:
+            for city, state in self.markets:
+                refresh_listing_stats.delay(city, state)
+        self.markets = set()
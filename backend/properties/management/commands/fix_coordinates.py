@@ -3,9 +3,10 @@ Management command to fix invalid property coordinates.
 """
 
 import random
+import time
 from django.core.management.base import BaseCommand
-from django.db import models, transaction
-from django.contrib.gis.geos import Point
+from django.db import models
+from properties.geo import relocate_to_cities
 from properties.models import Property
 
 
@@ -28,6 +29,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Also fix properties with valid global coordinates but outside US range",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Properties updated per batch",
+        )
+        parser.add_argument(
+            "--after",
+            type=int,
+            help="Resume after this property id (the last one reported)",
+        )
 
     def handle(self, *args, **options):
         # Define realistic coordinate ranges for major US cities
@@ -165,51 +177,25 @@ class Command(BaseCommand):
 
             return
 
-        # Fix the coordinates
-        updated_count = 0
-        failed_count = 0
-
-        # Use transaction to ensure all updates succeed or fail together
-        with transaction.atomic():
-            for prop in invalid_properties:
-                try:
-                    # Pick a random US city for realistic coordinates
-                    city = random.choice(us_cities)
-
-                    # Generate random coordinates within the city bounds
-                    new_lat = random.uniform(*city["lat_range"])
-                    new_lng = random.uniform(*city["lng_range"])
-
-                    # Update the property's lat/lng fields
-                    prop.latitude = new_lat
-                    prop.longitude = new_lng
-
-                    # Update the Point field to ensure GIS functionality works
-                    prop.location = Point(
-                        new_lng, new_lat
-                    )  # Note: Point takes (x,y) which is (longitude,latitude)
-                    prop.save()
-
-                    updated_count += 1
-
-                    if updated_count % 50 == 0:
-                        self.stdout.write(f"Updated {updated_count} properties...")
+        # Fix the coordinates, one bulk_update per chunk of ids
+        started = time.monotonic()
 
-                except Exception as e:
-                    failed_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(f"Error updating property {prop.id}: {str(e)}")
-                    )
-
-        if failed_count > 0:
+        def report(updated, last_id):
             self.stdout.write(
-                self.style.WARNING(
-                    f"Updated {updated_count} properties with valid coordinates, but {failed_count} properties failed to update."
-                )
+                f"Updated {updated} properties up to id {last_id} "
+                f"(resume with --after {last_id})..."
             )
-        else:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully updated all {updated_count} properties with valid coordinates"
-                )
+
+        updated_count = relocate_to_cities(
+            invalid_properties,
+            us_cities,
+            options["chunk_size"],
+            after=options["after"],
+            progress=report,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully updated all {updated_count} properties with valid coordinates "
+                f"in {time.monotonic() - started:.1f}s"
             )
+        )
@@ -4,9 +4,10 @@ Management command to fix invalid property coordinates.
 
 from django.core.management.base import BaseCommand
 from django.db import models
+from properties.geo import relocate_to_cities
 from properties.models import Property
-from django.contrib.gis.geos import Point
 import random
+import time
 
 
 class Command(BaseCommand):
@@ -18,6 +19,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Show what would be fixed without making changes",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Properties updated per batch",
+        )
+        parser.add_argument(
+            "--after",
+            type=int,
+            help="Resume after this property id (the last one reported)",
+        )
 
     def handle(self, *args, **options):
         # Define realistic coordinate ranges for major US cities
@@ -107,28 +119,25 @@ class Command(BaseCommand):
                 )
             return
 
-        # Fix the coordinates
-        fixed_count = 0
-        for prop in invalid_properties:
-            city = random.choice(us_cities)
+        # Fix the coordinates, one bulk_update per chunk of ids
+        started = time.monotonic()
 
-            # Generate random coordinates within the city bounds
-            new_lat = random.uniform(*city["lat_range"])
-            new_lng = random.uniform(*city["lng_range"])
-
-            # Update the property
-            prop.latitude = new_lat
-            prop.longitude = new_lng
-            prop.location = Point(new_lng, new_lat)  # Point(longitude, latitude)
-            prop.save()
-
-            fixed_count += 1
+        def report(updated, last_id):
             self.stdout.write(
-                f"Fixed Property {prop.id}: {city['name']} -> {new_lat:.6f}, {new_lng:.6f}"
+                f"Fixed {updated} properties up to id {last_id} "
+                f"(resume with --after {last_id})..."
             )
 
+        fixed_count = relocate_to_cities(
+            invalid_properties,
+            us_cities,
+            options["chunk_size"],
+            after=options["after"],
+            progress=report,
+        )
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully updated {fixed_count} properties with valid US coordinates"
+                f"Successfully updated {fixed_count} properties with valid US coordinates "
+                f"in {time.monotonic() - started:.1f}s"
             )
         )
@@ -0,0 +1,38 @@
+"""
+Management command to queue rendition generation for stored property images.
+"""
+
+from django.core.management.base import BaseCommand
+from properties.models import PropertyImage
+from properties.tasks import generate_image_renditions
+
+
+class Command(BaseCommand):
+    """
+    Queues a rendition task for every uploaded image that has none yet.
+    """
+
+    help = "Queue WebP/JPEG rendition generation for property images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render images that already have renditions",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run the command.
+        """
+        images = PropertyImage.objects.exclude(image="").exclude(
+            image__startswith="http"
+        )
+        if not options["all"]:
+            images = images.filter(renditions={})
+
+        queued = 0
+        for image_id in images.values_list("id", flat=True).iterator(chunk_size=2000):
+            generate_image_renditions.delay(image_id)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} images"))
@@ -0,0 +1,70 @@
+"""
+Management command to look up coordinates for listings that only have an address.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from properties.geocoding import DEFAULT_BATCH_SIZE, Geocoder
+from properties.models import Property
+
+
+class Command(BaseCommand):
+    """
+    Geocodes listings without coordinates in batches, answering repeated
+    addresses from the geocoding cache.
+    """
+
+    help = "Geocode listings that have an address but no coordinates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            help="Only listings imported from this feed",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Listings looked up per round",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Lookups in flight at once (default: GEOCODING_CONCURRENCY)",
+        )
+        parser.add_argument(
+            "--provider",
+            help="Provider class path (default: GEOCODING_PROVIDER)",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run the command.
+        """
+        started = time.monotonic()
+        provider = None
+        if options["provider"]:
+            provider = import_string(options["provider"])(
+                concurrency=options["concurrency"]
+            )
+        geocoder = Geocoder(provider=provider, concurrency=options["concurrency"])
+
+        queryset = Property.objects.all()
+        if options["source"]:
+            queryset = queryset.filter(listing_source=options["source"])
+        updated = geocoder.geocode_listings(queryset, batch_size=options["batch_size"])
+
+        if geocoder.failed:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{geocoder.failed} lookups failed and will be retried next run"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Geocoded {updated} listings ({geocoder.cached} addresses from "
+                f"the cache, {geocoder.looked_up} looked up) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,156 @@
+"""
+Management command to compute perceptual hashes for stored property images
+and link duplicate photos to the earliest upload.
+"""
+
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from config.db import close_connections_before_fork, id_ranges
+from properties.images import (
+    DUPLICATE_DISTANCE,
+    dhash,
+    hamming,
+    hash_bands,
+    is_external,
+)
+from properties.models import PropertyImage
+
+
+def _init_worker():
+    """Set up Django in spawned worker processes (a no-op after fork)."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def hash_id_range(start_id, end_id, rehash=False):
+    """Hash stored images with ``start_id <= id < end_id``; used by workers."""
+    from django.db import connection
+
+    images = PropertyImage.objects.filter(id__gte=start_id, id__lt=end_id).exclude(
+        image=""
+    )
+    if not rehash:
+        images = images.filter(phash__isnull=True)
+
+    hashed = []
+    for image in images.only("id", "image"):
+        if is_external(image.image):
+            continue
+        try:
+            with image.image.open("rb") as source:
+                image.phash = dhash(source)
+        except OSError:
+            # Missing or unreadable file; leave it unhashed
+            continue
+        image.phash_bands = hash_bands(image.phash)
+        hashed.append(image)
+    PropertyImage.objects.bulk_update(hashed, ["phash", "phash_bands"], batch_size=1000)
+    connection.close()
+    return len(hashed)
+
+
+def link_duplicates(rows):
+    """Map each duplicate image id to the earliest image it matches.
+
+    ``rows`` are ``(id, phash)`` pairs. Only images sharing a hash band are
+    compared, which is enough to find every pair within
+    ``DUPLICATE_DISTANCE`` bits.
+    """
+    buckets = defaultdict(list)
+    for image_id, phash in sorted(rows):
+        for band in hash_bands(phash):
+            buckets[band].append((image_id, phash))
+
+    parents = {}
+
+    def find(image_id):
+        while parents.get(image_id, image_id) != image_id:
+            image_id = parents[image_id]
+        return image_id
+
+    for members in buckets.values():
+        for index, (image_id, phash) in enumerate(members):
+            for earlier_id, earlier_hash in members[:index]:
+                if hamming(phash, earlier_hash) <= DUPLICATE_DISTANCE:
+                    # Union by smallest id so the root is the earliest upload
+                    root, other = sorted([find(image_id), find(earlier_id)])
+                    if root != other:
+                        parents[other] = root
+
+    return {image_id: find(image_id) for image_id in parents}
+
+
+class Command(BaseCommand):
+    help = "Compute perceptual hashes for property images and link duplicates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Image id span handled by each task",
+        )
+        parser.add_argument(
+            "--rehash",
+            action="store_true",
+            help="Recompute hashes for images that already have one",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        bounds = PropertyImage.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            self.stdout.write(self.style.WARNING("No images to hash"))
+            return
+        ranges = id_ranges(bounds["min_id"], bounds["max_id"], options["chunk_size"])
+
+        hashed = 0
+        if options["workers"] <= 1:
+            for start, end in ranges:
+                hashed += hash_id_range(start, end, options["rehash"])
+        else:
+            # Forked children must not share the parent's database socket
+            close_connections_before_fork()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            ) as pool:
+                futures = [
+                    pool.submit(hash_id_range, start, end, options["rehash"])
+                    for start, end in ranges
+                ]
+                for done, future in enumerate(as_completed(futures), 1):
+                    hashed += future.result()
+                    if done % 10 == 0:
+                        self.stdout.write(f"Hashed {hashed} images...")
+
+        rows = PropertyImage.objects.filter(phash__isnull=False).values_list(
+            "id", "phash"
+        )
+        originals = link_duplicates(rows.iterator(chunk_size=10000))
+        PropertyImage.objects.bulk_update(
+            [
+                PropertyImage(id=image_id, duplicate_of_id=original_id)
+                for image_id, original_id in originals.items()
+            ],
+            ["duplicate_of"],
+            batch_size=1000,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Hashed {hashed} images and found {len(originals)} duplicates "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
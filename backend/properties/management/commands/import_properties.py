@@ -0,0 +1,119 @@
+"""
+Management command to bulk import listings from a CSV, JSON or MLS feed file.
+"""
+
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from properties.importer import (
+    DEFAULT_CHUNK_SIZE,
+    FeedError,
+    PropertyImporter,
+    read_records,
+)
+from users.models import User
+
+FORMATS_BY_EXTENSION = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+class Command(BaseCommand):
+    """
+    Streams a feed file into the database in chunks, upserting listings by
+    their id in the feed.
+    """
+
+    help = "Bulk import or update listings from a CSV, JSON or MLS (RESO) feed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file to import")
+        parser.add_argument(
+            "--source",
+            required=True,
+            help="Feed name; listing ids are unique per source",
+        )
+        parser.add_argument(
+            "--agent",
+            required=True,
+            help="Email of the agent who will own new listings",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json", "jsonl"],
+            help="Feed format (default: guessed from the file extension)",
+        )
+        parser.add_argument(
+            "--schema",
+            choices=["native", "reso"],
+            default="native",
+            help="Field names used by the feed: ours or RESO Data Dictionary",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Listings validated and written per batch",
+        )
+        parser.add_argument(
+            "--no-notify",
+            action="store_true",
+            help="Don't match imported listings against saved searches",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run the command.
+        """
+        path = options["path"]
+        fmt = options["format"] or FORMATS_BY_EXTENSION.get(
+            os.path.splitext(path)[1].lower()
+        )
+        if fmt is None:
+            raise CommandError("Can't tell the feed format; pass --format")
+        agent = User.objects.filter(email=options["agent"]).first()
+        if agent is None:
+            raise CommandError(f"No user with email {options['agent']}")
+
+        started = time.monotonic()
+
+        def report(importer):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Processed {importer.processed} listings "
+                f"({importer.processed / max(elapsed, 0.001):.0f}/s)..."
+            )
+
+        importer = PropertyImporter(
+            agent,
+            options["source"],
+            schema=options["schema"],
+            chunk_size=options["chunk_size"],
+            notify=not options["no_notify"],
+        )
+        try:
+            with open(path, "rb") as feed:
+                importer.run(read_records(feed, fmt), progress=report)
+        except FeedError as exc:
+            importer.refresh_stats()
+            raise CommandError(
+                f"{exc} ({importer.processed} listings were processed first)"
+            )
+
+        for error in importer.errors:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Row {error['row']} ({error['external_id'] or 'no id'}): "
+                    f"{error['error']}"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {importer.created}, updated {importer.updated} and "
+                f"skipped {importer.skipped} listings "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
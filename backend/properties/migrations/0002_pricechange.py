@@ -0,0 +1,72 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:20
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SUMMARY_SIZE = 10
+
+
+def explode_price_history(apps, schema_editor):
+    """Copy every JSON price_history entry into PriceChange rows."""
+    Property = apps.get_model('properties', 'Property')
+    PriceChange = apps.get_model('properties', 'PriceChange')
+
+    batch = []
+    listings = Property.objects.exclude(price_history__isnull=True).only('id', 'price_history')
+    for prop in listings.iterator(chunk_size=2000):
+        entries = []
+        for entry in prop.price_history or []:
+            try:
+                date = datetime.date.fromisoformat(str(entry['date'])[:10])
+                price = Decimal(str(entry['price']))
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                continue
+            entries.append((date, price, str(entry.get('change_reason', ''))[:255]))
+        entries.sort(key=lambda entry: entry[0])
+
+        previous = None
+        for date, price, reason in entries:
+            batch.append(PriceChange(
+                property_id=prop.id, date=date, price=price,
+                previous_price=previous, change_reason=reason,
+            ))
+            previous = price
+        if len(batch) >= 5000:
+            PriceChange.objects.bulk_create(batch)
+            batch = []
+
+        if len(prop.price_history or []) > SUMMARY_SIZE:
+            Property.objects.filter(pk=prop.pk).update(
+                price_history=prop.price_history[-SUMMARY_SIZE:]
+            )
+    PriceChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('previous_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('change_reason', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='properties.property')),
+            ],
+            options={
+                'ordering': ['date', 'id'],
+                'indexes': [models.Index(fields=['property', 'date'], name='properties__propert_4b9320_idx'), models.Index(fields=['date'], name='properties__date_a9faa9_idx')],
+            },
+        ),
+        migrations.RunPython(explode_price_history, migrations.RunPython.noop),
+    ]
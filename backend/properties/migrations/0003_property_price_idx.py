@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_pricechange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price'], name='properties__price_32e7c2_idx'),
+        ),
+    ]
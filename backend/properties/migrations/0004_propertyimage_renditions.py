@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_property_price_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
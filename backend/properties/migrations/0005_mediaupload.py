@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:20
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_propertyimage_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('image', 'Image'), ('document', 'Document')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('finalizing', 'Finalizing'), ('complete', 'Complete'), ('failed', 'Failed')], default='uploading', max_length=20)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('document_type', models.CharField(blank=True, max_length=100)),
+                ('caption', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='properties.propertydocument')),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='properties.propertyimage')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_uploads', to='properties.property')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:05
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_mediaupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='phash',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='phash_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='properties.propertyimage'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phash_bands'], name='properties__phash_b_4f5943_gin'),
+        ),
+    ]
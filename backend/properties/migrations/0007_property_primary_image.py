@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_primary_images(apps, schema_editor):
+    """Point every property at its flagged or first image in one UPDATE."""
+    Property = apps.get_model('properties', 'Property')
+    PropertyImage = apps.get_model('properties', 'PropertyImage')
+    first_image = (
+        PropertyImage.objects.filter(property=models.OuterRef('pk'))
+        .order_by('-is_primary', 'order', 'id')
+        .values('pk')[:1]
+    )
+    Property.objects.update(primary_image=models.Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_propertyimage_phash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='properties.propertyimage'),
+        ),
+        migrations.RunPython(backfill_primary_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_property_external_id_propertyimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataQualityScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rules', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('scanned_count', models.PositiveIntegerField(default=0)),
+                ('violation_count', models.PositiveIntegerField(default=0)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DataQualityViolation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(max_length=50)),
+                ('message', models.CharField(max_length=255)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quality_violations', to='properties.property')),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='violations', to='properties.dataqualityscan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scan', 'rule'], name='properties__scan_id_c9b4c5_idx')],
+            },
+        ),
+    ]
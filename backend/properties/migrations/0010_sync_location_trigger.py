@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:40
+
+from django.db import migrations
+
+# Shared by every table with location + latitude/longitude columns (see
+# neighborhoods 0004). Mirrors Property.save(): latitude/longitude win when
+# both are set, otherwise the point fills them in; an UPDATE that only moves
+# the point carries it over to the coordinates.
+SYNC_FUNCTION = '''
+CREATE OR REPLACE FUNCTION sync_point_coordinates() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.latitude IS NOT DISTINCT FROM OLD.latitude
+        AND NEW.longitude IS NOT DISTINCT FROM OLD.longitude
+        AND NEW.location IS DISTINCT FROM OLD.location THEN
+        NEW.latitude := ST_Y(NEW.location);
+        NEW.longitude := ST_X(NEW.location);
+    ELSIF NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL THEN
+        NEW.location := ST_SetSRID(ST_MakePoint(NEW.longitude, NEW.latitude), 4326);
+    ELSIF NEW.location IS NOT NULL THEN
+        NEW.latitude := ST_Y(NEW.location);
+        NEW.longitude := ST_X(NEW.location);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+
+def sync_trigger_sql(table):
+    """Backfill ``table`` and attach the trigger; returns ``(sql, reverse_sql)``."""
+    sql = [
+        f'''
+        UPDATE {table}
+        SET location = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            AND (location IS NULL OR ST_X(location) <> longitude OR ST_Y(location) <> latitude)
+        ''',
+        f'''
+        UPDATE {table}
+        SET latitude = ST_Y(location), longitude = ST_X(location)
+        WHERE location IS NOT NULL AND (latitude IS NULL OR longitude IS NULL)
+        ''',
+        f'''
+        CREATE TRIGGER {table}_sync_location
+        BEFORE INSERT OR UPDATE OF latitude, longitude, location ON {table}
+        FOR EACH ROW EXECUTE FUNCTION sync_point_coordinates()
+        ''',
+    ]
+    reverse_sql = f'DROP TRIGGER IF EXISTS {table}_sync_location ON {table}'
+    return sql, reverse_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_dataqualityscan_dataqualityviolation'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            SYNC_FUNCTION,
+            reverse_sql='DROP FUNCTION IF EXISTS sync_point_coordinates()',
+        ),
+        migrations.RunSQL(*sync_trigger_sql('properties_property')),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:20
+
+import decimal
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_geocodedaddress'),
+    ]
+
+    operations = [
+        # A plain column can't be turned into a generated one in place; the
+        # values are recomputed from price and square_feet
+        migrations.RemoveField(
+            model_name='property',
+            name='price_per_sqft',
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='price_per_sqft',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('price__lt', models.F('square_feet') * decimal.Decimal('999999')), ('square_feet__gt', 0)), then=django.db.models.functions.math.Round(models.F('price') / models.F('square_feet'), 2)), output_field=models.DecimalField(decimal_places=2, max_digits=8)), output_field=models.DecimalField(decimal_places=2, max_digits=8)),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='price_per_bedroom',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('bedrooms__gt', 0)), then=django.db.models.functions.math.Round(models.F('price') / models.F('bedrooms'), 2)), output_field=models.DecimalField(decimal_places=2, max_digits=12)), output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='monthly_cost',
+            field=models.GeneratedField(db_persist=True, expression=models.F('monthly_rent') + django.db.models.functions.comparison.Coalesce(models.F('hoa_fee'), models.Value(decimal.Decimal('0'))), output_field=models.DecimalField(decimal_places=2, max_digits=11)),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price_per_sqft'], name='properties__price_p_7cc742_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price_per_bedroom'], name='properties__price_p_4b98e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['monthly_cost'], name='properties__monthly_043ff9_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0012_property_value_metrics'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(
+                django.db.models.functions.text.Lower('city'),
+                django.db.models.functions.text.Lower('state'),
+                name='property_market_idx',
+            ),
+        ),
+    ]
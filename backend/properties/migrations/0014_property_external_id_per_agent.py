@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0013_property_market_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='property',
+            name='unique_property_external_id',
+        ),
+        migrations.AddConstraint(
+            model_name='property',
+            constraint=models.UniqueConstraint(fields=('listed_by', 'listing_source', 'external_id'), name='unique_property_external_id'),
+        ),
+    ]
@@ -2,8 +2,17 @@
 Models for property listings in DreamDwelling.
 """
 
-from django.db import models
+import os
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower, Round
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
 from users.models import User
 
 
@@ -75,13 +84,43 @@ class Property(models.Model):
 
     # Pricing
     price = models.DecimalField(max_digits=12, decimal_places=2)
-    price_per_sqft = models.DecimalField(
-        max_digits=8, decimal_places=2, blank=True, null=True
-    )
     monthly_rent = models.DecimalField(
         max_digits=10, decimal_places=2, blank=True, null=True
     )
     hoa_fee = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+    # Value metrics, computed by the database on every write (bulk ones
+    # included) so they can be indexed, filtered and sorted on
+    price_per_sqft = models.GeneratedField(
+        expression=models.Case(
+            # Past 999,999 the ratio is junk data and wouldn't fit
+            models.When(
+                square_feet__gt=0,
+                price__lt=models.F("square_feet") * Decimal("999999"),
+                then=Round(models.F("price") / models.F("square_feet"), 2),
+            ),
+            output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        ),
+        output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        db_persist=True,
+    )
+    price_per_bedroom = models.GeneratedField(
+        expression=models.Case(
+            models.When(
+                bedrooms__gt=0,
+                then=Round(models.F("price") / models.F("bedrooms"), 2),
+            ),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
+    # Rent plus HOA fee; listings without a rent have none
+    monthly_cost = models.GeneratedField(
+        expression=models.F("monthly_rent")
+        + Coalesce(models.F("hoa_fee"), models.Value(Decimal("0"))),
+        output_field=models.DecimalField(max_digits=11, decimal_places=2),
+        db_persist=True,
+    )
 
     # Property Details
     bedrooms = models.PositiveSmallIntegerField()
@@ -105,6 +144,16 @@ class Property(models.Model):
     listed_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="listed_properties"
     )
+    # Denormalized cover photo so list and map views need no image queries;
+    # maintained by PropertyImage.save, a post_delete signal (bulk deletes
+    # included) and refresh_primary_images()
+    primary_image = models.ForeignKey(
+        "PropertyImage",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(blank=True, null=True)
@@ -114,19 +163,47 @@ class Property(models.Model):
     # Virtual Tour
     virtual_tour_url = models.URLField(blank=True)
 
+    # Feed identity for bulk imports: ``external_id`` is the listing id in
+    # the ``listing_source`` feed, scoped to the agent who imported it, so
+    # nobody can overwrite another agent's listings by reusing their feed
+    # name. Listings created by hand leave it null.
+    listing_source = models.CharField(max_length=50, blank=True)
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+
     # History
-    # Replaced ArrayField with JSONField for SQLite compatibility
+    # Compact summary of the most recent price changes; the full, indexed
+    # history lives in PriceChange. Use record_price_change() to append.
     price_history = models.JSONField(default=list, blank=True, null=True)
 
+    PRICE_HISTORY_SUMMARY_SIZE = 10
+
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["price"]),
+            models.Index(fields=["price_per_sqft"]),
+            models.Index(fields=["price_per_bedroom"]),
+            models.Index(fields=["monthly_cost"]),
+            # Case-insensitive market lookups (analytics.ListingStats.refresh)
+            models.Index(Lower("city"), Lower("state"), name="property_market_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["listed_by", "listing_source", "external_id"],
+                name="unique_property_external_id",
+            )
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.address_line1}, {self.city}"
 
     def save(self, *args, **kwargs):
-        """Override save to sync location fields."""
+        """Override save to sync location fields.
+
+        The database keeps them in step for every write (see migration
+        0010); this only keeps the instance itself up to date.
+        """
         from django.contrib.gis.geos import Point
 
         # Sync PointField with lat/lng fields
@@ -139,6 +216,43 @@ class Property(models.Model):
 
         super().save(*args, **kwargs)
 
+    def record_price_change(self, price, change_reason="", date=None):
+        """Append a price change to the history table and refresh the summary."""
+        date = date or timezone.localdate()
+        summary = list(self.price_history or [])
+        previous_price = summary[-1]["price"] if summary else None
+        change = PriceChange.objects.create(
+            property=self,
+            date=date,
+            price=price,
+            previous_price=previous_price,
+            change_reason=change_reason,
+        )
+
+        summary.append(change.as_summary())
+        self.price_history = summary[-self.PRICE_HISTORY_SUMMARY_SIZE :]
+        Property.objects.filter(pk=self.pk).update(
+            price_history=self.price_history, updated_at=timezone.now()
+        )
+        return change
+
+    @staticmethod
+    def refresh_primary_images(property_ids=None):
+        """Re-point ``primary_image`` for the given properties in one UPDATE.
+
+        The flagged primary image wins, then the first image in gallery
+        order; properties without images get None.
+        """
+        queryset = Property.objects.all()
+        if property_ids is not None:
+            queryset = queryset.filter(pk__in=property_ids)
+        first_image = (
+            PropertyImage.objects.filter(property=OuterRef("pk"))
+            .order_by("-is_primary", "order", "id")
+            .values("pk")[:1]
+        )
+        return queryset.update(primary_image=Subquery(first_image))
+
     def get_full_address(self):
         """Return the full formatted address."""
         address_parts = [self.address_line1]
@@ -148,6 +262,58 @@ class Property(models.Model):
         return ", ".join(address_parts)
 
 
+class PriceChangeQuerySet(models.QuerySet):
+    """Time-range helpers for price history queries."""
+
+    def between(self, start=None, end=None):
+        """Return changes dated within [start, end]; either bound may be open."""
+        queryset = self
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+    def drops(self):
+        """Return only price reductions."""
+        return self.filter(price__lt=models.F("previous_price"))
+
+
+class PriceChange(models.Model):
+    """Append-only record of a listing price change."""
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="price_changes"
+    )
+    date = models.DateField()
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    previous_price = models.DecimalField(
+        max_digits=12, decimal_places=2, blank=True, null=True
+    )
+    change_reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = PriceChangeQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["date", "id"]
+        indexes = [
+            models.Index(fields=["property", "date"]),
+            models.Index(fields=["date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} - {self.price} on {self.date}"
+
+    def as_summary(self):
+        """Return the entry in the ``Property.price_history`` summary format."""
+        return {
+            "date": self.date.isoformat(),
+            "price": float(self.price),
+            "change_reason": self.change_reason,
+        }
+
+
 class PropertyImage(models.Model):
     """Images for property listings."""
 
@@ -158,13 +324,54 @@ class PropertyImage(models.Model):
     caption = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
     order = models.PositiveSmallIntegerField(default=0)
+    # {"webp": {"320": name, ...}, "jpeg": {...}}, filled in by a Celery task
+    renditions = models.JSONField(default=dict, blank=True)
+    # Perceptual (difference) hash and its bands; see properties.images
+    phash = models.BigIntegerField(null=True, blank=True, db_index=True)
+    phash_bands = ArrayField(models.IntegerField(), default=list, blank=True)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+    )
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [GinIndex(fields=["phash_bands"])]
 
     def __str__(self):
         return f"Image for {self.property.title}"
 
+    def save(self, *args, **kwargs):
+        """Save the image and keep the property's primary image in step."""
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or {"property", "is_primary", "order"} & set(
+                update_fields
+            ):
+                Property.refresh_primary_images([self.property_id])
+
+    def find_duplicate(self):
+        """Return the oldest earlier image that looks the same, if any."""
+        from .images import DUPLICATE_DISTANCE, hamming
+
+        if self.phash is None:
+            return None
+        candidates = (
+            PropertyImage.objects.filter(phash_bands__overlap=self.phash_bands)
+            .exclude(pk=self.pk)
+            .order_by("id")
+        )
+        if self.pk:
+            candidates = candidates.filter(pk__lt=self.pk)
+        for candidate in candidates:
+            if hamming(candidate.phash, self.phash) <= DUPLICATE_DISTANCE:
+                return candidate.duplicate_of or candidate
+        return None
+
 
 class PropertyDocument(models.Model):
     """Documents for property listings (floor plans, permits, etc.)."""
@@ -180,6 +387,183 @@ class PropertyDocument(models.Model):
         return f"{self.document_type} - {self.title}"
 
 
+class MediaUpload(models.Model):
+    """A resumable, chunked upload of a property image or document.
+
+    Chunks are appended to a temporary file under ``CHUNKED_UPLOAD_DIR``;
+    once every byte has arrived a Celery task turns it into a
+    ``PropertyImage`` or ``PropertyDocument``.
+    """
+
+    KIND_CHOICES = [
+        ("image", "Image"),
+        ("document", "Document"),
+    ]
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("finalizing", "Finalizing"),
+        ("complete", "Complete"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="media_uploads"
+    )
+    uploaded_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="media_uploads"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="uploading"
+    )
+    error = models.CharField(max_length=255, blank=True)
+    # Metadata copied onto the finished PropertyImage/PropertyDocument
+    title = models.CharField(max_length=255, blank=True)
+    document_type = models.CharField(max_length=100, blank=True)
+    caption = models.CharField(max_length=255, blank=True)
+    image = models.ForeignKey(
+        PropertyImage, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    document = models.ForeignKey(
+        PropertyDocument, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size} bytes)"
+
+    @property
+    def temp_path(self):
+        """Return the path of the partial file on shared temporary storage."""
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.pk}.part")
+
+    @property
+    def is_received(self):
+        """Return True once every byte has arrived."""
+        return self.received_bytes == self.total_size
+
+
+class PropertyImport(models.Model):
+    """A listing feed file queued for bulk import.
+
+    The file is parsed and upserted by a Celery task (see
+    ``properties.importer``); the counters and ``errors`` report progress.
+    """
+
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("json", "JSON"),
+        ("jsonl", "JSON Lines"),
+    ]
+    SCHEMA_CHOICES = [
+        ("native", "DreamDwelling fields"),
+        ("reso", "RESO (MLS) fields"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("complete", "Complete"),
+        ("failed", "Failed"),
+    ]
+
+    uploaded_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="property_imports"
+    )
+    source = models.CharField(max_length=50)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    schema = models.CharField(max_length=10, choices=SCHEMA_CHOICES, default="native")
+    file = models.FileField(upload_to="imports/")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    processed_count = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    # The first rejected rows, as {"row", "external_id", "error"} dicts
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.source} import ({self.get_status_display()})"
+
+
+class GeocodedAddress(models.Model):
+    """Cached geocoder answer for a normalized address.
+
+    Misses are cached too (null coordinates), so an address is only ever
+    sent to the provider once. See ``properties.geocoding``.
+    """
+
+    address = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Geocoded addresses"
+
+    def __str__(self):
+        return self.address
+
+
+class DataQualityScan(models.Model):
+    """One run of the data-quality rules over every listing.
+
+    See ``properties.quality``; the rows that broke a rule are stored as
+    ``DataQualityViolation`` and ``summary`` counts them per rule.
+    """
+
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("complete", "Complete"),
+        ("failed", "Failed"),
+    ]
+
+    rules = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    scanned_count = models.PositiveIntegerField(default=0)
+    violation_count = models.PositiveIntegerField(default=0)
+    # {rule: violations}
+    summary = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Data quality scan {self.created_at:%Y-%m-%d %H:%M} ({self.get_status_display()})"
+
+
+class DataQualityViolation(models.Model):
+    """A listing that broke a data-quality rule during a scan."""
+
+    scan = models.ForeignKey(
+        DataQualityScan, on_delete=models.CASCADE, related_name="violations"
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="quality_violations"
+    )
+    rule = models.CharField(max_length=50)
+    message = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=["scan", "rule"])]
+
+    def __str__(self):
+        return f"{self.rule} on property {self.property_id}: {self.message}"
+
+
 class PropertyReview(models.Model):
     """Reviews for properties."""
 
@@ -17,3 +17,13 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
         # Write permissions are only allowed to the owner
         return obj.listed_by == request.user
+
+
+class IsAgent(permissions.BasePermission):
+    """
+    Only allow agents and staff, e.g. to import listing feeds.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_agent or user.is_staff))
@@ -0,0 +1,192 @@
+"""
+Data-quality rules for listings, evaluated in one streamed pass.
+
+Listings are read once with ``.values().iterator()`` and checked a chunk at
+a time. Each chunk is turned into numpy columns and every rule flags its
+rows with one vectorized mask, so adding a rule adds a few array
+operations rather than another table scan. Violations are bulk-inserted
+per chunk into ``DataQualityViolation``.
+
+Register a rule with ``@rule(code, fields)``. It is given the columns it
+asked for and returns ``(mask, message)``, where ``message`` is a string or
+an array with one message per row. Invariants the database enforces
+itself, such as ``location`` matching latitude/longitude (a trigger) and
+the price metrics (generated columns), need no rule.
+"""
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .importer import numeric_column
+from .models import DataQualityScan, DataQualityViolation, Property, PropertyImage
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Computed values the rules may ask for besides model fields
+ANNOTATIONS = {
+    "has_images": lambda: Exists(PropertyImage.objects.filter(property=OuterRef("pk"))),
+}
+# Fields read as they are rather than as float columns
+OBJECT_FIELDS = {"primary_image_id", "has_images"}
+
+RULES = {}
+
+
+def rule(code, fields):
+    """Register a rule checking ``fields`` under ``code``."""
+
+    def register(check):
+        RULES[code] = (fields, check)
+        return check
+
+    return register
+
+
+@rule("coordinate_bounds", ["latitude", "longitude"])
+def coordinate_bounds(columns):
+    """Coordinates must be a real position and be given together."""
+    latitude, longitude = columns["latitude"], columns["longitude"]
+    messages = np.full(len(latitude), "", dtype=object)
+    with np.errstate(invalid="ignore"):
+        messages[(latitude == 0) & (longitude == 0)] = "coordinates are (0, 0)"
+        messages[(latitude < -90) | (latitude > 90)] = "latitude is out of range"
+        messages[(longitude < -180) | (longitude > 180)] = "longitude is out of range"
+    messages[np.isnan(latitude) != np.isnan(longitude)] = (
+        "only one of latitude and longitude is set"
+    )
+    return messages != "", messages
+
+
+@rule("missing_primary_image", ["primary_image_id", "has_images"])
+def missing_primary_image(columns):
+    """Listings need a cover photo for list and map views."""
+    missing = np.array([value is None for value in columns["primary_image_id"]])
+    has_images = columns["has_images"].astype(bool)
+    messages = np.where(
+        has_images, "has images but no primary image", "has no images"
+    ).astype(object)
+    return missing, messages
+
+
+def to_columns(rows, fields):
+    """Turn a chunk of ``.values()`` rows into one array per field."""
+    columns = {}
+    for field in fields:
+        values = [row[field] for row in rows]
+        if field in OBJECT_FIELDS:
+            columns[field] = np.array(values, dtype=object)
+        else:
+            columns[field] = numeric_column(values)[0]
+    return columns
+
+
+def check_chunk(rows, rules):
+    """Run ``rules`` over a chunk of rows.
+
+    Returns ``[(property_id, rule, message)]`` for every violation.
+    """
+    fields = {field for code in rules for field in RULES[code][0]}
+    columns = to_columns(rows, fields)
+    ids = [row["id"] for row in rows]
+    violations = []
+    for code in rules:
+        mask, messages = RULES[code][1](columns)
+        for index in np.flatnonzero(mask):
+            message = messages if isinstance(messages, str) else messages[index]
+            violations.append((ids[index], code, message[:255]))
+    return violations
+
+
+class QualityScanner:
+    """Stream every listing through the rules once and record violations.
+
+    Usage::
+
+        scan = QualityScanner().run()
+        scan.summary  # {"missing_primary_image": 12, ...}
+    """
+
+    def __init__(self, rules=None, chunk_size=DEFAULT_CHUNK_SIZE, save=True):
+        self.rules = list(rules or RULES)
+        unknown = set(self.rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown rules: {', '.join(sorted(unknown))}")
+        self.chunk_size = chunk_size
+        self.save = save
+        self.scanned = 0
+        self.summary = {code: 0 for code in self.rules}
+        self.scan = None
+
+    def queryset(self, queryset=None):
+        """Return the single query the scan streams."""
+        fields = {field for code in self.rules for field in RULES[code][0]}
+        annotations = {
+            name: ANNOTATIONS[name]() for name in sorted(fields & set(ANNOTATIONS))
+        }
+        columns = sorted(fields - set(annotations))
+        queryset = queryset if queryset is not None else Property.objects.all()
+        return (
+            queryset.annotate(**annotations)
+            .order_by()
+            .values("id", *columns, *annotations)
+        )
+
+    def run(self, queryset=None, progress=None):
+        """Scan ``queryset`` (every listing by default).
+
+        ``progress(scanner)`` is called after each chunk. Returns the
+        ``DataQualityScan`` (unsaved when ``save`` is False).
+        """
+        self.scan = DataQualityScan(rules=self.rules)
+        if self.save:
+            self.scan.save()
+        try:
+            chunk = []
+            for row in self.queryset(queryset).iterator(chunk_size=self.chunk_size):
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self.check(chunk)
+                    chunk = []
+                    if progress:
+                        progress(self)
+            if chunk:
+                self.check(chunk)
+                if progress:
+                    progress(self)
+        except Exception:
+            self.finish("failed")
+            raise
+        self.finish("complete")
+        return self.scan
+
+    def check(self, rows):
+        """Check one chunk and store its violations."""
+        violations = check_chunk(rows, self.rules)
+        self.scanned += len(rows)
+        for _, code, _ in violations:
+            self.summary[code] += 1
+        if self.save and violations:
+            with transaction.atomic():
+                DataQualityViolation.objects.bulk_create(
+                    [
+                        DataQualityViolation(
+                            scan=self.scan,
+                            property_id=property_id,
+                            rule=code,
+                            message=message,
+                        )
+                        for property_id, code, message in violations
+                    ],
+                    batch_size=self.chunk_size,
+                )
+
+    def finish(self, status):
+        """Record the totals on the scan."""
+        self.scan.status = status
+        self.scan.scanned_count = self.scanned
+        self.scan.violation_count = sum(self.summary.values())
+        self.scan.summary = self.summary
+        self.scan.finished_at = timezone.now()
+        if self.save:
+            self.scan.save()
@@ -4,6 +4,8 @@ Serializers for property models.
 
 from rest_framework import serializers
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
+from django.core.files.storage import default_storage
+from .images import CARD_WIDTH, THUMBNAIL_WIDTH, best_rendition, is_external, srcset
 from .models import (
     Property,
     PropertyImage,
@@ -12,7 +14,11 @@ from .models import (
     Feature,
     PropertyReview,
     OpenHouse,
+    PriceChange,
+    MediaUpload,
+    PropertyImport,
 )
+from django.conf import settings
 from users.serializers import UserSerializer
 
 
@@ -32,14 +38,56 @@ class PropertyTypeSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description"]
 
 
+def media_url(name, request=None):
+    """Return an absolute URL for a stored file name."""
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def image_url(image, width, request=None):
+    """Return the URL of an image's rendition nearest ``width`` wide.
+
+    Falls back to the original until renditions exist; external images are
+    returned as-is.
+    """
+    if image is None or not image.image:
+        return None
+    if is_external(image.image):
+        return str(image.image)
+    name = best_rendition(image.renditions, width) or image.image.name
+    return media_url(name, request)
+
+
 class PropertyImageSerializer(serializers.ModelSerializer):
     """Serializer for property images."""
 
     image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = PropertyImage
-        fields = ["id", "image", "caption", "is_primary", "order"]
+        fields = [
+            "id",
+            "image",
+            "thumbnail",
+            "srcset",
+            "caption",
+            "is_primary",
+            "order",
+            "duplicate_of",
+        ]
+        read_only_fields = ["duplicate_of"]
+
+    def get_thumbnail(self, obj):
+        """Return the small JPEG rendition, or the original until it exists."""
+        return image_url(obj, THUMBNAIL_WIDTH, self.context.get("request"))
+
+    def get_srcset(self, obj):
+        """Return srcset strings per format, empty until renditions exist."""
+        request = self.context.get("request")
+        build_url = request.build_absolute_uri if request else None
+        return {fmt: srcset(obj.renditions, fmt, build_url) for fmt in obj.renditions}
 
     def get_image(self, obj):
         """Return the image URL, handling both local files and external URLs."""
@@ -63,6 +111,88 @@ class PropertyDocumentSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "file", "document_type"]
 
 
+class PropertyImportSerializer(serializers.ModelSerializer):
+    """Serializer for queued listing feed imports."""
+
+    class Meta:
+        model = PropertyImport
+        fields = [
+            "id",
+            "source",
+            "format",
+            "schema",
+            "file",
+            "status",
+            "processed_count",
+            "created_count",
+            "updated_count",
+            "skipped_count",
+            "errors",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "id",
+            "status",
+            "processed_count",
+            "created_count",
+            "updated_count",
+            "skipped_count",
+            "errors",
+            "created_at",
+            "finished_at",
+        ]
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Serializer for resumable chunked uploads."""
+
+    class Meta:
+        model = MediaUpload
+        fields = [
+            "id",
+            "property",
+            "kind",
+            "filename",
+            "total_size",
+            "sha256",
+            "title",
+            "document_type",
+            "caption",
+            "received_bytes",
+            "status",
+            "error",
+            "image",
+            "document",
+            "created_at",
+        ]
+        read_only_fields = [
+            "id",
+            "received_bytes",
+            "status",
+            "error",
+            "image",
+            "document",
+            "created_at",
+        ]
+
+    def validate_property(self, value):
+        """Only the listing agent can upload media for a property."""
+        if value.listed_by != self.context["request"].user:
+            raise serializers.ValidationError(
+                "You do not have permission to add media to this property."
+            )
+        return value
+
+    def validate_total_size(self, value):
+        """Reject empty and oversized uploads."""
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Uploads must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes."
+            )
+        return value
+
+
 class PropertyReviewSerializer(serializers.ModelSerializer):
     """Serializer for property reviews."""
 
@@ -85,6 +215,22 @@ class OpenHouseSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class PriceChangeSerializer(serializers.ModelSerializer):
+    """Serializer for price history entries."""
+
+    class Meta:
+        model = PriceChange
+        fields = ["property", "date", "price", "previous_price", "change_reason"]
+
+
+class PropertyImageUploadSerializer(serializers.ModelSerializer):
+    """Serializer for uploading a property image."""
+
+    class Meta:
+        model = PropertyImage
+        fields = ["image", "caption", "is_primary", "order"]
+
+
 class PropertyListSerializer(GeoFeatureModelSerializer):
     """Serializer for listing properties."""
 
@@ -92,8 +238,18 @@ class PropertyListSerializer(GeoFeatureModelSerializer):
         source="property_type.name", read_only=True
     )
     primary_image = serializers.SerializerMethodField()
-    images = PropertyImageSerializer(many=True, read_only=True)
     favorite_count = serializers.IntegerField(source="favorites_count", read_only=True)
+    is_favorited = serializers.SerializerMethodField()
+    # Generated columns; declared so they serialize as strings like ``price``
+    price_per_sqft = serializers.DecimalField(
+        max_digits=8, decimal_places=2, read_only=True
+    )
+    price_per_bedroom = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+    monthly_cost = serializers.DecimalField(
+        max_digits=11, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Property
@@ -107,6 +263,9 @@ class PropertyListSerializer(GeoFeatureModelSerializer):
             "zip_code",
             "price",
             "monthly_rent",
+            "price_per_sqft",
+            "price_per_bedroom",
+            "monthly_cost",
             "bedrooms",
             "bathrooms",
             "square_feet",
@@ -114,32 +273,19 @@ class PropertyListSerializer(GeoFeatureModelSerializer):
             "listing_type",
             "property_type_name",
             "primary_image",
-            "images",
             "favorite_count",
+            "is_favorited",
             "created_at",
             "location",  # Include the geo field
         ]
 
-    def get_primary_image(self, obj):
-        """Get the primary image URL for the property."""
-        primary = obj.images.filter(is_primary=True).first()
-        if primary:
-            # If it's already a full URL (starts with http), return as-is
-            if str(primary.image).startswith(("http://", "https://")):
-                return str(primary.image)
-            # Otherwise, build the full URL for local files
-            return self.context["request"].build_absolute_uri(primary.image.url)
+    def get_is_favorited(self, obj):
+        """Return the ``is_favorited`` annotation; False for anonymous users."""
+        return getattr(obj, "is_favorited", False)
 
-        # If no primary image, get the first one
-        first_image = obj.images.first()
-        if first_image:
-            # If it's already a full URL (starts with http), return as-is
-            if str(first_image.image).startswith(("http://", "https://")):
-                return str(first_image.image)
-            # Otherwise, build the full URL for local files
-            return self.context["request"].build_absolute_uri(first_image.image.url)
-
-        return None
+    def get_primary_image(self, obj):
+        """Get the card-sized primary image URL for the property."""
+        return image_url(obj.primary_image, CARD_WIDTH, self.context.get("request"))
 
 
 class PropertyDetailSerializer(GeoFeatureModelSerializer):
@@ -152,16 +298,42 @@ class PropertyDetailSerializer(GeoFeatureModelSerializer):
     features = FeatureSerializer(many=True, read_only=True)
     property_type = PropertyTypeSerializer(read_only=True)
     listed_by = UserSerializer(read_only=True)
+    primary_image = serializers.SerializerMethodField()
+    # Generated columns; declared so they serialize as strings like ``price``
+    price_per_sqft = serializers.DecimalField(
+        max_digits=8, decimal_places=2, read_only=True
+    )
+    price_per_bedroom = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+    monthly_cost = serializers.DecimalField(
+        max_digits=11, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Property
         geo_field = "location"
         fields = "__all__"
 
+    def get_primary_image(self, obj):
+        """Get the primary image URL for the property."""
+        return image_url(obj.primary_image, CARD_WIDTH, self.context.get("request"))
+
 
 class PropertyCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating properties."""
 
+    # Generated columns; declared so they serialize as strings like ``price``
+    price_per_sqft = serializers.DecimalField(
+        max_digits=8, decimal_places=2, read_only=True
+    )
+    price_per_bedroom = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+    monthly_cost = serializers.DecimalField(
+        max_digits=11, decimal_places=2, read_only=True
+    )
+
     class Meta:
         model = Property
         exclude = [
@@ -170,9 +342,23 @@ class PropertyCreateUpdateSerializer(serializers.ModelSerializer):
             "updated_at",
             "views_count",
             "favorites_count",
+            "price_history",
+            "primary_image",
+            "listing_source",
+            "external_id",
         ]
 
     def create(self, validated_data):
         """Create a new property with the current user as the lister."""
         validated_data["listed_by"] = self.context["request"].user
-        return super().create(validated_data)
+        instance = super().create(validated_data)
+        instance.record_price_change(instance.price, "Initial listing")
+        return instance
+
+    def update(self, instance, validated_data):
+        """Update a property, appending to its price history if the price moved."""
+        old_price = instance.price
+        instance = super().update(instance, validated_data)
+        if instance.price != old_price:
+            instance.record_price_change(instance.price, "Price change")
+        return instance
@@ -0,0 +1,26 @@
+"""
+Signal handlers that keep denormalized listing fields in step with writes.
+"""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Property, PropertyImage
+
+
+@receiver(post_delete, sender=PropertyImage)
+def refresh_primary_image(sender, instance, origin=None, **kwargs):
+    """Re-point the listing's cover photo after any image delete.
+
+    ``primary_image`` is ``SET_NULL``, so without this a bulk
+    ``PropertyImage.objects.filter(...).delete()`` would leave listings
+    with other images but no cover. One delete call removes all its rows
+    before the signals are sent, so each listing is refreshed once per call.
+    """
+    refreshed = getattr(origin, "_refreshed_primary_images", None)
+    if refreshed is None:
+        refreshed = set()
+        if origin is not None:
+            origin._refreshed_primary_images = refreshed
+    if instance.property_id not in refreshed:
+        refreshed.add(instance.property_id)
+        Property.refresh_primary_images([instance.property_id])
@@ -0,0 +1,152 @@
+"""
+Celery tasks for property media and feed imports.
+"""
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+from .geocoding import Geocoder
+from .images import dhash, generate_renditions, hash_bands, is_external
+from .importer import FeedError, PropertyImporter, read_records
+from .models import MediaUpload, Property, PropertyImage, PropertyImport
+from .uploads import UploadError, expire_uploads, finalize
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_image_renditions(self, image_id):
+    """Hash an uploaded image, then render or reuse its renditions.
+
+    When the photo duplicates an earlier upload and
+    ``IMAGE_DEDUPE_SHARE_BLOBS`` is on, the image is pointed at the
+    original's stored file and renditions and its own copy is deleted.
+    """
+    image = PropertyImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image or is_external(image.image):
+        return {}
+    try:
+        with image.image.open("rb") as source:
+            image.phash = dhash(source)
+        image.phash_bands = hash_bands(image.phash)
+        original = image.find_duplicate()
+        image.duplicate_of = original
+
+        if (
+            original is not None
+            and settings.IMAGE_DEDUPE_SHARE_BLOBS
+            and original.renditions
+            and not is_external(original.image)
+        ):
+            duplicate_name = image.image.name
+            image.image = original.image.name
+            image.renditions = original.renditions
+            image.save(
+                update_fields=[
+                    "image",
+                    "renditions",
+                    "phash",
+                    "phash_bands",
+                    "duplicate_of",
+                ]
+            )
+            if duplicate_name != original.image.name:
+                default_storage.delete(duplicate_name)
+            return image.renditions
+
+        image.renditions = generate_renditions(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        # Not an image Pillow can read, or too many pixels to decode safely;
+        # retrying won't help
+        return {}
+    except OSError as exc:
+        # Storage hiccups are worth another attempt
+        raise self.retry(exc=exc)
+    image.save(update_fields=["renditions", "phash", "phash_bands", "duplicate_of"])
+    return image.renditions
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_media_upload(self, upload_id):
+    """Move a fully received chunked upload into its image or document."""
+    upload = MediaUpload.objects.select_related("property").filter(pk=upload_id).first()
+    if upload is None or upload.status != "finalizing":
+        return None
+    try:
+        created = finalize(upload)
+    except UploadError as exc:
+        upload.status = "failed"
+        upload.error = str(exc)
+        upload.save(update_fields=["status", "error", "updated_at"])
+        return None
+    except OSError as exc:
+        raise self.retry(exc=exc)
+
+    if upload.kind == "image":
+        generate_image_renditions.delay(created.pk)
+    return created.pk
+
+
+@shared_task
+def expire_media_uploads():
+    """Drop abandoned chunked uploads and their partial files."""
+    return expire_uploads()
+
+
+@shared_task
+def import_property_feed(import_id):
+    """Run a queued ``PropertyImport`` and record its progress as it goes."""
+    job = PropertyImport.objects.select_related("uploaded_by").get(pk=import_id)
+    if job.status != "pending":
+        return None
+    job.status = "running"
+    job.save(update_fields=["status"])
+
+    def report(importer):
+        job.processed_count = importer.processed
+        job.created_count = importer.created
+        job.updated_count = importer.updated
+        job.skipped_count = importer.skipped
+        job.errors = importer.errors
+        job.save(
+            update_fields=[
+                "processed_count",
+                "created_count",
+                "updated_count",
+                "skipped_count",
+                "errors",
+            ]
+        )
+
+    importer = PropertyImporter(job.uploaded_by, job.source, schema=job.schema)
+    try:
+        with job.file.open("rb") as feed:
+            importer.run(read_records(feed, job.format), progress=report)
+    except Exception as exc:
+        # Chunks before the bad spot are already committed
+        importer.refresh_stats()
+        message = str(exc) if isinstance(exc, FeedError) else "Import failed unexpectedly."
+        importer.errors.append({"row": None, "external_id": "", "error": message})
+        report(importer)
+        job.status = "failed"
+        if not isinstance(exc, FeedError):
+            # Never leave the job "running"; the worker logs the traceback
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "finished_at"])
+            raise
+    else:
+        job.status = "complete"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    # Feeds often carry addresses only
+    geocode_listings.delay(listing_source=job.source)
+    return job.processed_count
+
+
+@shared_task
+def geocode_listings(listing_source=None):
+    """Look up coordinates for listings that have none, cache first."""
+    queryset = Property.objects.all()
+    if listing_source is not None:
+        queryset = queryset.filter(listing_source=listing_source)
+    return Geocoder().geocode_listings(queryset)
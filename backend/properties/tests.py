@@ -2,10 +2,31 @@
 Tests for property models.
 """
 
-from django.test import TestCase
+import asyncio
+import io
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
-from properties.models import Property, PropertyType, Feature, PropertyImage
+import httpx
+from PIL import Image
+from rest_framework.test import APIClient
+from properties.geo import INCONSISTENT_LOCATION, update_in_id_chunks, with_location_drift
+from properties.geocoding import (
+    Geocoder, GeocodingError, MapboxProvider, StaticProvider, normalize_address,
+)
+from properties.importer import FeedError, PropertyImporter, read_records, validate
+from properties.quality import QualityScanner
+from properties.images import best_rendition, dhash, hamming, hash_bands, render, rendition_name
+from properties.management.commands.hash_property_images import link_duplicates
+from properties.uploads import UploadError, expire_uploads, parse_content_range
+from properties.models import Property, PropertyType, Feature, PropertyImage, PriceChange, MediaUpload, GeocodedAddress
 
 User = get_user_model()
 
@@ -125,3 +146,503 @@ class PropertyModelTests(TestCase):
         images = property_listing.images.all().order_by('order', 'id')
         self.assertEqual(images[0], primary_image)
         self.assertEqual(images[1], secondary_image)
+
+    def test_primary_image_pointer(self):
+        """Test primary_image follows image adds, reorders and deletes."""
+        property_listing = Property.objects.create(**self.property_data)
+        second = PropertyImage.objects.create(property=property_listing, image='property_images/b.jpg', order=1)
+        first = PropertyImage.objects.create(property=property_listing, image='property_images/a.jpg', order=0)
+        property_listing.refresh_from_db()
+        self.assertEqual(property_listing.primary_image, first)
+
+        second.is_primary = True
+        second.save()
+        property_listing.refresh_from_db()
+        self.assertEqual(property_listing.primary_image, second)
+
+        second.delete()
+        property_listing.refresh_from_db()
+        self.assertEqual(property_listing.primary_image, first)
+
+        first.delete()
+        property_listing.refresh_from_db()
+        self.assertIsNone(property_listing.primary_image)
+
+        # Bulk deletes re-point it too
+        images = [
+            PropertyImage.objects.create(property=property_listing, image=f'property_images/{name}.jpg', order=order)
+            for order, name in enumerate('cde')
+        ]
+        PropertyImage.objects.filter(pk__in=[images[0].pk, images[1].pk]).delete()
+        property_listing.refresh_from_db()
+        self.assertEqual(property_listing.primary_image, images[2])
+
+    def test_add_images_returns_a_list(self):
+        """Test uploads always answer with a list and oversized images are rejected."""
+        property_listing = Property.objects.create(**self.property_data)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/properties/{property_listing.pk}/add_images/'
+
+        def upload(name):
+            buffer = io.BytesIO()
+            Image.new('RGB', (64, 48), 'white').save(buffer, 'PNG')
+            return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = client.post(url, {'image': upload('one.png')}, format='multipart')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data), 1)
+
+            response = client.post(url, {'images': [upload('a.png'), upload('b.png')]}, format='multipart')
+            self.assertEqual(len(response.data), 2)
+
+            max_pixels = Image.MAX_IMAGE_PIXELS
+            Image.MAX_IMAGE_PIXELS = 100  # 64x48 is now more than twice the limit
+            try:
+                response = client.post(url, {'image': upload('bomb.png')}, format='multipart')
+            finally:
+                Image.MAX_IMAGE_PIXELS = max_pixels
+            self.assertEqual(response.status_code, 400)
+
+    def test_record_price_change(self):
+        """Test price changes are appended to the history table and summary."""
+        property_listing = Property.objects.create(**self.property_data)
+
+        property_listing.record_price_change(450000, 'Initial listing')
+        property_listing.record_price_change(425000, 'Price reduction')
+
+        self.assertEqual(property_listing.price_changes.count(), 2)
+        drop = PriceChange.objects.drops().get()
+        self.assertEqual(drop.previous_price, 450000)
+        self.assertEqual(drop.price, 425000)
+
+        property_listing.refresh_from_db()
+        self.assertEqual(len(property_listing.price_history), 2)
+        self.assertEqual(property_listing.price_history[-1]['change_reason'], 'Price reduction')
+
+    def test_price_history_summary_is_capped(self):
+        """Test the JSON summary only keeps the most recent changes."""
+        property_listing = Property.objects.create(**self.property_data)
+
+        for step in range(Property.PRICE_HISTORY_SUMMARY_SIZE + 5):
+            property_listing.record_price_change(450000 - step * 1000)
+
+        property_listing.refresh_from_db()
+        self.assertEqual(len(property_listing.price_history), Property.PRICE_HISTORY_SUMMARY_SIZE)
+        self.assertEqual(property_listing.price_changes.count(), Property.PRICE_HISTORY_SUMMARY_SIZE + 5)
+
+    def test_price_drops_days_bounds(self):
+        """Test price_drops lists recent drops and rejects out-of-range windows."""
+        property_listing = Property.objects.create(**self.property_data)
+        property_listing.record_price_change(450000)
+        property_listing.record_price_change(425000)
+
+        response = self.client.get('/api/properties/price_drops/', {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        for days in ['0', '3651', '10000000000', 'soon']:
+            response = self.client.get('/api/properties/price_drops/', {'days': days})
+            self.assertEqual(response.status_code, 400, days)
+
+    def test_retrieve_counts_views(self):
+        """Test each retrieve increments the stored view count."""
+        listing = Property.objects.create(**self.property_data)
+        for expected in [1, 2]:
+            response = self.client.get(f'/api/properties/{listing.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['properties']['views_count'], expected)
+        listing.refresh_from_db()
+        self.assertEqual(listing.views_count, 2)
+
+    def test_location_synced_by_database(self):
+        """Test bulk writes that skip save() keep location and lat/lng in step."""
+        listing = Property.objects.create(**self.property_data)
+        Property.objects.filter(pk=listing.pk).update(latitude=41.0, longitude=-74.5)
+        listing.refresh_from_db()
+        self.assertAlmostEqual(listing.location.x, -74.5)
+        self.assertAlmostEqual(listing.location.y, 41.0)
+
+        Property.objects.filter(pk=listing.pk).update(location=Point(-73.9, 40.7, srid=4326))
+        listing.refresh_from_db()
+        self.assertAlmostEqual(listing.longitude, -73.9)
+        self.assertAlmostEqual(listing.latitude, 40.7)
+
+        data = dict(self.property_data, location=Point(-97.7, 30.3, srid=4326))
+        [created] = Property.objects.bulk_create([Property(**data)])
+        created.refresh_from_db()
+        self.assertAlmostEqual(created.latitude, 30.3)
+        drifted = with_location_drift(Property.objects.all()).filter(INCONSISTENT_LOCATION)
+        self.assertFalse(drifted.exists())
+
+    def test_location_update_in_id_chunks(self):
+        """Test set-based coordinate updates run per id window and move the point too."""
+        listings = [Property.objects.create(**self.property_data) for _ in range(3)]
+        reported = []
+        updated = update_in_id_chunks(
+            Property.objects.filter(pk__in=[listings[1].pk]),
+            {'latitude': F('latitude') + 1}, 1,
+            progress=lambda count, last_id: reported.append(last_id),
+        )
+        self.assertEqual(updated, 1)
+        self.assertEqual(reported[-1], listings[1].pk)
+        listings[1].refresh_from_db()
+        self.assertAlmostEqual(listings[1].location.y, listings[1].latitude)
+        self.assertAlmostEqual(listings[1].latitude, 41.7484)
+
+    def test_map_data(self):
+        """Test the async map endpoint lists filtered listings with coordinates."""
+        listing = Property.objects.create(**self.property_data)
+        Property.objects.create(**dict(self.property_data, location=None, bedrooms=5))
+        Property.objects.create(**dict(self.property_data, bedrooms=1))
+        response = self.client.get('/api/properties/map_data/', {'min_bedrooms': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['id'] for entry in response.json()], [listing.pk])
+        self.assertAlmostEqual(response.json()[0]['latitude'], 40.7484)
+
+    def test_value_metrics_follow_bulk_updates(self):
+        """Test derived price metrics are kept current by the database and sortable."""
+        listing = Property.objects.create(**self.property_data)
+        self.assertEqual(listing.price_per_sqft, Decimal('204.55'))
+        self.assertEqual(listing.price_per_bedroom, Decimal('150000.00'))
+        self.assertIsNone(listing.monthly_cost)
+
+        Property.objects.filter(pk=listing.pk).update(
+            price=440000, monthly_rent=2500, hoa_fee=150
+        )
+        listing.refresh_from_db()
+        self.assertEqual(listing.price_per_sqft, Decimal('200.00'))
+        self.assertEqual(listing.monthly_cost, Decimal('2650.00'))
+
+        cheaper = Property.objects.create(**dict(self.property_data, square_feet=4400))
+        response = self.client.get(
+            '/api/properties/', {'ordering': 'price_per_sqft', 'max_price_per_sqft': 150}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']['features']], [cheaper.pk])
+        # Serialized as decimal strings, like price
+        self.assertEqual(
+            response.json()['results']['features'][0]['properties']['price_per_sqft'], '102.27'
+        )
+        detail = self.client.get(f'/api/properties/{listing.pk}/').json()['properties']
+        self.assertEqual((detail['price_per_sqft'], detail['monthly_cost']), ('200.00', '2650.00'))
+
+
+class ImageRenditionTests(SimpleTestCase):
+    """Test cases for property image renditions."""
+
+    def make_image(self, width, height):
+        """Return an in-memory PNG of the given size."""
+        buffer = io.BytesIO()
+        Image.new('RGBA', (width, height), (200, 100, 50, 255)).save(buffer, format='PNG')
+        buffer.seek(0)
+        return buffer
+
+    def test_render_skips_upscaling(self):
+        """Test only widths below the original are rendered, in both formats."""
+        renditions = list(render(self.make_image(800, 600)))
+        self.assertEqual(sorted({(width, fmt) for width, fmt, _ in renditions}), [
+            (320, 'jpeg'), (320, 'webp'), (640, 'jpeg'), (640, 'webp'),
+        ])
+        with Image.open(io.BytesIO(renditions[0][2])) as image:
+            self.assertEqual(image.size, (320, 240))
+
+    def test_small_image_keeps_its_size(self):
+        """Test images smaller than every step still get renditions."""
+        widths = {width for width, _, _ in render(self.make_image(200, 100))}
+        self.assertEqual(widths, {200})
+
+    def test_rendition_lookup(self):
+        """Test rendition names and the nearest-width lookup."""
+        self.assertEqual(rendition_name('property_images/house.png', 640, 'jpeg'), 'property_images/renditions/house_640.jpg')
+        renditions = {'jpeg': {'320': 'a.jpg', '640': 'b.jpg'}}
+        self.assertEqual(best_rendition(renditions, 400), 'b.jpg')
+        self.assertEqual(best_rendition(renditions, 2000), 'b.jpg')
+        self.assertIsNone(best_rendition({}, 320))
+
+    def test_dhash_survives_reencoding(self):
+        """Test a resized JPEG copy hashes like the original and others don't."""
+        photo = Image.effect_mandelbrot((800, 600), (-2, -1.5, 1, 1.5), 100).convert('RGB')
+        copy = io.BytesIO()
+        photo.resize((400, 300)).save(copy, format='JPEG', quality=85)
+        copy.seek(0)
+        original_hash = dhash(self.save(photo))
+        self.assertLessEqual(hamming(original_hash, dhash(copy)), 3)
+        mirrored = self.save(photo.transpose(Image.FLIP_LEFT_RIGHT))
+        self.assertGreater(hamming(original_hash, dhash(mirrored)), 3)
+
+    def save(self, image):
+        """Return an image saved as an in-memory PNG."""
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        buffer.seek(0)
+        return buffer
+
+    def test_link_duplicates(self):
+        """Test near-identical hashes are linked to the earliest image."""
+        base = 0x0F0F_F0F0_1234_5678
+        rows = [(5, base ^ 0b101), (2, base), (9, base ^ (1 << 40)), (7, ~base)]
+        self.assertEqual(link_duplicates(rows), {5: 2, 9: 2})
+        self.assertEqual(len(set(hash_bands(base))), 4)
+
+
+class ChunkedUploadTests(SimpleTestCase):
+    """Test cases for chunked upload range handling."""
+
+    def test_parse_content_range(self):
+        """Test Content-Range headers are checked against the upload."""
+        upload = MediaUpload(total_size=1000)
+        self.assertEqual(parse_content_range('bytes 0-499/1000', upload), (0, 500))
+        self.assertEqual(parse_content_range('bytes 500-999/1000', upload), (500, 500))
+        for header in [None, 'bytes 0-499/2000', 'bytes 500-1000/1000', 'items 0-1/1000']:
+            with self.assertRaises(UploadError):
+                parse_content_range(header, upload)
+
+
+class ExpireUploadsTests(TestCase):
+    """Test cases for sweeping abandoned chunked uploads."""
+
+    def test_stale_uploads_and_files_are_removed(self):
+        """Test old unfinished uploads go, and stuck finalizing ones after longer."""
+        agent = User.objects.create_user(
+            email='uploads@example.com', password='UploadPass123', is_agent=True
+        )
+        listing = Property.objects.create(
+            title='Loft', description='A loft.', property_type=PropertyType.objects.create(name='Loft'),
+            address_line1='1 Main St', city='Austin', state='TX', zip_code='78701',
+            price=300000, bedrooms=2, bathrooms=1, square_feet=900, listed_by=agent,
+        )
+        with tempfile.TemporaryDirectory() as upload_dir, override_settings(CHUNKED_UPLOAD_DIR=upload_dir):
+            uploads = {}
+            for status, hours in [('uploading', 30), ('finalizing', 30), ('finalizing', 60), ('complete', 60)]:
+                upload = MediaUpload.objects.create(
+                    property=listing, uploaded_by=agent, kind='image', filename='a.jpg',
+                    total_size=10, status=status,
+                )
+                MediaUpload.objects.filter(pk=upload.pk).update(
+                    updated_at=timezone.now() - timedelta(hours=hours)
+                )
+                open(upload.temp_path, 'wb').close()
+                uploads[(status, hours)] = upload
+
+            self.assertEqual(expire_uploads(timedelta(hours=24)), 2)
+            remaining = set(MediaUpload.objects.values_list('pk', flat=True))
+            self.assertEqual(remaining, {uploads['finalizing', 30].pk, uploads['complete', 60].pk})
+            self.assertFalse(os.path.exists(uploads['finalizing', 60].temp_path))
+
+
+class PropertyImportTests(TestCase):
+    """Test cases for the bulk feed importer."""
+
+    HEADER = 'external_id,address_line1,city,state,zip_code,price,bedrooms,bathrooms,square_feet,latitude,longitude,features\n'
+
+    def setUp(self):
+        """Set up an agent to own imported listings."""
+        self.agent = User.objects.create_user(
+            email='feed@example.com', password='FeedPass123', is_agent=True
+        )
+
+    def run_import(self, rows):
+        """Import CSV rows and return the importer."""
+        feed = io.BytesIO((self.HEADER + rows).encode())
+        importer = PropertyImporter(self.agent, 'mls-test', notify=False)
+        return importer.run(read_records(feed, 'csv'))
+
+    def test_validate_rejects_bad_rows(self):
+        """Test column checks flag each bad row with a reason."""
+        rows = [
+            {'external_id': '1', 'address_line1': '1 A St', 'city': 'Austin', 'state': 'TX',
+             'zip_code': '78701', 'price': '$450,000', 'bedrooms': '3', 'bathrooms': '2',
+             'square_feet': '1500'},
+        ]
+        rows.append(dict(rows[0], bedrooms='2.5'))
+        rows.append(dict(rows[0], address_line1=''))
+        rows.append(dict(rows[0], latitude='30.2'))
+        columns, valid, reasons = validate(rows)
+        self.assertEqual(valid.tolist(), [True, False, False, False])
+        self.assertEqual(columns['price'][0], 450000)
+        self.assertEqual(reasons[1], 'bedrooms must be a whole number')
+        self.assertEqual(reasons[3], 'latitude and longitude must be given together')
+
+    def test_import_upserts_by_external_id(self):
+        """Test re-importing a feed updates listings instead of duplicating them."""
+        importer = self.run_import(
+            'A1,1 Oak St,Austin,TX,78701,450000,3,2,1500,30.27,-97.74,Pool;Fireplace\n'
+            'A2,,Austin,TX,78701,300000,2,1,900,,,\n'
+        )
+        self.assertEqual((importer.created, importer.skipped), (1, 1))
+        listing = Property.objects.get(listing_source='mls-test', external_id='A1')
+        self.assertEqual(listing.location.x, -97.74)
+        self.assertEqual(listing.price_per_sqft, 300)
+        self.assertEqual(set(listing.features.values_list('name', flat=True)), {'Pool', 'Fireplace'})
+
+        importer = self.run_import('A1,1 Oak St,Austin,TX,78701,425000,3,2,1500,30.27,-97.74,Pool\n')
+        self.assertEqual((importer.created, importer.updated), (0, 1))
+        listing.refresh_from_db()
+        self.assertEqual(listing.price, 425000)
+        self.assertEqual(list(listing.features.values_list('name', flat=True)), ['Pool'])
+        self.assertEqual(
+            list(listing.price_changes.values_list('change_reason', flat=True)),
+            ['Initial listing', 'Price change'],
+        )
+        self.assertEqual(len(listing.price_history), 2)
+
+    def test_overlong_text_is_a_row_error(self):
+        """Test values longer than their column are rejected row by row."""
+        importer = self.run_import(
+            'A1,1 Oak St,Austin,TX,787010000000000000000,450000,3,2,1500,,,\n'
+            f'A2,1 Oak St,{"x" * 101},TX,78701,450000,3,2,1500,,,\n'
+            'A3,1 Oak St,Austin,TX,78701,450000,3,2,1500,,,\n'
+        )
+        self.assertEqual((importer.created, importer.skipped), (1, 2))
+        self.assertEqual(
+            [error['error'] for error in importer.errors],
+            ['zip_code is longer than 20 characters', 'city is longer than 100 characters'],
+        )
+
+    def test_reimport_without_coordinates_keeps_location(self):
+        """Test a feed that omits coordinates doesn't clear the stored ones."""
+        self.run_import('A1,1 Oak St,Austin,TX,78701,450000,3,2,1500,30.27,-97.74,\n')
+        self.run_import('A1,1 Oak St,Austin,TX,78701,450000,3,2,1500,,,\n')
+        listing = Property.objects.get(listing_source='mls-test', external_id='A1')
+        self.assertAlmostEqual(listing.latitude, 30.27)
+        self.assertAlmostEqual(listing.location.x, -97.74)
+
+    def test_malformed_json_feeds(self):
+        """Test unreadable JSON is a feed error and non-object records are row errors."""
+        for payload in [b'{"value": [', b'{"value": 3}']:
+            with self.assertRaises(FeedError):
+                list(read_records(io.BytesIO(payload), 'json'))
+
+        records = read_records(io.BytesIO(b'[1, "two", {"external_id": "A1"}]'), 'json')
+        importer = PropertyImporter(self.agent, 'mls-test', notify=False).run(records)
+        self.assertEqual(importer.skipped, 3)
+        self.assertEqual(
+            [error['error'] for error in importer.errors],
+            ['record is not an object', 'record is not an object', 'address_line1 is required'],
+        )
+
+    def test_import_cannot_overwrite_another_agents_listing(self):
+        """Test a second agent reusing a source and ids gets separate listings."""
+        self.run_import('A1,1 Oak St,Austin,TX,78701,450000,3,2,1500,30.27,-97.74,\n')
+        other = User.objects.create_user(
+            email='rival@example.com', password='RivalPass123', is_agent=True
+        )
+        feed = io.BytesIO((self.HEADER + 'A1,1 Oak St,Austin,TX,78701,1,1,1,1,0,0,\n').encode())
+        importer = PropertyImporter(other, 'mls-test', notify=False).run(read_records(feed, 'csv'))
+        self.assertEqual((importer.created, importer.updated), (1, 0))
+
+        original = Property.objects.get(listed_by=self.agent, external_id='A1')
+        self.assertEqual(original.price, 450000)
+        self.assertEqual(original.latitude, 30.27)
+        self.assertEqual(Property.objects.filter(listing_source='mls-test', external_id='A1').count(), 2)
+
+
+class DataQualityScanTests(TestCase):
+    """Test cases for the data-quality scanner."""
+
+    def setUp(self):
+        """Set up one listing with valid coordinates and one at (0, 0)."""
+        agent = User.objects.create_user(
+            email='quality@example.com', password='QualityPass123', is_agent=True
+        )
+        property_type = PropertyType.objects.create(name='House')
+        data = {
+            'title': 'Test', 'description': 'Test', 'property_type': property_type,
+            'address_line1': '1 Main St', 'city': 'Austin', 'state': 'TX',
+            'zip_code': '78701', 'price': 300000,
+            'bedrooms': 3, 'bathrooms': 2, 'square_feet': 1000, 'listed_by': agent,
+            'latitude': 30.27, 'longitude': -97.74,
+        }
+        self.clean = Property.objects.create(**data)
+        self.broken = Property.objects.create(**data)
+        Property.objects.filter(pk=self.broken.pk).update(latitude=0, longitude=0)
+
+    def test_scan_records_violations(self):
+        """Test one pass flags each broken rule and stores the report."""
+        scan = QualityScanner(rules=['coordinate_bounds'], chunk_size=1).run()
+        self.assertEqual(scan.status, 'complete')
+        self.assertEqual(scan.scanned_count, 2)
+        self.assertEqual(scan.summary, {'coordinate_bounds': 1})
+        self.assertEqual(
+            list(scan.violations.values_list('property_id', 'message')),
+            [(self.broken.pk, 'coordinates are (0, 0)')],
+        )
+
+    def test_missing_primary_image(self):
+        """Test listings without a cover photo are flagged without saving a report."""
+        scanner = QualityScanner(rules=['missing_primary_image'], save=False)
+        scan = scanner.run(Property.objects.filter(pk=self.clean.pk))
+        self.assertIsNone(scan.pk)
+        self.assertEqual(scan.summary, {'missing_primary_image': 1})
+
+
+class GeocodingTests(TestCase):
+    """Test cases for cached, batched geocoding."""
+
+    ADDRESS = '1 Oak Street, Austin, TX 78701, United States'
+
+    def setUp(self):
+        """Set up a stand-in provider that knows one address."""
+        self.provider = StaticProvider({self.ADDRESS: (30.27, -97.74)})
+
+    def test_normalize_address(self):
+        """Test spelling variants of an address share a cache key."""
+        self.assertEqual(
+            normalize_address('1 Oak Street, Austin, TX  78701'),
+            normalize_address('1 OAK ST. AUSTIN TX 78701'),
+        )
+
+    def test_lookups_are_cached(self):
+        """Test each address reaches the provider once, misses included."""
+        addresses = [self.ADDRESS, '1 oak st, austin, tx 78701, usa', '9 Nowhere Rd']
+        coordinates = Geocoder(provider=self.provider).geocode_many(addresses)
+        self.assertEqual(coordinates[addresses[0]], (30.27, -97.74))
+        self.assertEqual(coordinates[addresses[1]], (30.27, -97.74))
+        self.assertIsNone(coordinates[addresses[2]])
+        self.assertEqual(self.provider.calls, 2)
+        self.assertEqual(GeocodedAddress.objects.count(), 2)
+
+        Geocoder(provider=self.provider).geocode_many(addresses)
+        self.assertEqual(self.provider.calls, 2)
+
+    def test_mapbox_unexpected_responses_fail_the_lookup(self):
+        """Test a Mapbox body without coordinates fails only that lookup."""
+        bodies = iter([b'not json', b'{"features": [{}]}', b'{"features": [{"center": [-97.74, 30.27]}]}'])
+        paths = []
+
+        def respond(request):
+            paths.append(request.url.path)
+            return httpx.Response(200, content=next(bodies))
+
+        async def lookups():
+            provider = MapboxProvider(concurrency=1, access_token='token')
+            provider.client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+            results = []
+            for _ in range(3):
+                try:
+                    results.append(await provider.geocode(self.ADDRESS))
+                except GeocodingError:
+                    results.append('failed')
+            await provider.client.aclose()
+            return results
+
+        self.assertEqual(asyncio.run(lookups()), ['failed', 'failed', (30.27, -97.74)])
+        self.assertTrue(paths[0].startswith('/geocoding/v5/mapbox.places-permanent/'))
+
+    def test_geocode_listings(self):
+        """Test listings without coordinates get them, and a location."""
+        agent = User.objects.create_user(
+            email='geo@example.com', password='GeoPass123', is_agent=True
+        )
+        listing = Property.objects.create(
+            title='Oak', description='Oak', property_type=PropertyType.objects.create(name='House'),
+            address_line1='1 Oak Street', city='Austin', state='TX', zip_code='78701',
+            price=300000, bedrooms=3, bathrooms=2, square_feet=1000, listed_by=agent,
+        )
+        updated = Geocoder(provider=self.provider).geocode_listings()
+        self.assertEqual(updated, 1)
+        listing.refresh_from_db()
+        self.assertEqual((listing.latitude, listing.longitude), (30.27, -97.74))
+        self.assertAlmostEqual(listing.location.x, -97.74)
+
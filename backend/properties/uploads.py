@@ -0,0 +1,154 @@
+"""
+Resumable chunked uploads for property media.
+
+Clients create a ``MediaUpload``, then PUT the file in pieces with a
+``Content-Range`` header. Each piece is streamed straight from the request
+into a partial file on shared temporary storage, so a web worker never holds
+more than one read buffer. A retried chunk may resend bytes the server
+already has; the upload status tells a client where to resume.
+"""
+
+import hashlib
+import os
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+from .models import MediaUpload, PropertyDocument, PropertyImage
+
+READ_BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadError(Exception):
+    """A chunk or finalize request that can't be applied."""
+
+
+def parse_content_range(header, upload):
+    """Return ``(start, length)`` from a ``Content-Range`` header."""
+    match = CONTENT_RANGE_RE.match(header or "")
+    if not match:
+        raise UploadError("Content-Range must look like 'bytes start-end/total'.")
+    start, end, total = (int(value) for value in match.groups())
+    if total != upload.total_size or end < start or end >= total:
+        raise UploadError("Content-Range doesn't fit this upload.")
+    length = end - start + 1
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError("Chunk is too large.")
+    return start, length
+
+
+def write_chunk(upload_id, stream, start, length):
+    """Stream one chunk into the upload's partial file.
+
+    Chunks must start at or before the first missing byte; overlapping
+    bytes are simply rewritten. The row lock keeps concurrent PUTs for the
+    same upload from interleaving. Returns the updated upload.
+    """
+    with transaction.atomic():
+        upload = MediaUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.status != "uploading":
+            raise UploadError(f"Upload is {upload.status}.")
+        if start > upload.received_bytes:
+            raise UploadError(
+                f"Chunk starts at {start} but only {upload.received_bytes} "
+                "bytes have been received."
+            )
+
+        os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+        mode = "r+b" if os.path.exists(upload.temp_path) else "wb"
+        written = 0
+        with open(upload.temp_path, mode) as partial:
+            partial.seek(start)
+            while written < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                partial.write(block)
+                written += len(block)
+        if written < length:
+            # Keep what arrived; the client resumes from received_bytes
+            upload.received_bytes = max(upload.received_bytes, start + written)
+            upload.save(update_fields=["received_bytes", "updated_at"])
+            raise UploadError(f"Expected {length} bytes but received {written}.")
+
+        upload.received_bytes = max(upload.received_bytes, start + length)
+        upload.save(update_fields=["received_bytes", "updated_at"])
+        return upload
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, reading it in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload):
+    """Turn a fully received upload into a property image or document.
+
+    The storage backend copies the partial file in chunks, so this never
+    loads it into memory either. Returns the created object.
+    """
+    if not upload.is_received or os.path.getsize(upload.temp_path) < upload.total_size:
+        raise UploadError("Upload is incomplete.")
+    if upload.sha256 and file_sha256(upload.temp_path) != upload.sha256.lower():
+        raise UploadError("Checksum mismatch.")
+    if upload.kind == "image":
+        try:
+            with Image.open(upload.temp_path) as image:
+                image.verify()
+        except Image.DecompressionBombError:
+            raise UploadError("Image has too many pixels.")
+        except (OSError, SyntaxError):
+            raise UploadError("File is not a valid image.")
+
+    with open(upload.temp_path, "rb") as handle:
+        content = File(handle, name=upload.filename)
+        with transaction.atomic():
+            if upload.kind == "image":
+                created = PropertyImage(
+                    property=upload.property, caption=upload.caption
+                )
+                created.image.save(upload.filename, content, save=True)
+                upload.image = created
+            else:
+                created = PropertyDocument(
+                    property=upload.property,
+                    title=upload.title or upload.filename,
+                    document_type=upload.document_type or "Other",
+                )
+                created.file.save(upload.filename, content, save=True)
+                upload.document = created
+            upload.status = "complete"
+            upload.save(update_fields=["image", "document", "status", "updated_at"])
+    os.remove(upload.temp_path)
+    return created
+
+
+def expire_uploads(max_age=None):
+    """Delete unfinished uploads older than ``max_age`` and their partial files.
+
+    Uploads stuck in "finalizing" (e.g. the worker died mid-task) are given
+    twice as long, so a finalize task waiting in a backed-up queue still
+    finds its file.
+    """
+    max_age = max_age or timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    now = timezone.now()
+    stale = MediaUpload.objects.filter(
+        Q(status__in=["uploading", "failed"], updated_at__lt=now - max_age)
+        | Q(status="finalizing", updated_at__lt=now - 2 * max_age)
+    )
+    count = 0
+    for upload in stale.iterator():
+        if os.path.exists(upload.temp_path):
+            os.remove(upload.temp_path)
+        upload.delete()
+        count += 1
+    return count
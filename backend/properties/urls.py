@@ -4,13 +4,19 @@ URL patterns for properties app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet, PropertyTypeViewSet, FeatureViewSet
+from .async_views import map_data
+from .views import PropertyViewSet, PropertyTypeViewSet, FeatureViewSet, MediaUploadViewSet, PropertyImportViewSet
 
 router = DefaultRouter()
+# Registered ahead of the '' prefix so its detail route doesn't swallow them
+router.register(r'uploads', MediaUploadViewSet, basename='media-upload')
+router.register(r'imports', PropertyImportViewSet, basename='property-import')
 router.register(r'', PropertyViewSet, basename='property')
 router.register(r'types', PropertyTypeViewSet, basename='property-type')
 router.register(r'features', FeatureViewSet, basename='feature')
 
 urlpatterns = [
+    # Async, so it's served without blocking under ASGI
+    path('map_data/', map_data, name='property-map-data'),
     path('', include(router.urls)),
 ]
@@ -2,11 +2,16 @@
 Views for property listings in DreamDwelling.
 """
 
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import viewsets, mixins, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 from .models import (
     Property,
     PropertyType,
@@ -15,6 +20,9 @@ from .models import (
     PropertyDocument,
     PropertyReview,
     OpenHouse,
+    PriceChange,
+    MediaUpload,
+    PropertyImport,
 )
 from .serializers import (
     PropertyListSerializer,
@@ -22,14 +30,28 @@ from .serializers import (
     PropertyTypeSerializer,
     FeatureSerializer,
     PropertyImageSerializer,
+    PropertyImageUploadSerializer,
     PropertyDocumentSerializer,
     PropertyReviewSerializer,
     OpenHouseSerializer,
     PropertyCreateUpdateSerializer,
+    PriceChangeSerializer,
+    MediaUploadSerializer,
+    PropertyImportSerializer,
 )
-from .permissions import IsOwnerOrReadOnly
+from favorites.models import Favorite
+from .permissions import IsAgent, IsOwnerOrReadOnly
+from .tasks import (
+    finalize_media_upload,
+    generate_image_renditions,
+    import_property_feed,
+)
+from .uploads import UploadError, parse_content_range, write_chunk
 from .filters import PropertyFilter
 
+# Bounds for price_drops ?days=
+MAX_PRICE_DROP_DAYS = 3650
+
 
 class PropertyViewSet(viewsets.ModelViewSet):
     """API endpoint for properties."""
@@ -50,9 +72,30 @@ class PropertyViewSet(viewsets.ModelViewSet):
         "state",
         "zip_code",
     ]
-    ordering_fields = ["price", "created_at", "bedrooms", "bathrooms", "square_feet"]
+    ordering_fields = [
+        "price",
+        "created_at",
+        "bedrooms",
+        "bathrooms",
+        "square_feet",
+        "price_per_sqft",
+        "price_per_bedroom",
+        "monthly_cost",
+    ]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        """Annotate whether each property is in the current user's favorites."""
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # primary_image is a column, so cards need no image queries
+            queryset = queryset.select_related("property_type", "primary_image")
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Favorite.is_favorited_by(self.request.user)
+            )
+        return queryset
+
     def get_serializer_class(self):
         """Return appropriate serializer class."""
         if self.action == "list":
@@ -64,13 +107,17 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Increment views count on property retrieve."""
         instance = self.get_object()
+        # Increment in the database: this read may come from a lagging replica
+        Property.objects.filter(pk=instance.pk).update(
+            views_count=F("views_count") + 1
+        )
         instance.views_count += 1
-        instance.save(update_fields=["views_count"])
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
     @action(detail=True, methods=["post"])
     def add_images(self, request, pk=None):
-        """Add images to a property."""
+        """Add images to a property; responds with the list of created images."""
         property_instance = self.get_object()
 
         # Check if the user owns this property
@@ -82,19 +129,108 @@ class PropertyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Check if primary image is being set
-        is_primary = request.data.get("is_primary", False)
-        if is_primary:
-            # Unset any existing primary image
-            PropertyImage.objects.filter(
-                property=property_instance, is_primary=True
-            ).update(is_primary=False)
+        # Several files may be sent as "images"; a single one as "image".
+        # Only the first of a batch can become the primary image.
+        files = request.FILES.getlist("images") or request.FILES.getlist("image")
+        uploads = [
+            PropertyImageUploadSerializer(
+                data={
+                    "image": upload,
+                    "caption": request.data.get("caption", ""),
+                    "is_primary": index == 0 and request.data.get("is_primary", False),
+                    "order": request.data.get("order", 0),
+                }
+            )
+            for index, upload in enumerate(files)
+        ]
+        if not uploads:
+            return Response(
+                {"image": ["No file was submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for upload in uploads:
+            if not upload.is_valid():
+                return Response(upload.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = PropertyImageSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(property=property_instance)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if uploads[0].validated_data["is_primary"]:
+                # Unset any existing primary image
+                PropertyImage.objects.filter(
+                    property=property_instance, is_primary=True
+                ).update(is_primary=False)
+            images = [upload.save(property=property_instance) for upload in uploads]
+            # Renditions are rendered by a worker once the rows are committed
+            for image in images:
+                transaction.on_commit(
+                    lambda image_id=image.pk: generate_image_renditions.delay(image_id)
+                )
+
+        data = PropertyImageSerializer(
+            images, many=True, context=self.get_serializer_context()
+        ).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def reorder_images(self, request, pk=None):
+        """Reorder a property's gallery from a list of every image id."""
+        property_instance = self.get_object()
+
+        # Check if the user owns this property
+        if property_instance.listed_by != request.user:
+            return Response(
+                {
+                    "detail": "You do not have permission to reorder images of this property."
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        images = {image.pk: image for image in property_instance.images.all()}
+        try:
+            order = [int(image_id) for image_id in request.data.get("order", [])]
+        except (TypeError, ValueError):
+            order = None
+        if order is None or sorted(order) != sorted(images):
+            return Response(
+                {"detail": "order must list every image id of this property once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            for position, image_id in enumerate(order):
+                images[image_id].order = position
+            PropertyImage.objects.bulk_update(images.values(), ["order"])
+            Property.refresh_primary_images([property_instance.pk])
+
+        serializer = PropertyImageSerializer(
+            [images[image_id] for image_id in order],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["delete"],
+        url_path="images/(?P<image_id>[^/.]+)",
+    )
+    def remove_image(self, request, pk=None, image_id=None):
+        """Remove one image from a property's gallery."""
+        property_instance = self.get_object()
+
+        # Check if the user owns this property
+        if property_instance.listed_by != request.user:
+            return Response(
+                {
+                    "detail": "You do not have permission to remove images from this property."
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        image = get_object_or_404(
+            PropertyImage, pk=image_id, property=property_instance
+        )
+        image.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=["post"])
     def add_document(self, request, pk=None):
@@ -157,41 +293,47 @@ class PropertyViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=["get"])
-    def map_data(self, request):
-        """Return property locations for map display."""
-        queryset = self.filter_queryset(self.get_queryset())
+    @action(detail=True, methods=["get"])
+    def price_history(self, request, pk=None):
+        """Return the full price history, optionally limited to ?start=&end= dates."""
+        property_instance = self.get_object()
+        try:
+            start = parse_date(request.query_params.get("start") or "")
+            end = parse_date(request.query_params.get("end") or "")
+        except ValueError:
+            return Response(
+                {"detail": "Invalid date."}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Filter out properties without location data
-        queryset = queryset.exclude(latitude__isnull=True).exclude(
-            longitude__isnull=True
-        )
+        changes = property_instance.price_changes.between(start, end)
+        return Response(PriceChangeSerializer(changes, many=True).data)
 
-        map_data = []
-        for property_obj in queryset:
-            map_data.append(
-                {
-                    "id": property_obj.id,
-                    "title": property_obj.title,
-                    "price": float(property_obj.price),
-                    "latitude": property_obj.latitude,
-                    "longitude": property_obj.longitude,
-                    "address": property_obj.get_full_address(),
-                    "property_type": property_obj.property_type.name,
-                    "bedrooms": property_obj.bedrooms,
-                    "bathrooms": float(property_obj.bathrooms),
-                    "square_feet": property_obj.square_feet,
-                    "listing_type": property_obj.listing_type,
-                    "status": property_obj.status,
-                    "primary_image": property_obj.images.filter(is_primary=True)
-                    .first()
-                    .image.url
-                    if property_obj.images.filter(is_primary=True).exists()
-                    else None,
-                }
+    @action(detail=False, methods=["get"])
+    def price_drops(self, request):
+        """Return price reductions from the last ?days= days (default 30)."""
+        try:
+            days = int(request.query_params.get("days", 30))
+        except ValueError:
+            days = None
+        if days is None or not 1 <= days <= MAX_PRICE_DROP_DAYS:
+            return Response(
+                {"detail": f"days must be an integer from 1 to {MAX_PRICE_DROP_DAYS}."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return Response(map_data)
+        since = timezone.localdate() - timedelta(days=days)
+        changes = (
+            PriceChange.objects.between(start=since)
+            .drops()
+            .filter(property__in=self.filter_queryset(self.get_queryset()))
+            .order_by("-date", "-id")
+        )
+        page = self.paginate_queryset(changes)
+        if page is not None:
+            return self.get_paginated_response(
+                PriceChangeSerializer(page, many=True).data
+            )
+        return Response(PriceChangeSerializer(changes, many=True).data)
 
 
 class PropertyTypeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -211,3 +353,105 @@ class FeatureViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ["name", "category"]
     filterset_fields = ["category"]
+
+
+class MediaUploadViewSet(
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """API endpoint for resumable chunked uploads of property media.
+
+    POST creates an upload, PUT ``{id}/chunk/`` with a ``Content-Range``
+    header appends bytes, GET ``{id}/`` reports how many bytes arrived and
+    POST ``{id}/complete/`` hands the file to a worker.
+    """
+
+    serializer_class = MediaUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Return the current user's uploads."""
+        # Handle anonymous users during schema generation
+        if getattr(self, "swagger_fake_view", False):
+            return MediaUpload.objects.none()
+        return MediaUpload.objects.filter(uploaded_by=self.request.user)
+
+    def perform_create(self, serializer):
+        """Save the current user as the uploader."""
+        serializer.save(uploaded_by=self.request.user)
+
+    @action(detail=True, methods=["put"])
+    def chunk(self, request, pk=None):
+        """Stream one chunk of the file from the raw request body."""
+        upload = self.get_object()
+        try:
+            start, length = parse_content_range(
+                request.headers.get("Content-Range"), upload
+            )
+            # request.stream, not request.data: the body is never buffered
+            upload = write_chunk(upload.pk, request.stream, start, length)
+        except UploadError as exc:
+            upload.refresh_from_db()
+            return Response(
+                {"detail": str(exc), "received_bytes": upload.received_bytes},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        """Queue assembly of a fully received upload."""
+        upload = self.get_object()
+        # Conditional UPDATE so a double submit queues only one task
+        updated = MediaUpload.objects.filter(
+            pk=upload.pk, status="uploading", received_bytes=F("total_size")
+        ).update(status="finalizing", updated_at=timezone.now())
+        upload.refresh_from_db()
+        if not updated and upload.status != "finalizing":
+            return Response(
+                {
+                    "detail": "Upload is not complete.",
+                    "received_bytes": upload.received_bytes,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        if updated:
+            transaction.on_commit(
+                lambda: finalize_media_upload.delay(str(upload.pk))
+            )
+        return Response(
+            self.get_serializer(upload).data, status=status.HTTP_202_ACCEPTED
+        )
+
+
+class PropertyImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """API endpoint for bulk listing imports from feed files.
+
+    POST a CSV, JSON or JSON Lines file to queue an import; GET ``{id}/``
+    reports its progress and the rows that were rejected.
+    """
+
+    serializer_class = PropertyImportSerializer
+    permission_classes = [IsAgent]
+
+    def get_queryset(self):
+        """Return the current user's imports."""
+        # Handle anonymous users during schema generation
+        if getattr(self, "swagger_fake_view", False):
+            return PropertyImport.objects.none()
+        return PropertyImport.objects.filter(uploaded_by=self.request.user)
+
+    def perform_create(self, serializer):
+        """Save the current user as the uploader and queue the import."""
+        job = serializer.save(uploaded_by=self.request.user)
+        transaction.on_commit(lambda: import_property_feed.delay(job.pk))
+
+    def create(self, request, *args, **kwargs):
+        """Queue an import; it runs in the background, hence 202."""
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
@@ -3,9 +3,9 @@ URL patterns for search app.
 """
 
 from django.urls import path
-from .views import PropertiesSearchView, AutocompleteSearchView
+from .views import properties_search, autocomplete
 
 urlpatterns = [
-    path('properties/', PropertiesSearchView.as_view(), name='property-search'),
-    path('autocomplete/', AutocompleteSearchView.as_view(), name='location-autocomplete'),
+    path('properties/', properties_search, name='property-search'),
+    path('autocomplete/', autocomplete, name='location-autocomplete'),
 ]
@@ -9,25 +9,78 @@ This script creates realistic dummy data for the DreamDwelling platform includin
 - Reviews and open houses
 - Favorites and analytics data
 
+Everything is written with bulk inserts in batches, so load-test sized
+datasets (millions of listings) take minutes. Property batches can be
+spread over worker processes; each batch is seeded from ``--seed`` and its
+index, so a run is reproducible whatever the number of workers.
+
 Run this script from the Django management commands directory.
 """
 
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from decimal import Decimal
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.contrib.auth import get_user_model
-from decimal import Decimal
-import random
-from datetime import timedelta
 from faker import Faker
 
 # Import models
-from properties.models import PropertyType, Feature, Property, PropertyReview, OpenHouse
+from analytics.models import ListingStats
+from config.db import close_connections_before_fork
+from properties.models import (
+    PropertyType,
+    Feature,
+    Property,
+    PriceChange,
+    PropertyReview,
+    OpenHouse,
+)
 from neighborhoods.models import Neighborhood, School
 from favorites.models import Favorite
 
 User = get_user_model()
 fake = Faker()
 
+# Shared context for property batches: the batch size and the ids of the
+# users, types, features and neighborhoods they draw from. Set in each
+# worker by _init_worker.
+_batch_context = None
+
+
+def _init_worker(context):
+    """Set up Django and the batch context in spawned worker processes."""
+    global _batch_context
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    _batch_context = context
+
+
+def seed_batch(seed, batch_index):
+    """Seed ``random`` and Faker for one batch so its output is reproducible."""
+    batch_seed = seed * 1_000_003 + batch_index
+    random.seed(batch_seed)
+    fake.seed_instance(batch_seed)
+
+
+def generate_property_batch(batch_index, count, seed):
+    """Create one batch of properties and their related rows in a worker."""
+    from django.db import connection
+
+    seed_batch(seed, batch_index)
+    created = Command().create_property_batch(batch_index, count, _batch_context)
+    connection.close()
+    return created
+
 
 class Command(BaseCommand):
     help = "Generate dummy data for DreamDwelling platform"
@@ -45,36 +98,74 @@ class Command(BaseCommand):
             default=20,
             help="Number of neighborhoods to create",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows built and inserted per batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes generating property batches",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Random seed for a reproducible dataset (default: random)",
+        )
+        parser.add_argument(
+            "--password",
+            default="dreamdwelling",
+            help="Password shared by every generated user",
+        )
 
     def handle(self, *args, **options):
+        started = time.monotonic()
+        seed = options["seed"]
+        if seed is None:
+            seed = random.randrange(2**31)
+        self.batch_size = options["batch_size"]
         self.stdout.write(
-            self.style.SUCCESS("🏠 Starting DreamDwelling dummy data generation...")
+            self.style.SUCCESS(
+                f"🏠 Starting DreamDwelling dummy data generation (seed {seed})..."
+            )
         )
 
         # Clear existing data
         self.clear_existing_data()
 
         # Create data
-        users = self.create_users(options["users"])
+        seed_batch(seed, -1)
+        users = self.create_users(options["users"], options["password"])
         property_types = self.create_property_types()
         features = self.create_features()
         neighborhoods = self.create_neighborhoods(options["neighborhoods"])
-        properties = self.create_properties(
-            options["properties"], users, property_types, features, neighborhoods
+        counts = self.create_properties(
+            options["properties"],
+            users,
+            property_types,
+            features,
+            neighborhoods,
+            options["workers"],
+            seed,
         )
 
         # Create related data
-        self.create_property_reviews(properties, users)
-        self.create_open_houses(properties, users)
-        self.create_favorites(properties, users)
+        seed_batch(seed, -2)
+        favorites = self.create_favorites(users)
+        ListingStats.objects.refresh()
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"✅ Successfully created dummy data:\n"
+                f"✅ Successfully created dummy data in "
+                f"{time.monotonic() - started:.1f}s:\n"
                 f"   👥 {len(users)} users\n"
-                f"   🏠 {len(properties)} properties\n"
+                f"   🏠 {counts['properties']} properties\n"
                 f"   🏘️  {len(neighborhoods)} neighborhoods\n"
-                f"   📊 Reviews and open houses data"
+                f"   📊 {counts['reviews']} reviews, {counts['open_houses']} "
+                f"open houses and {favorites} favorites"
             )
         )
 
@@ -95,39 +186,54 @@ class Command(BaseCommand):
         # Keep superusers but remove regular users
         User.objects.filter(is_superuser=False).delete()
 
-    def create_users(self, count):
-        """Create realistic users including agents and clients."""
+    def create_users(self, count, password):
+        """Create realistic users including agents and clients.
+
+        Returns ``(id, is_agent)`` pairs. The password is hashed once and
+        shared, since hashing is deliberately slow.
+        """
         self.stdout.write(f"👥 Creating {count} users...")
 
-        users = []
+        password_hash = make_password(password)
+        batch = []
 
         for i in range(count):
             is_agent = random.choice([True, False])
 
             first_name = fake.first_name()
             last_name = fake.last_name()
-            email = f"{first_name.lower()}.{last_name.lower()}@{fake.domain_name()}"
-
-            user = User.objects.create_user(
-                username=email,
-                email=email,
-                first_name=first_name,
-                last_name=last_name,
-                phone_number=fake.phone_number()[:15],
-                bio=self.generate_user_bio(is_agent),
-                is_agent=is_agent,
-                license_number=fake.bothify("##?####") if is_agent else "",
-                brokerage=fake.company() if is_agent else "",
-                date_joined=fake.date_time_between(
-                    start_date="-2y",
-                    end_date="now",
-                    tzinfo=timezone.get_current_timezone(),
-                ),
+            # The index keeps emails unique however many users are made
+            email = f"{first_name.lower()}.{last_name.lower()}{i}@{fake.domain_name()}"
+
+            batch.append(
+                User(
+                    username=email,
+                    email=email,
+                    password=password_hash,
+                    first_name=first_name,
+                    last_name=last_name,
+                    phone_number=fake.phone_number()[:15],
+                    bio=self.generate_user_bio(is_agent),
+                    is_agent=is_agent,
+                    license_number=fake.bothify("##?####") if is_agent else "",
+                    brokerage=fake.company() if is_agent else "",
+                    date_joined=fake.date_time_between(
+                        start_date="-2y",
+                        end_date="now",
+                        tzinfo=timezone.get_current_timezone(),
+                    ),
+                )
             )
-
-            users.append(user)
-
-        return users
+            if len(batch) >= self.batch_size:
+                User.objects.bulk_create(batch)
+                batch = []
+        User.objects.bulk_create(batch)
+
+        return list(
+            User.objects.filter(is_superuser=False)
+            .order_by("id")
+            .values_list("id", "is_agent")
+        )
 
     def generate_user_bio(self, is_agent):
         """Generate appropriate bio based on user type."""
@@ -169,12 +275,12 @@ class Command(BaseCommand):
             ("Penthouse", "Top-floor luxury apartment with premium amenities"),
         ]
 
-        property_types = []
-        for name, description in property_types_data:
-            pt = PropertyType.objects.create(name=name, description=description)
-            property_types.append(pt)
-
-        return property_types
+        return PropertyType.objects.bulk_create(
+            [
+                PropertyType(name=name, description=description)
+                for name, description in property_types_data
+            ]
+        )
 
     def create_features(self):
         """Create property features."""
@@ -225,12 +331,12 @@ class Command(BaseCommand):
             ("Storage Unit", "Amenities", "boxes"),
         ]
 
-        features = []
-        for name, category, icon in features_data:
-            feature = Feature.objects.create(name=name, category=category, icon=icon)
-            features.append(feature)
-
-        return features
+        return Feature.objects.bulk_create(
+            [
+                Feature(name=name, category=category, icon=icon)
+                for name, category, icon in features_data
+            ]
+        )
 
     def create_neighborhoods(self, count):
         """Create neighborhoods with realistic data."""
@@ -353,34 +459,91 @@ class Command(BaseCommand):
 
         return f"{name} is a {random.choice(descriptors)} neighborhood in {city} known for its {random.choice(amenities)} and {random.choice(amenities)}. The area offers excellent {random.choice(['walkability', 'dining options', 'nightlife', 'family amenities', 'cultural attractions'])} and is conveniently located near major {random.choice(['business districts', 'universities', 'hospitals', 'shopping areas'])}."
 
-    def create_properties(self, count, users, property_types, features, neighborhoods):
-        """Create realistic property listings."""
-        self.stdout.write(f"🏠 Creating {count} properties...")
+    def create_properties(
+        self, count, users, property_types, features, neighborhoods, workers, seed
+    ):
+        """Create realistic property listings with their reviews and open houses.
 
-        properties = []
+        Listings are generated in batches, in parallel when ``workers`` > 1.
+        Returns the number of properties, reviews and open houses created.
+        """
+        self.stdout.write(f"🏠 Creating {count} properties...")
 
         # Filter for agents to list properties
-        agents = [u for u in users if u.is_agent]
-        if not agents:
-            agents = users[:10]  # Use first 10 users as agents if no specific agents
+        agent_ids = [user_id for user_id, is_agent in users if is_agent]
+        if not agent_ids:
+            # Use first 10 users as agents if no specific agents
+            agent_ids = [user_id for user_id, _ in users[:10]]
+        context = {
+            "batch_size": self.batch_size,
+            "user_ids": [user_id for user_id, _ in users],
+            "agent_ids": agent_ids,
+            "property_types": [(pt.pk, pt.name) for pt in property_types],
+            "feature_ids": [feature.pk for feature in features],
+            "neighborhoods": [
+                (n.city, n.state, n.zip_codes.split(","), n.boundary_points)
+                for n in neighborhoods
+            ],
+        }
+        batches = [
+            (index, min(self.batch_size, count - start))
+            for index, start in enumerate(range(0, count, self.batch_size))
+        ]
 
-        for i in range(count):
-            neighborhood = random.choice(neighborhoods)
-            property_type = random.choice(property_types)
+        totals = {"properties": 0, "reviews": 0, "open_houses": 0}
+        if workers <= 1:
+            for index, size in batches:
+                seed_batch(seed, index)
+                created = self.create_property_batch(index, size, context)
+                for key, value in created.items():
+                    totals[key] += value
+                self.stdout.write(f"   ...{totals['properties']} properties")
+            return totals
+
+        # Forked children must not share the parent's database socket
+        close_connections_before_fork()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(context,)
+        ) as pool:
+            futures = [
+                pool.submit(generate_property_batch, index, size, seed)
+                for index, size in batches
+            ]
+            for future in as_completed(futures):
+                for key, value in future.result().items():
+                    totals[key] += value
+                self.stdout.write(f"   ...{totals['properties']} properties")
+        return totals
+
+    def create_property_batch(self, batch_index, count, context):
+        """Build and bulk insert one batch of properties and related rows.
+
+        Reads everything it needs from ``context``, not from ``self``: in
+        worker processes this runs on a fresh ``Command``.
+        """
+        properties = []
+        feature_ids = []
+        first = batch_index * context["batch_size"]
+
+        for i in range(first, first + count):
+            city, state, zip_codes, boundary_points = random.choice(
+                context["neighborhoods"]
+            )
+            property_type_id, property_type = random.choice(context["property_types"])
 
             # Generate realistic property details based on type
             bedrooms, bathrooms, sqft, price = self.generate_property_specs(
-                property_type.name
+                property_type
             )
 
             # Generate address
             address_line1 = f"{random.randint(100, 9999)} {fake.street_name()}"
 
             # Generate coordinates near the neighborhood
-            if neighborhood.boundary_points:
+            if boundary_points:
                 # Get a random point within the neighborhood boundary
                 base_coords = random.choice(
-                    neighborhood.boundary_points[:-1]
+                    boundary_points[:-1]
                 )  # Exclude duplicate closing point
                 lat = float(base_coords[1]) + random.uniform(-0.005, 0.005)
                 lng = float(base_coords[0]) + random.uniform(-0.005, 0.005)
@@ -388,84 +551,123 @@ class Command(BaseCommand):
                 lat = float(fake.latitude())
                 lng = float(fake.longitude())
 
-            # Create property
-            property_obj = Property.objects.create(
-                title=self.generate_property_title(
-                    property_type.name, neighborhood.city
-                ),
-                description=self.generate_property_description(
-                    property_type.name, bedrooms, bathrooms
-                ),
-                property_type=property_type,
-                status=random.choices(
-                    ["available", "pending", "sold", "off_market"],
-                    weights=[70, 15, 10, 5],
-                )[0],
-                listing_type=random.choices(
-                    ["sale", "rent", "both"], weights=[60, 35, 5]
-                )[0],
-                # Address
-                address_line1=address_line1,
-                address_line2=random.choice(
-                    [
-                        "",
-                        f"Apt {random.randint(1, 50)}",
-                        f"Unit {random.randint(1, 100)}",
-                    ]
-                ),
-                city=neighborhood.city,
-                state=neighborhood.state,
-                zip_code=random.choice(neighborhood.zip_codes.split(",")),
-                latitude=lat,
-                longitude=lng,
-                # Pricing
-                price=Decimal(price),
-                price_per_sqft=Decimal(price / sqft) if sqft > 0 else None,
-                monthly_rent=Decimal(price * 0.004)
-                if random.choice([True, False])
-                else None,
-                hoa_fee=Decimal(random.randint(0, 800))
-                if random.choice([True, False])
-                else None,
-                # Details
-                bedrooms=bedrooms,
-                bathrooms=Decimal(bathrooms),
-                half_bathrooms=random.randint(0, 2),
-                square_feet=sqft,
-                lot_size=Decimal(random.randint(1000, 50000))
-                if property_type.name in ["Single Family Home", "Land"]
-                else None,
-                year_built=random.randint(1950, 2024),
-                parking_spaces=random.randint(0, 4),
-                # Features
-                has_air_conditioning=random.choice([True, False]),
-                has_heating=True,
-                pets_allowed=random.choice([True, False]),
-                furnished=random.choice([True, False]),
-                # Listing info
-                listed_by=random.choice(agents),
-                published_at=fake.date_time_between(
-                    start_date="-1y",
-                    end_date="now",
-                    tzinfo=timezone.get_current_timezone(),
-                ),
-                views_count=random.randint(0, 1000),
-                favorites_count=random.randint(0, 50),
-                # Virtual tour
-                virtual_tour_url=f"https://virtualtour.example.com/property/{i}"
-                if random.choice([True, False])
-                else "",
-                # Price history
-                price_history=self.generate_price_history(price),
+            properties.append(
+                Property(
+                    title=self.generate_property_title(property_type, city),
+                    description=self.generate_property_description(
+                        property_type, bedrooms, bathrooms
+                    ),
+                    property_type_id=property_type_id,
+                    status=random.choices(
+                        ["available", "pending", "sold", "off_market"],
+                        weights=[70, 15, 10, 5],
+                    )[0],
+                    listing_type=random.choices(
+                        ["sale", "rent", "both"], weights=[60, 35, 5]
+                    )[0],
+                    # Address
+                    address_line1=address_line1,
+                    address_line2=random.choice(
+                        [
+                            "",
+                            f"Apt {random.randint(1, 50)}",
+                            f"Unit {random.randint(1, 100)}",
+                        ]
+                    ),
+                    city=city,
+                    state=state,
+                    zip_code=random.choice(zip_codes),
+                    # bulk_create skips Property.save(), so set the point here
+                    location=Point(lng, lat),
+                    latitude=lat,
+                    longitude=lng,
+                    # Pricing
+                    price=Decimal(price),
+                    monthly_rent=(
+                        Decimal(price * 0.004) if random.choice([True, False]) else None
+                    ),
+                    hoa_fee=(
+                        Decimal(random.randint(0, 800))
+                        if random.choice([True, False])
+                        else None
+                    ),
+                    # Details
+                    bedrooms=bedrooms,
+                    bathrooms=Decimal(bathrooms),
+                    half_bathrooms=random.randint(0, 2),
+                    square_feet=sqft,
+                    lot_size=(
+                        Decimal(random.randint(1000, 50000))
+                        if property_type in ["Single Family Home", "Land"]
+                        else None
+                    ),
+                    year_built=random.randint(1950, 2024),
+                    parking_spaces=random.randint(0, 4),
+                    # Features
+                    has_air_conditioning=random.choice([True, False]),
+                    has_heating=True,
+                    pets_allowed=random.choice([True, False]),
+                    furnished=random.choice([True, False]),
+                    # Listing info
+                    listed_by_id=random.choice(context["agent_ids"]),
+                    published_at=fake.date_time_between(
+                        start_date="-1y",
+                        end_date="now",
+                        tzinfo=timezone.get_current_timezone(),
+                    ),
+                    views_count=random.randint(0, 1000),
+                    # Virtual tour
+                    virtual_tour_url=(
+                        f"https://virtualtour.example.com/property/{i}"
+                        if random.choice([True, False])
+                        else ""
+                    ),
+                    # Price history
+                    price_history=self.generate_price_history(price),
+                )
+            )
+            # Pick random features
+            feature_ids.append(
+                random.sample(context["feature_ids"], random.randint(3, 8))
             )
 
-            # Add random features
-            property_features = random.sample(features, random.randint(3, 8))
-            property_obj.features.add(*property_features)
-
-            properties.append(property_obj)
+        with transaction.atomic():
+            Property.objects.bulk_create(properties)
+            PropertyFeature = Property.features.through
+            PropertyFeature.objects.bulk_create(
+                [
+                    PropertyFeature(property_id=property_obj.pk, feature_id=feature_id)
+                    for property_obj, ids in zip(properties, feature_ids)
+                    for feature_id in ids
+                ]
+            )
+            # price_history is only a summary; the API reads PriceChange rows
+            PriceChange.objects.bulk_create(
+                [
+                    PriceChange(
+                        property_id=property_obj.pk,
+                        date=date.fromisoformat(entry["date"]),
+                        price=Decimal(entry["price"]),
+                        previous_price=(
+                            Decimal(previous["price"]) if previous else None
+                        ),
+                        change_reason=entry["change_reason"],
+                    )
+                    for property_obj in properties
+                    for previous, entry in zip(
+                        [None] + property_obj.price_history,
+                        property_obj.price_history,
+                    )
+                ]
+            )
+            reviews = self.create_property_reviews(properties, context["user_ids"])
+            open_houses = self.create_open_houses(properties, context["agent_ids"])
 
-        return properties
+        return {
+            "properties": len(properties),
+            "reviews": reviews,
+            "open_houses": open_houses,
+        }
 
     def generate_property_specs(self, property_type):
         """Generate realistic bedrooms, bathrooms, sqft, and price based on property type."""
@@ -578,38 +780,33 @@ class Command(BaseCommand):
 
         return sorted(history, key=lambda x: x["date"])
 
-    def create_property_reviews(self, properties, users):
-        """Create property reviews."""
-        self.stdout.write("⭐ Creating property reviews...")
-
-        # Create reviews for random properties
-        reviewed_properties = random.sample(properties, min(len(properties), 100))
+    def create_property_reviews(self, properties, user_ids):
+        """Create reviews for half of a batch of properties."""
+        reviews = []
+        reviewed_properties = random.sample(properties, len(properties) // 2)
 
         for property_obj in reviewed_properties:
             # Random number of reviews per property
             num_reviews = random.randint(1, 8)
-            reviewers = random.sample(users, min(len(users), num_reviews))
+            reviewers = random.sample(user_ids, min(len(user_ids), num_reviews))
 
-            for user in reviewers:
+            for user_id in reviewers:
                 rating = random.choices(
                     [1, 2, 3, 4, 5],
                     weights=[5, 10, 15, 35, 35],  # Skew toward positive reviews
                 )[0]
 
-                comment = self.generate_review_comment(rating)
-
-                PropertyReview.objects.create(
-                    property=property_obj,
-                    user=user,
-                    rating=rating,
-                    comment=comment,
-                    created_at=fake.date_time_between(
-                        start_date="-1y",
-                        end_date="now",
-                        tzinfo=timezone.get_current_timezone(),
-                    ),
+                reviews.append(
+                    PropertyReview(
+                        property_id=property_obj.pk,
+                        user_id=user_id,
+                        rating=rating,
+                        comment=self.generate_review_comment(rating),
+                    )
                 )
 
+        return len(PropertyReview.objects.bulk_create(reviews))
+
     def generate_review_comment(self, rating):
         """Generate review comments based on rating."""
         if rating >= 4:
@@ -637,20 +834,15 @@ class Command(BaseCommand):
 
         return random.choice(comments)
 
-    def create_open_houses(self, properties, users):
-        """Create open house events."""
-        self.stdout.write("🏡 Creating open house events...")
-
+    def create_open_houses(self, properties, agent_ids):
+        """Create open house events for a quarter of a batch of properties."""
         # Create open houses for available properties
         available_properties = [p for p in properties if p.status == "available"]
         open_house_properties = random.sample(
-            available_properties, min(len(available_properties), 50)
+            available_properties, min(len(available_properties), len(properties) // 4)
         )
 
-        agents = [u for u in users if u.is_agent]
-        if not agents:
-            agents = users[:10]
-
+        open_houses = []
         for property_obj in open_house_properties:
             # Some properties have multiple open houses
             num_events = random.randint(1, 3)
@@ -665,32 +857,47 @@ class Command(BaseCommand):
                 # Typically 2-3 hours long
                 end_time = start_time + timedelta(hours=random.randint(2, 3))
 
-                OpenHouse.objects.create(
-                    property=property_obj,
-                    start_time=start_time,
-                    end_time=end_time,
-                    description=f"Open house for {property_obj.title}. Come see this beautiful property!",
-                    hosted_by=random.choice(agents),
+                open_houses.append(
+                    OpenHouse(
+                        property_id=property_obj.pk,
+                        start_time=start_time,
+                        end_time=end_time,
+                        description=f"Open house for {property_obj.title}. Come see this beautiful property!",
+                        hosted_by_id=random.choice(agent_ids),
+                    )
                 )
 
-    def create_favorites(self, properties, users):
-        """Create user favorites."""
+        return len(OpenHouse.objects.bulk_create(open_houses))
+
+    def create_favorites(self, users):
+        """Create user favorites and set each property's favorites count."""
         self.stdout.write("❤️ Creating user favorites...")
 
+        property_ids = list(Property.objects.values_list("id", flat=True))
+        batch = []
+        created = 0
+
         # Each user favorites 5-15 random properties
-        for user in users:
+        for user_id, _ in users:
             num_favorites = random.randint(5, 15)
-            favorite_properties = random.sample(
-                properties, min(len(properties), num_favorites)
-            )
-
-            for property_obj in favorite_properties:
-                Favorite.objects.create(
-                    user=user,
-                    property=property_obj,
-                    created_at=fake.date_time_between(
-                        start_date="-6m",
-                        end_date="now",
-                        tzinfo=timezone.get_current_timezone(),
-                    ),
-                )
+            for property_id in random.sample(
+                property_ids, min(len(property_ids), num_favorites)
+            ):
+                batch.append(Favorite(user_id=user_id, property_id=property_id))
+            if len(batch) >= self.batch_size:
+                created += len(Favorite.objects.bulk_create(batch))
+                batch = []
+        created += len(Favorite.objects.bulk_create(batch))
+
+        # bulk_create skips Favorite.save(), which keeps the count in step
+        favorite_count = (
+            Favorite.objects.filter(property=OuterRef("pk"))
+            .order_by()
+            .values("property")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        Property.objects.update(
+            favorites_count=Coalesce(Subquery(favorite_count), Value(0))
+        )
+        return created
@@ -1,10 +1,17 @@
 """
 Display statistics about the generated dummy data.
+
+Each section is one grouped aggregate query, so the report stays fast on
+production-sized tables and can double as an inventory/health check
+(``--json``).
 """
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connection, models
 from properties.models import (
     Property,
     PropertyType,
@@ -18,90 +25,181 @@ from favorites.models import Favorite
 
 User = get_user_model()
 
+STATUS_ICONS = {
+    "available": "✅",
+    "pending": "⏳",
+    "sold": "✔️",
+    "off_market": "🚫",
+}
+
+
+def user_stats():
+    """Count users and agents in one scan."""
+    stats = User.objects.aggregate(
+        total=models.Count("id"),
+        agents=models.Count("id", filter=models.Q(is_agent=True)),
+    )
+    stats["clients"] = stats["total"] - stats["agents"]
+    return stats
+
+
+def property_stats():
+    """Count listings per status and summarize prices in one scan."""
+    aggregates = {
+        status: models.Count("id", filter=models.Q(status=status))
+        for status, _ in Property.STATUS_CHOICES
+    }
+    stats = Property.objects.aggregate(
+        total=models.Count("id"),
+        avg_price=models.Avg("price"),
+        min_price=models.Min("price"),
+        max_price=models.Max("price"),
+        **aggregates,
+    )
+    return {
+        "total": stats["total"],
+        "by_status": {status: stats[status] for status in aggregates},
+        "price": {
+            "min": stats["min_price"],
+            "max": stats["max_price"],
+            "avg": stats["avg_price"],
+        },
+    }
+
+
+def property_type_stats():
+    """Count listings per property type with one grouped query."""
+    counts = dict(
+        Property.objects.values_list("property_type")
+        .annotate(count=models.Count("id"))
+        .order_by()
+    )
+    return {
+        name: counts.get(type_id, 0)
+        for type_id, name in PropertyType.objects.order_by("name").values_list(
+            "id", "name"
+        )
+    }
+
+
+def inventory_stats():
+    """Count the rows of the supporting tables."""
+    return {
+        "neighborhoods": Neighborhood.objects.count(),
+        "features": Feature.objects.count(),
+        "images": PropertyImage.objects.count(),
+        "reviews": PropertyReview.objects.count(),
+        "open_houses": OpenHouse.objects.count(),
+        "favorites": Favorite.objects.count(),
+    }
+
+
+SECTIONS = {
+    "users": user_stats,
+    "properties": property_stats,
+    "property_types": property_type_stats,
+    "inventory": inventory_stats,
+}
+
+
+def timed(section):
+    """Run one section; returns ``(result, seconds)``."""
+    started = time.monotonic()
+    return SECTIONS[section](), time.monotonic() - started
+
+
+def timed_in_thread(section):
+    """Run one section in a worker thread, which has its own connection."""
+    try:
+        return timed(section)
+    finally:
+        connection.close()
+
 
 class Command(BaseCommand):
     help = "Display statistics about the dummy data in the system"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON, e.g. for monitoring",
+        )
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            help="Run the section queries concurrently on separate connections",
+        )
+
     def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["parallel"]:
+            with ThreadPoolExecutor(max_workers=len(SECTIONS)) as pool:
+                results = dict(zip(SECTIONS, pool.map(timed_in_thread, SECTIONS)))
+        else:
+            results = {section: timed(section) for section in SECTIONS}
+
+        report = {section: result for section, (result, _) in results.items()}
+        report["timings"] = {
+            section: round(seconds, 4) for section, (_, seconds) in results.items()
+        }
+        report["timings"]["total"] = round(time.monotonic() - started, 4)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+        else:
+            self.write_report(report)
+
+    def write_report(self, report):
+        """Print the report in the human-readable format."""
         self.stdout.write(
             self.style.SUCCESS("📊 DreamDwelling Data Statistics\n" + "=" * 50)
         )
 
         # User statistics
-        total_users = User.objects.count()
-        agents = User.objects.filter(is_agent=True).count()
-        clients = total_users - agents
-
-        self.stdout.write(f"👥 Users: {total_users} total")
-        self.stdout.write(f"   🏢 Agents: {agents}")
-        self.stdout.write(f"   👤 Clients: {clients}\n")
+        users = report["users"]
+        self.stdout.write(f"👥 Users: {users['total']} total")
+        self.stdout.write(f"   🏢 Agents: {users['agents']}")
+        self.stdout.write(f"   👤 Clients: {users['clients']}\n")
 
         # Property statistics
-        total_properties = Property.objects.count()
-        available_properties = Property.objects.filter(status="available").count()
-        pending_properties = Property.objects.filter(status="pending").count()
-        sold_properties = Property.objects.filter(status="sold").count()
-
-        self.stdout.write(f"🏠 Properties: {total_properties} total")
-        self.stdout.write(f"   ✅ Available: {available_properties}")
-        self.stdout.write(f"   ⏳ Pending: {pending_properties}")
-        self.stdout.write(f"   ✔️ Sold: {sold_properties}\n")
+        properties = report["properties"]
+        labels = dict(Property.STATUS_CHOICES)
+        self.stdout.write(f"🏠 Properties: {properties['total']} total")
+        for status, count in properties["by_status"].items():
+            self.stdout.write(f"   {STATUS_ICONS[status]} {labels[status]}: {count}")
+        self.stdout.write("")
 
         # Property type breakdown
         self.stdout.write("🏘️  Property Types:")
-        for prop_type in PropertyType.objects.all():
-            count = Property.objects.filter(property_type=prop_type).count()
-            self.stdout.write(f"   {prop_type.name}: {count}")
+        for name, count in report["property_types"].items():
+            self.stdout.write(f"   {name}: {count}")
 
         # Price statistics
-        if total_properties > 0:
-            price_stats = Property.objects.aggregate(
-                avg_price=models.Avg("price"),
-                min_price=models.Min("price"),
-                max_price=models.Max("price"),
-            )
-
+        if properties["total"] > 0:
             self.stdout.write("\n💰 Price Range:")
-            self.stdout.write(
-                f"   Min: ${price_stats['min_price']:,.2f}"
-                if price_stats["min_price"]
-                else "   Min: N/A"
-            )
-            self.stdout.write(
-                f"   Max: ${price_stats['max_price']:,.2f}"
-                if price_stats["max_price"]
-                else "   Max: N/A"
-            )
-            self.stdout.write(
-                f"   Avg: ${price_stats['avg_price']:,.2f}"
-                if price_stats["avg_price"]
-                else "   Avg: N/A"
-            )
-
-        # Neighborhood statistics
-        neighborhoods = Neighborhood.objects.count()
-        self.stdout.write(f"\n🏘️  Neighborhoods: {neighborhoods}")
-
-        # Features
-        features = Feature.objects.count()
-        self.stdout.write(f"✨ Features: {features}")
-
-        # Images
-        images = PropertyImage.objects.count()
-        avg_images = images / total_properties if total_properties > 0 else 0
-        self.stdout.write(f"📸 Images: {images} total ({avg_images:.1f} per property)")
-
-        # Reviews
-        reviews = PropertyReview.objects.count()
-        self.stdout.write(f"⭐ Reviews: {reviews}")
-
-        # Open houses
-        open_houses = OpenHouse.objects.count()
-        self.stdout.write(f"🏡 Open Houses: {open_houses}")
+            for label, key in [("Min", "min"), ("Max", "max"), ("Avg", "avg")]:
+                value = properties["price"][key]
+                self.stdout.write(
+                    f"   {label}: ${value:,.2f}" if value else f"   {label}: N/A"
+                )
+
+        inventory = report["inventory"]
+        self.stdout.write(f"\n🏘️  Neighborhoods: {inventory['neighborhoods']}")
+        self.stdout.write(f"✨ Features: {inventory['features']}")
+        avg_images = (
+            inventory["images"] / properties["total"] if properties["total"] else 0
+        )
+        self.stdout.write(
+            f"📸 Images: {inventory['images']} total ({avg_images:.1f} per property)"
+        )
+        self.stdout.write(f"⭐ Reviews: {inventory['reviews']}")
+        self.stdout.write(f"🏡 Open Houses: {inventory['open_houses']}")
+        self.stdout.write(f"❤️ Favorites: {inventory['favorites']}")
 
-        # Favorites
-        favorites = Favorite.objects.count()
-        self.stdout.write(f"❤️ Favorites: {favorites}")
+        self.stdout.write("\n⏱️  Timings:")
+        for section, seconds in report["timings"].items():
+            self.stdout.write(f"   {section}: {seconds * 1000:.1f} ms")
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -2,8 +2,11 @@
 Tests for user models.
 """
 
+import io
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from properties.models import PriceChange, Property
 from users.models import UserAddress
 
 User = get_user_model()
@@ -111,3 +114,30 @@ class UserAddressTests(TestCase):
         
         self.assertFalse(address1.is_default)
         self.assertTrue(address2.is_default)
+
+
+class GenerateDummyDataTests(TestCase):
+    """Test cases for the generate_dummy_data command."""
+
+    def generate(self):
+        """Run the command with a fixed seed and return the generated rows."""
+        call_command(
+            'generate_dummy_data', '--users', '5', '--properties', '20',
+            '--batch-size', '7', '--seed', '1', stdout=io.StringIO(),
+        )
+        users = list(User.objects.order_by('id').values_list('email', 'is_agent'))
+        listings = list(
+            Property.objects.order_by('id').values_list('title', 'city', 'price', 'bedrooms')
+        )
+        return users, listings
+
+    def test_seeded_runs_are_reproducible(self):
+        """Test a run creates the requested rows and the same seed gives the same data."""
+        users, listings = self.generate()
+        self.assertEqual(len(users), 5)
+        self.assertEqual(len(listings), 20)
+        self.assertEqual(
+            PriceChange.objects.count(),
+            sum(len(history) for history in Property.objects.values_list('price_history', flat=True)),
+        )
+        self.assertEqual(self.generate(), (users, listings))
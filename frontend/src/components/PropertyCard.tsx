@@ -65,18 +65,18 @@ export default function PropertyCard({
     >
       <Link href={`/properties/${property.id}`}>
         <div className="relative h-48 w-full">
-          {property.images && property.images.length > 0 ? (
+          {property.primary_image ? (
             <Image
-              src={property.images[0].image}
+              src={property.primary_image}
               alt={`${property.title}`}
               fill
               className="object-cover"
               unoptimized
               priority={priority}
             />
-          ) : property.primary_image ? (
+          ) : property.images && property.images.length > 0 ? (
             <Image
-              src={property.primary_image}
+              src={property.images[0].image}
               alt={`${property.title}`}
               fill
               className="object-cover"